@@ -7,7 +7,7 @@ from model import Building, Unit, Tile, Map
 
 
 class AIStrategy:
-    def execute(self, units, buildings, game_map, ai):
+    def execute(self, units, buildings, game_map, ai, owner=None):
         """
         Exécute la stratégie pour une mise à jour du jeu.
 
@@ -16,6 +16,7 @@ class AIStrategy:
             buildings (list): Liste des bâtiments du jeu.
             game_map (Map): Carte du jeu.
             ai (AI): L'objet représentant l'IA du joueur.
+            owner (str): Joueur dont l'IA est jouée (par défaut le joueur local).
         """
         raise NotImplementedError("Cette méthode doit être implémentée par chaque stratégie.")
 
@@ -26,7 +27,10 @@ class AIStrategy:
 #-------------------------------------------------------------------------------------------------------
 #-------------------------------------------------------------------------------------------------------
 class AI:
-    def __init__(self, buildings, units):
+    owner = None  # Pour les IA des anciennes sauvegardes
+
+    def __init__(self, buildings, units, *, owner=None):
+        self.owner = owner  # Joueur de l'IA (None : le joueur local, voir model.Joueur)
         self.resources = {
             'Wood': 200,
             'Gold': 100,
@@ -41,36 +45,53 @@ class AI:
 
     # Autres méthodes de la classe AI
 
+    BUILD_COSTS = {'Farm': {'Wood': 50, 'Gold': 30}}  # Bâtiments construits par l'IA
+
     def build(self, game_map):
         """Méthode pour construire un bâtiment si les ressources sont disponibles."""
         # Exemple : Construire une ferme si assez de bois et d'or
-        cost = {'Wood': 50, 'Gold': 30}
-        if self.can_afford(cost):
+        if self.can_afford(self.BUILD_COSTS['Farm']):
             # Trouver une position valide pour construire le bâtiment
             x, y = self.find_valid_build_location(game_map)
             if x is not None and y is not None:
                 # Construire une ferme
-                new_building = Building('Farm', x, y)
-                game_map.place_building(new_building, x, y)
-                self.buildings.append(new_building)
-                self.pay_resources(cost)
+                self.build_at(game_map, 'Farm', x, y)
                #print(f"Bâtiment {new_building.building_type} construit à ({x}, {y})")
         #else:
            #print("Pas assez de ressources pour construire.")
 
+    def build_at(self, game_map, building_type, x, y):
+        """Construit le bâtiment en (x, y) si la case est libre et le coût payable ; renvoie le bâtiment ou None."""
+        cost = self.BUILD_COSTS[building_type]
+        if not game_map.is_empty(x, y) or not self.can_afford(cost):
+            return None
+        new_building = Building(building_type, x, y, self.owner)
+        game_map.place_building(new_building, x, y)
+        self.buildings.append(new_building)
+        self.pay_resources(cost)
+        return new_building
 
-    def find_valid_build_location(self, game_map):
-        """Trouver une position libre à proximité immédiate du Town Center pour construire une ferme."""
+
+    def find_valid_build_location(self, game_map, rng=None):
+        """Trouver une position libre à proximité immédiate du Town Center pour construire une ferme.
+
+        Sans rng, la première case libre ; avec rng (tirage du tour en lockstep), une case libre au hasard.
+        """
         # Centre du Town Center
         center_x, center_y = self.town_center.x, self.town_center.y
 
         # Limite la recherche à un rayon de 3 cases autour du Town Center
+        free = []
         for dx in range(-3, 4):
             for dy in range(-3, 4):
                 x, y = center_x + dx, center_y + dy
                 # Vérifie si la case est libre et dans les limites de la carte
                 if game_map.is_empty(x, y):
-                    return x, y
+                    if rng is None:
+                        return x, y
+                    free.append((x, y))
+        if free:
+            return rng.choice(free)
 
         # Aucun emplacement disponible trouvé dans la zone de recherche
        #print("Aucun emplacement libre trouvé dans la zone de 3 cases autour du Town Center pour la ferme.")
@@ -2,66 +2,170 @@ import time
 from ai_strategies.base_strategies import AIStrategy
 from view import Print_Display
 
+# Type de cible recherché sur la carte pour chaque ressource
+RESOURCE_TARGETS = {'Food': 'Farm', 'Wood': 'Wood', 'Gold': 'Gold'}
+
 class StrategieNo1(AIStrategy):
-    def execute(self, units, buildings, game_map, ai):
-        # Déterminer le propriétaire local (on suppose que ai appartient au joueur local)
-        # Les unités sans owner explicite utilisent Joueur de model
-        from model import Joueur
-        local_owner = Joueur
-        
-        for unit in units:
+    def execute(self, units, buildings, game_map, ai, owner=None):
+        own_units, town_center = self._own_side(buildings, game_map, owner)
+
+        # Unités qui doivent choisir une ressource : la validité de leur trajet n'est vérifiée
+        # qu'une fois par tour, et une seule requête groupée les sert toutes
+        searching = {unit for unit in own_units if self._idle(unit, game_map)}
+        nearest = game_map.nearest_targets(
+            [(unit.x, unit.y) for unit in searching], RESOURCE_TARGETS.values()
+        ) if searching else {}
+
+        for unit in own_units:
             # Ignorer les unités distantes (du joueur adverse synchronisées via le réseau)
             is_remote = getattr(unit, 'is_remote', False)
             if is_remote:
                 continue
-            
-            # Ignorer aussi les unités qui n'appartiennent pas à ce joueur
-            if unit.owner != local_owner:
-                continue
-            
-            # Gestion du dépôt des ressources
-            if unit.returning_to_town_center:
-                path = unit.find_nearest_town_center(game_map, buildings)
-                if path:
-                    next_step = path.pop(0)
-                    unit.move(*next_step)
-                    if (unit.x, unit.y) == (buildings[0].x, buildings[0].y):
-                        unit.deposit_resource(buildings[0])
-                        unit.returning_to_town_center = False  # Réinitialisation
-                       #print(f"{unit.unit_type} retourne à la sélection de ressources après dépôt.")
 
-            else:
-                # Recherche et choix de la ressource la plus proche disponible
-                food_path = unit.find_nearest_farm(game_map)
-                wood_path = unit.find_nearest_wood(game_map)
-                gold_path = unit.find_nearest_gold(game_map)
-
-                paths = {
-                    'Food': (food_path, len(food_path) if food_path else float('inf')),
-                    'Wood': (wood_path, len(wood_path) if wood_path else float('inf')),
-                    'Gold': (gold_path, len(gold_path) if gold_path else float('inf'))
-                }
-
-                # Sélection de la ressource la plus proche
-                nearest_resource = min(paths.items(), key=lambda x: x[1][1])
-               #print(f"{unit.unit_type} sélectionne la ressource la plus proche : {nearest_resource[0]}")
-
-                if nearest_resource[1][0]:  # Si un chemin est trouvé
-                    next_step = nearest_resource[1][0].pop(0)
-                    unit.move(*next_step)
-
-                    # Action de récolte en fonction de la ressource choisie
-                    if nearest_resource[0] == 'Food':
-                        farm_tile = game_map.grid[unit.y][unit.x]
-                        if farm_tile.building and farm_tile.building.building_type == 'Farm':
-                            unit.working_farm = farm_tile.building
-                            unit.gather_food_from_farm()
-                    elif nearest_resource[0] == 'Wood':
-                        unit.gather_resource(game_map)
-                    elif nearest_resource[0] == 'Gold':
-                        unit.gather_resource(game_map)
+            if unit in searching:
+                choice = self._choose(unit, nearest[(unit.x, unit.y)], game_map)
+                if choice is None:
+                    continue  # Aucun chemin trouvé
+                target_type, path = choice
+                unit.plan_path(game_map, target_type, path=path)
+            self._step(unit, game_map, town_center)
 
         # Mise à jour pour l'IA
         ai.update_population(0)
         ai.build(game_map)
 
+    # En lockstep, l'exécution est découpée : orders() sur le seul pair qui joue l'IA, puis
+    # gather() et AI.build_at() à la réception des commandes, et step() sur tous les pairs
+
+    def orders(self, game_map, ai, owner, pending, rng):
+        """Décisions de l'IA du joueur, en commandes (champs de LockstepSession.issue).
+
+        pending : ordres émis pas encore joués (identifiant réseau de l'unité, ou 'BUILD'),
+        qui ne sont pas répétés ; rng : tirage du tour pour le choix de l'emplacement.
+        """
+        searching = [
+            unit for unit in game_map.entities.units_of(owner)
+            if unit.network_id not in pending and self._idle(unit, game_map)
+        ]
+        nearest = game_map.nearest_targets(
+            [(unit.x, unit.y) for unit in searching], RESOURCE_TARGETS.values()
+        ) if searching else {}
+        commands = []
+        for unit in searching:
+            choice = self._choose(unit, nearest[(unit.x, unit.y)], game_map)
+            if choice is not None:
+                # Seul le type de cible part : le chemin est recalculé par tous les pairs au tour joué
+                commands.append({"kind": "GATHER", "unit": unit.network_id, "target": choice[0]})
+        if 'BUILD' not in pending and ai.can_afford(ai.BUILD_COSTS['Farm']):
+            x, y = ai.find_valid_build_location(game_map, rng)
+            if x is not None and y is not None:
+                commands.append({"kind": "BUILD", "x": x, "y": y, "target": 'Farm'})
+        return commands
+
+    def gather(self, unit, game_map, target_type):
+        """Envoie l'unité, si elle est inoccupée, vers la cible target_type la plus proche ; renvoie le chemin ou None."""
+        if not self._idle(unit, game_map):
+            return None
+        if target_type == 'Farm':
+            # La ferme la plus proche doit être libre et non épuisée
+            path = unit.find_nearest_farm(game_map)
+        else:
+            position = (unit.x, unit.y)
+            path = game_map.nearest_targets([position], (target_type,))[position][target_type][2]
+            if path is None:
+                path = game_map.distance_field(target_type).path_from(unit.x, unit.y)
+        if path is None:
+            return None
+        return unit.plan_path(game_map, target_type, path=path)
+
+    def step(self, units, buildings, game_map, ai, owner=None):
+        """Fait avancer les unités du joueur sur leurs trajets (récolte, dépôt, ferme), sans décision."""
+        own_units, town_center = self._own_side(buildings, game_map, owner)
+        for unit in own_units:
+            if self._idle(unit, game_map):
+                unit.clear_path()  # En attente d'une commande GATHER
+                continue
+            self._step(unit, game_map, town_center)
+        ai.update_population(0)
+
+    @staticmethod
+    def _own_side(buildings, game_map, owner):
+        # Déterminer le propriétaire local (on suppose que ai appartient au joueur local)
+        # Les unités sans owner explicite utilisent Joueur de model ; en lockstep, chaque
+        # pair joue l'IA de tous les joueurs et passe owner
+        from model import Joueur
+        local_owner = owner if owner is not None else Joueur
+        # Unités du joueur local, lues dans le registre de la carte plutôt qu'en filtrant toute la liste
+        own_units = game_map.entities.units_of(local_owner)
+        town_center = game_map.entities.first(local_owner, 'Town Center') or buildings[0]
+        return own_units, town_center
+
+    @staticmethod
+    def _idle(unit, game_map):
+        """L'unité doit choisir une ressource : ni dépôt, ni récolte à la ferme, ni trajet valide."""
+        return (
+            not getattr(unit, 'is_remote', False)
+            and not unit.returning_to_town_center
+            and not (unit.working_farm and (unit.x, unit.y) == (unit.working_farm.x, unit.working_farm.y))
+            and (unit.path_target_type not in RESOURCE_TARGETS.values() or not unit.path_is_valid(game_map))
+        )
+
+    @staticmethod
+    def _choose(unit, answers, game_map):
+        """(type de cible, chemin) de la ressource la plus proche, d'après la requête groupée, ou None."""
+        # Distance vers chaque ressource, issue de la requête groupée du tour
+        paths = {
+            resource: answers[target_type][1]
+            for resource, target_type in RESOURCE_TARGETS.items()
+        }
+
+        # La ferme la plus proche doit être libre et non épuisée
+        farm_path = None
+        if paths['Food'] <= min(paths['Wood'], paths['Gold']):
+            farm_path = unit.find_nearest_farm(game_map)
+            if not farm_path:
+                paths['Food'] = float('inf')
+
+        # Sélection de la ressource la plus proche
+        nearest_resource = min(paths.items(), key=lambda x: x[1])
+       #print(f"{unit.unit_type} sélectionne la ressource la plus proche : {nearest_resource[0]}")
+        if nearest_resource[1] == float('inf'):
+            return None  # Aucun chemin trouvé
+
+        target_type = RESOURCE_TARGETS[nearest_resource[0]]
+        if target_type == 'Farm':
+            return target_type, farm_path
+        # Chemin de la requête groupée, ou suivi dans le champ de distance : pas de recherche
+        path = answers[target_type][2]
+        if path is None:
+            path = game_map.distance_field(target_type).path_from(unit.x, unit.y)
+        return target_type, path
+
+    @staticmethod
+    def _step(unit, game_map, town_center):
+        # Gestion du dépôt des ressources
+        if unit.returning_to_town_center:
+            # Une seule recherche par trajet : on ne replanifie que si le chemin est invalide
+            if unit.path_target_type != 'Town Center' or not unit.path_is_valid(game_map):
+                unit.plan_path(game_map, 'Town Center', town_center)
+            unit.follow_path()
+            if (unit.x, unit.y) == (town_center.x, town_center.y):
+                unit.deposit_resource(town_center)
+                unit.returning_to_town_center = False  # Réinitialisation
+                unit.clear_path()
+               #print(f"{unit.unit_type} retourne à la sélection de ressources après dépôt.")
+
+        elif unit.working_farm and (unit.x, unit.y) == (unit.working_farm.x, unit.working_farm.y):
+            # Le villageois est déjà sur sa ferme : il continue la récolte
+            unit.gather_food_from_farm()
+
+        elif unit.follow_path():
+            # Action de récolte en fonction de la ressource choisie
+            if unit.path_target_type == 'Farm':
+                farm_tile = game_map.grid[unit.y][unit.x]
+                if farm_tile.building and farm_tile.building.building_type == 'Farm':
+                    unit.working_farm = farm_tile.building
+                    unit.gather_food_from_farm()
+            else:
+                unit.gather_resource(game_map)
+            unit.clear_path()
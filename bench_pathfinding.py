@@ -0,0 +1,64 @@
+import random
+import sys
+import time
+
+from model import Map, Building, Unit
+import pathfinding
+
+# Usage : python bench_pathfinding.py [taille_carte] [nombre_requetes]
+MAP_SIZE = int(sys.argv[1]) if len(sys.argv) > 1 else 120
+QUERIES = int(sys.argv[2]) if len(sys.argv) > 2 else 200
+
+# (nom, nombre de clusters de bois pour une carte 120x120)
+LAYOUTS = [("ouverte", 2), ("forestière", 120)]
+ENGINES = ["astar", "jps", "hpa"]
+
+
+def build_map(forest_clusters):
+    scale = (MAP_SIZE / 120) ** 2
+    game_map = Map(MAP_SIZE, MAP_SIZE, seed=4173)
+    game_map.generate_forest_clusters(
+        num_clusters=max(1, int(forest_clusters * scale)), cluster_size=40
+    )
+    game_map.generate_gold_clusters(num_clusters=max(1, int(4 * scale)))
+    town_center = Building("Town Center", MAP_SIZE // 2, MAP_SIZE // 2)
+    game_map.place_building(town_center, town_center.x, town_center.y)
+    return game_map, town_center
+
+
+def bench(game_map, town_center, engine, starts, target_type):
+    game_map.set_path_engine(engine)
+    unit = Unit("Villager", 0, 0, None)
+    target = town_center if target_type == "Town Center" else None
+    pathfinding.search_stats.reset()
+    total_length = 0
+    begin = time.perf_counter()
+    for start in starts:
+        path = unit.find_path(game_map, start, target_type, target)
+        total_length += len(path) if path else 0
+    elapsed = time.perf_counter() - begin
+    return elapsed, pathfinding.search_stats.expanded, total_length
+
+
+if __name__ == "__main__":
+    for name, forest_clusters in LAYOUTS:
+        game_map, town_center = build_map(forest_clusters)
+        rng = random.Random(1)
+        starts = []
+        while len(starts) < QUERIES:
+            x, y = rng.randrange(MAP_SIZE), rng.randrange(MAP_SIZE)
+            if game_map.is_walkable(x, y):
+                starts.append((x, y))
+
+        print(f"--- Carte {name} {MAP_SIZE}x{MAP_SIZE}, {QUERIES} requêtes ---")
+        for target_type in ("Town Center", "Gold"):
+            for engine in ENGINES:
+                if engine == "hpa" and target_type != "Town Center":
+                    continue  # HPA* ne sert qu'aux cibles connues
+                elapsed, expanded, length = bench(
+                    game_map, town_center, engine, starts, target_type
+                )
+                print(
+                    f"{target_type:12} {engine:6} {elapsed * 1000:9.1f} ms"
+                    f"  noeuds développés: {expanded:8}  longueur totale: {length}"
+                )
@@ -0,0 +1,165 @@
+import random
+from array import array
+from collections import OrderedDict
+
+CHUNK_SIZE = 32
+# Nombre de chunks intacts gardés en mémoire (les chunks modifiés sont toujours gardés)
+CHUNK_CACHE = 256
+
+
+class Chunk:
+    """Cases d'un chunk, dans le même format que les tableaux d'une Map."""
+
+    __slots__ = ("resources", "building_ids", "unit_ids")
+
+    def __init__(self, size):
+        area = size * size
+        self.resources = bytearray(area)
+        self.building_ids = array("I", [0]) * area
+        self.unit_ids = array("I", [0]) * area
+
+    def __getstate__(self):
+        return (self.resources, self.building_ids, self.unit_ids)
+
+    def __setstate__(self, state):
+        self.resources, self.building_ids, self.unit_ids = state
+
+
+class ChunkStore:
+    """Stockage paresseux d'une Map découpée en chunks carrés.
+
+    Un chunk jamais lu n'existe pas en mémoire : il est défini par la graine de
+    la carte et ses coordonnées, et généré au premier accès. Les chunks intacts
+    sont gardés dans un cache LRU (et regénérés s'ils en sortent) ; un chunk
+    modifié passe dans modified et n'est plus jamais évincé.
+    """
+
+    def __init__(self, game_map, chunk_size=CHUNK_SIZE, cache_size=CHUNK_CACHE):
+        self.game_map = game_map
+        self.chunk_size = chunk_size
+        self.cache_size = cache_size
+        self.cache = OrderedDict()  # (cx, cy) -> Chunk intact, du moins au plus récent
+        self.modified = {}  # (cx, cy) -> Chunk modifié depuis sa génération
+        self.wood_clusters = 0.0  # Amas de bois attendus par chunk
+        self.gold_clusters = 0.0
+        self.cluster_size = 40
+        self.generated = 0  # Chunks générés depuis la création (mesure)
+        self._last_key = None  # Dernier chunk lu : les accès voisins se suivent
+        self._last_chunk = None
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        state["cache"] = OrderedDict()  # Les chunks intacts se regénèrent depuis la graine
+        state["_last_key"] = state["_last_chunk"] = None
+        return state
+
+    def configure(self, wood_clusters, gold_clusters, cluster_size):
+        """Répartit les amas demandés pour toute la carte en densité par chunk."""
+        game_map = self.game_map
+        chunks = (game_map.width * game_map.height) / (self.chunk_size * self.chunk_size)
+        self.wood_clusters = wood_clusters / chunks
+        self.gold_clusters = gold_clusters / chunks
+        self.cluster_size = cluster_size
+        self.cache.clear()
+        self.modified.clear()
+        self._last_key = self._last_chunk = None
+
+    def materialized(self):
+        return len(self.cache) + len(self.modified)
+
+    def get(self, cx, cy, write=False):
+        key = (cx, cy)
+        if key == self._last_key and not write:
+            return self._last_chunk
+        chunk = self.modified.get(key)
+        if chunk is None:
+            chunk = self.cache.pop(key, None)
+            if chunk is None:
+                chunk = self._generate(cx, cy)
+            if write:
+                self.modified[key] = chunk
+            else:
+                self.cache[key] = chunk
+                if len(self.cache) > self.cache_size:
+                    self.cache.popitem(last=False)
+        self._last_key, self._last_chunk = key, chunk
+        return chunk
+
+    def _generate(self, cx, cy):
+        """Génère un chunk à partir de la graine de la carte et de ses coordonnées seules."""
+        game_map = self.game_map
+        size = self.chunk_size
+        chunk = self.pristine(cx, cy)
+        self.generated += 1
+        if game_map._resource_index is not None:
+            # L'index de la carte couvre les chunks déjà explorés
+            for i, code in enumerate(chunk.resources):
+                if code:
+                    x, y = cx * size + i % size, cy * size + i // size
+                    game_map._resource_index.update(x, y, [game_map.resource_names[code]])
+        return chunk
+
+    def pristine(self, cx, cy):
+        """Contenu généré du chunk (cx, cy), sans ses modifications ni effet sur le stockage."""
+        game_map = self.game_map
+        size = self.chunk_size
+        chunk = Chunk(size)
+        rng = random.Random(f"{game_map.seed}/{cx}/{cy}")
+        width = min(size, game_map.width - cx * size)
+        height = min(size, game_map.height - cy * size)
+        for code, expected, sizes in (
+            (game_map._resource_code("Wood"), self.wood_clusters, None),
+            (game_map._resource_code("Gold"), self.gold_clusters, (3, 10)),
+        ):
+            # Partie entière des amas attendus, plus un amas avec la probabilité du reste
+            count = int(expected) + (rng.random() < expected - int(expected))
+            for _ in range(count):
+                cluster_size = rng.randint(*sizes) if sizes else self.cluster_size
+                self._grow(chunk, rng, rng.randrange(width), rng.randrange(height),
+                           cluster_size, code, width, height)
+        return chunk
+
+    def _grow(self, chunk, rng, x, y, size, code, width, height):
+        """Amas organique comme Map._create_cluster, limité au chunk."""
+        directions = [(0, 1), (1, 0), (0, -1), (-1, 0), (1, 1), (-1, -1), (-1, 1), (1, -1)]
+        tiles_to_fill = {(x, y)}
+        while tiles_to_fill and size > 0:
+            x, y = tiles_to_fill.pop()
+            index = y * self.chunk_size + x
+            if chunk.resources[index]:
+                continue
+            chunk.resources[index] = code
+            size -= 1
+            rng.shuffle(directions)
+            for dx, dy in directions:
+                nx, ny = x + dx, y + dy
+                if 0 <= nx < width and 0 <= ny < height:
+                    tiles_to_fill.add((nx, ny))
+
+
+class ChunkedArray:
+    """Tableau « à plat » (index y * width + x) dont les cases vivent dans les chunks."""
+
+    __slots__ = ("store", "name")
+
+    def __init__(self, store, name):
+        self.store = store
+        self.name = name
+
+    def __len__(self):
+        return self.store.game_map.width * self.store.game_map.height
+
+    def _locate(self, index, write):
+        store = self.store
+        size = store.chunk_size
+        x, y = index % store.game_map.width, index // store.game_map.width
+        chunk = store.get(x // size, y // size, write)
+        return getattr(chunk, self.name), (y % size) * size + x % size
+
+    def __getitem__(self, index):
+        values, offset = self._locate(index, False)
+        return values[offset]
+
+    def __setitem__(self, index, value):
+        values, offset = self._locate(index, True)
+        values[offset] = value
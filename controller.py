@@ -6,10 +6,11 @@ import subprocess
 import sys
 import signal
 from model import Map, Unit, Building, Joueur
-from view import display_with_curses, handle_input, init_colors, Print_Display
+from view import display_with_curses, handle_input, init_colors, Print_Display, visible_rect
 from view_graphics import (
     handle_input_pygame,
     render_map,
+    visible_rect as visible_rect_graphics,
     screen_width,
     screen_height,
     TILE_WIDTH,
@@ -18,6 +19,9 @@ from view_graphics import (
 )
 
 import network
+import mapgen
+from dispatch import MessageDispatcher, MessageRejected
+from lockstep import LockstepSession
 
 from game_utils import save_game_state, load_game_state
 import socket
@@ -31,6 +35,7 @@ from ai_strategies.base_strategies import AI
 
 from ai_strategies.strategie_No1_dev_ai import (
     StrategieNo1,
+    RESOURCE_TARGETS,
 )  # Importer la stratégie spécifique
 
 # Création de la stratégie choisie
@@ -56,6 +61,9 @@ class SpecialCode:
 # Set to True when you have the C process running
 # Set to False for local testing without C process
 ENABLE_NETWORK = False
+# Lockstep : chaque pair simule toute la partie par tours, seules les commandes sont échangées
+# (les deux joueurs doivent l'activer)
+LOCKSTEP = False
 # ==========================================
 
 
@@ -94,146 +102,230 @@ def parse_kv(payload: str) -> dict:
     return out
 
 
-def apply_network_message(msg_type, payload, units, buildings, game_map, ai):
-    # Nettoyer le payload s'il contient encore le msg_type au début
-    if "|" in payload and payload.startswith(f"{msg_type}|"):
-        payload = payload.split("|", 1)[1]
+def send_map_init(client, game_map):
+    """Envoie au pair la graine, les dimensions et les réglages des ressources de la carte."""
+    wood, gold, cluster = game_map.resource_settings
+    client.send_message(
+        "MAP_INIT", seed=game_map.seed, width=game_map.width, height=game_map.height,
+        wood=wood, gold=gold, cluster=cluster, generator=game_map.generator,
+    )
+
 
+def _map_init_resources(data):
+    """Réglages des ressources d'un MAP_INIT (ceux par défaut si le pair ne les transmet pas)."""
+    if "wood" not in data:
+        return Map.MAP_INIT_RESOURCES
     try:
-        data = parse_kv(payload)
-    except Exception as e:
-        Print_Display(f"[ERROR] Erreur parsing payload: {str(e)}")
-        return
+        return int(data["wood"]), int(data["gold"]), int(data["cluster"])
+    except (KeyError, ValueError, TypeError) as e:
+        raise MessageRejected(f"réglages des ressources invalides: {e}")
+
+
+# Traitements des messages du pair : un par type, champs obligatoires déclarés et convertis
+# une fois par network_messages.dispatch (les rejets sont comptés dans network_messages.rejected)
+network_messages = MessageDispatcher()
+
+
+@network_messages.handler("PING")
+def _on_ping(data, units, buildings, game_map, ai):
+    pass
 
-    # ---------------- PING ----------------
-    if msg_type == "PING":
+
+@network_messages.handler("UPDATE_MAP", x=int, y=int, action=str)
+def _on_update_map(data, units, buildings, game_map, ai):
+    x, y = data["x"], data["y"]
+    if not (0 <= x < game_map.width and 0 <= y < game_map.height):
+        raise MessageRejected(f"position hors limites: ({x}, {y})")
+    game_map.set_resource(x, y, None)
+
+
+@network_messages.handler("UNIT_UPDATE", id=int, x=int, y=int)
+def _on_unit_update(data, units, buildings, game_map, ai):
+    uid, x, y = data["id"], data["x"], data["y"]
+    if not (0 <= x < game_map.width and 0 <= y < game_map.height):
+        raise MessageRejected(f"position hors limites: ({x}, {y})")
+    owner = data.get("owner")
+
+    # Les identifiants sont attribués par chaque pair : la clé inclut le propriétaire
+    u = game_map.entities.unit(owner, uid)
+    if u is not None:
+        u.move(x, y)  # Tient aussi l'occupation de la carte à jour
         return
 
-    # ---------------- MAP_UPDATE -----------------
-    "action:'DELETE_RESOURCE',x:{x},y:{y}"
-    if msg_type == "UPDATE_MAP":
-        try:
-            if "x" not in data or "y" not in data or "action" not in data:
-                Print_Display(
-                    f"[WARNING] UPDATE_MAP message incomplet. Clés reçues: {list(data.keys())} | Payload: {payload}"
-                )
-                return
+    # unité inconnue → création
+    new_unit = Unit(
+        unit_type=data.get("type") or "Villager",
+        x=x,
+        y=y,
+        ai=ai,
+        owner=owner,
+        network_id=uid,
+        is_remote=True,  # Marquer comme unité distante
+    )
+    units.append(new_unit)
+    game_map.add_unit(new_unit)
 
 
-            x = int(data["x"])
-            y = int(data["y"])
+@network_messages.handler("BUILDING_STATE", type=str, x=int, y=int)
+def _on_building_state(data, units, buildings, game_map, ai):
+    b_type, x, y = data["type"], data["x"], data["y"]
 
-            if data["action"] == "DELETE_RESOURCE":
-                game_map.grid[y][x].resource = None
+    existing = game_map.entities.building_at(x, y)
+    if existing is not None and existing.building_type == b_type:
+        return  # déjà présent
+
+    new_b = Building(b_type, x, y)
+    new_b.owner = data.get("owner")
+    buildings.append(new_b)
+    game_map.place_building(new_b, x, y)
 
-            if 0 <= x < game_map.width and 0 <= y < game_map.height:
-                game_map.grid[y][x].resource = None
-            else:
-                Print_Display(
-                    f"[WARNING] UPDATE_MAP position hors limites: ({x}, {y})"
-                )
-            return
-        except (ValueError, KeyError) as e:
-            Print_Display(f"[ERROR] Erreur UPDATE_MAP: {str(e)}")
-            return
 
-    # ---------------- UNIT_UPDATE ----------------
-    if msg_type == "UNIT_UPDATE":
+@network_messages.handler("RESOURCES")
+def _on_resources(data, units, buildings, game_map, ai):
+    if not ai:
+        return
+    for k, v in data.items():
         try:
-            if "id" not in data or "x" not in data or "y" not in data:
-                Print_Display(
-                    f"[WARNING] UNIT_UPDATE message incomplet. Clés reçues: {list(data.keys())} | Payload: {payload}"
-                )
-                return
+            ai.resources[k.capitalize()] = int(v)
+        except (ValueError, TypeError):
+            pass  # Ignorer les clés invalides
+
+
+@network_messages.handler("MAP_INIT", seed=int, width=int, height=int)
+def _on_map_init(data, units, buildings, game_map, ai):
+    if data["width"] <= 0 or data["height"] <= 0:
+        raise MessageRejected(f"dimensions invalides: {data['width']}x{data['height']}")
+    generator = (data.get("generator") or "classic").strip("'\"")
+    resources = _map_init_resources(data)
+    if generator != "chunked" and not mapgen.available(generator):
+        # Une autre carte que celle de l'hôte fausserait toute la partie : on garde la nôtre
+        Print_Display(
+            f"[ERROR] MAP_INIT refusé : générateur {generator} indisponible ici (NumPy absent ?), "
+            "carte de l'hôte non reproductible"
+        )
+        return
 
-            uid = int(data["id"])
-            x = int(data["x"])
-            y = int(data["y"])
+    if lockstep_session is not None:
+        # La partie est recréée à l'identique de celle de l'hôte (carte et bases des deux joueurs)
+        if not lockstep_session.is_host and data["seed"] != lockstep_session.seed:
+            start_lockstep(
+                data["width"], data["height"], data["seed"], generator,
+                lockstep_session.local_player, game_map.path_engine, resources,
+            )
+        return
 
-            for u in units:
-                if hasattr(u, "network_id") and u.network_id == uid:
-                    u.x = x
-                    u.y = y
-                    return
+    # La nouvelle carte reprend les bâtiments et unités déjà connus (et leur registre) :
+    # ils doivent tous y tenir
+    width, height = data["width"], data["height"]
+    outside = [e for e in (*units, *buildings) if not (0 <= e.x < width and 0 <= e.y < height)]
+    if outside:
+        raise MessageRejected(f"carte {width}x{height} trop petite : {len(outside)} entités hors limites")
+    game_map.rebuild(data["width"], data["height"], data["seed"], generator, buildings, units, resources)
 
-            # unité inconnue → création
-            new_unit = Unit(
-                unit_type=data.get("type", "Villager"),
-                x=x,
-                y=y,
-                ai=ai,
-                owner=data.get("owner"),
-                network_id=uid,
-                is_remote=True,  # Marquer comme unité distante
-            )
-            units.append(new_unit)
-            return
 
-        except (ValueError, KeyError) as e:
-            Print_Display(f"[ERROR] Erreur UNIT_UPDATE: {str(e)}")
-            return
+# Commandes des joueurs en lockstep, jouées par tous les pairs au même tour
+lockstep_commands = MessageDispatcher()
+lockstep_session = None
+lockstep_ais = {}  # Joueur -> AI : en lockstep, chaque pair simule les unités de tous les joueurs
+lockstep_pending = set()  # Ordres de notre IA émis et pas encore joués (voir StrategieNo1.orders)
+
+
+def _pending_key(command):
+    return command["unit"] if command["kind"] == "GATHER" else command["kind"]
+
+
+@lockstep_commands.handler("GATHER", unit=int, target=str)
+def _on_gather(data, units, buildings, game_map, ais, strategy):
+    if data["target"] not in RESOURCE_TARGETS.values():
+        raise MessageRejected(f"cible inconnue: {data['target']}")
+    unit = game_map.entities.unit(data["player"], data["unit"])
+    if unit is not None:
+        # Chemin calculé sur l'état du tour, identique sur tous les pairs ; ignoré si l'unité est occupée
+        strategy.gather(unit, game_map, data["target"])
+
+
+@lockstep_commands.handler("BUILD", x=int, y=int, target=str)
+def _on_build(data, units, buildings, game_map, ais, strategy):
+    player_ai = ais[data["player"]]
+    if data["target"] not in player_ai.BUILD_COSTS:
+        raise MessageRejected(f"bâtiment inconnu: {data['target']}")
+    # Case occupée ou coût trop élevé : refusé de la même façon par tous les pairs
+    player_ai.build_at(game_map, data["target"], data["x"], data["y"])
+
+
+def start_lockstep(width, height, seed, generator, side, path_engine="auto", resources=Map.MAP_INIT_RESOURCES):
+    """Crée une partie lockstep : même carte et mêmes bases des deux joueurs sur tous les pairs."""
+    global units, buildings, game_map, ai, lockstep_session
+    import model as model_module
+
+    model_module.Joueur = side
+    # Ressources générées comme à la réception de MAP_INIT : graine et réglages de l'hôte
+    game_map = Map(width, height, seed, chunked=generator == "chunked")
+    game_map.set_path_engine(path_engine)
+    game_map.generate_resources(*resources, generator)
+    units, buildings = [], []
+    lockstep_ais.clear()
+    lockstep_pending.clear()
+    for player, (x, y, d) in (("J1", (10, 10, 1)), ("J2", (width - 10, height - 10, -1))):
+        town_center = Building("Town Center", x, y, player)
+        game_map.place_building(town_center, x, y)
+        buildings.append(town_center)
+        player_ai = AI(buildings, units, owner=player)
+        player_ai.town_center = town_center
+        # Identifiants réseau fixes : les mêmes sur tous les pairs
+        for network_id, (vx, vy) in enumerate(((x + d, y + d), (x - 2 * d, y + d), (x + d, y - 2 * d)), 1):
+            villager = Unit("Villager", vx, vy, player_ai, owner=player, network_id=network_id)
+            units.append(villager)
+            game_map.add_unit(villager)
+        lockstep_ais[player] = player_ai
+    ai = lockstep_ais[side]
+    player_side_state.set_player_ai(ai)
+
+    lockstep_session = LockstepSession(seed, lockstep_ais, side)
+    model_module.clock = lockstep_session.clock  # Récoltes rythmées par les tours
+    if network.client is not None:
+        network.client.lockstep = lockstep_session
 
-    # ---------------- BUILDING_STATE ----------------
-    if msg_type == "BUILDING_STATE":
-        try:
-            if "type" not in data or "x" not in data or "y" not in data:
-                Print_Display(f"[WARNING] BUILDING_STATE message incomplet: {payload}")
-                return
-
-            b_type = data["type"]
-            x = int(data["x"])
-            y = int(data["y"])
-            owner = data.get("owner")
-
-            for b in buildings:
-                if b.x == x and b.y == y and b.building_type == b_type:
-                    return  # déjà présent
-
-            new_b = Building(b_type, x, y)
-            new_b.owner = owner
-            buildings.append(new_b)
-            game_map.place_building(new_b, x, y)
-            return
-        except (ValueError, KeyError) as e:
-            Print_Display(f"[ERROR] Erreur BUILDING_STATE: {str(e)}")
-            return
-
-    # ---------------- RESOURCES ----------------
-    if msg_type == "RESOURCES":
-        try:
-            if not ai:
-                return
-            for k, v in data.items():
-                try:
-                    ai.resources[k.capitalize()] = int(v)
-                except (ValueError, KeyError):
-                    pass  # Ignorer les clés invalides
-            return
-        except Exception as e:
-            Print_Display(f"[ERROR] Erreur RESOURCES: {str(e)}")
-            return
-
-    # ---------------- MAP_INIT ----------------
-    if msg_type == "MAP_INIT":
-        try:
-            if "seed" not in data or "width" not in data or "height" not in data:
-                Print_Display(f"[WARNING] MAP_INIT message incomplet: {payload}")
-                return
 
-            seed = int(data["seed"])
-            width = int(data["width"])
-            height = int(data["height"])
+def lockstep_update(session, client, units, buildings, game_map, strategy):
+    """Joue le prochain tour s'il est dû et que les commandes de tous les joueurs sont arrivées."""
+    if not session.due(time.time()):
+        return
+    desync = session.desync_report()  # Détectée en recevant un TURN ou au tour précédent
+    if desync is not None:
+        Print_Display(desync)
+    if not session.ready():
+        # Attente du pair : on renvoie nos tours (et la carte, tant que la partie n'a pas commencé)
+        if session.turn == 0 and session.is_host:
+            send_map_init(client, game_map)
+        session.send(client)
+        session.next_turn_time = time.time() + session.turn_length
+        return
+    for command in session.advance():
+        if command["player"] == session.local_player:
+            lockstep_pending.discard(_pending_key(command))
+        lockstep_commands.dispatch(command["kind"], command, units, buildings, game_map, lockstep_ais, strategy)
+    for player in session.players:
+        strategy.step(units, buildings, game_map, lockstep_ais[player], owner=player)
+    # Seule notre IA décide : ses ordres sont joués par tous les pairs dans delay tours
+    player = session.local_player
+    rng = session.rng(f"ai:{player}")
+    for command in strategy.orders(game_map, lockstep_ais[player], player, lockstep_pending, rng):
+        session.issue(**command)
+        lockstep_pending.add(_pending_key(command))
+    session.record_hash(game_map.state_hash)  # Comparée à celle du pair (desync)
+    session.send(client)
 
-            game_map.__init__(width, height, seed)
-            game_map.generate_forest_clusters(10, 40)
-            game_map.generate_gold_clusters(4)
-            return
-        except (ValueError, KeyError) as e:
-            Print_Display(f"[ERROR] Erreur MAP_INIT: {str(e)}")
-            return
 
-    # ---------------- UNKNOWN ----------------
-    Print_Display(f"[NET] Message inconnu: {msg_type} | {payload}")
+def apply_network_message(msg_type, payload, units, buildings, game_map, ai):
+    if isinstance(payload, dict):
+        data = payload  # Champs déjà décodés par NetworkClient (binaire ou texte)
+    else:
+        # Nettoyer le payload s'il contient encore le msg_type au début (anciens pairs)
+        if "|" in payload and payload.startswith(f"{msg_type}|"):
+            payload = payload.split("|", 1)[1]
+        data = parse_kv(payload)
+    network_messages.dispatch(msg_type, data, units, buildings, game_map, ai)
 
 
 # Global Variables
@@ -687,6 +779,7 @@ def game_loop_curses(stdscr):
                 NETWORK_PYTHON_PORT, NETWORK_MY_PORT
                 )
     # Initialiser le network client s'il n'existe pas déjà
+    network.client.lockstep = lockstep_session
 
     max_height, max_width = stdscr.getmaxyx()
     max_height = max_height - 10
@@ -722,23 +815,34 @@ def game_loop_curses(stdscr):
         display_with_curses(
             stdscr, game_map, units, player_side_state, ai, view_x, view_y
         )
-        last_update_time = update_game(
-            units,
-            buildings,
-            game_map,
-            ai,
-            strategy=current_strategy,
-            delay=0.01,
-            last_update_time=last_update_time,
-        )
-
-        # Send periodic updates to C process (every 0.5 seconds)
-        current_time = time.time()
-        if current_time - last_network_send_time > 0.5:
-            network.send_game_state_to_c(
-                network.client, units, buildings, ai, player_side_state.player_side
+        if lockstep_session is not None:
+            # Simulation par tours : seules les commandes passent par le réseau
+            lockstep_update(
+                lockstep_session, network.client, units, buildings, game_map, current_strategy
+            )
+        else:
+            last_update_time = update_game(
+                units,
+                buildings,
+                game_map,
+                ai,
+                strategy=current_strategy,
+                delay=0.01,
+                last_update_time=last_update_time,
             )
-            last_network_send_time = current_time
+
+            # Le pair n'envoie en priorité que ce qui est affiché ici
+            network.client.send_view(*visible_rect(view_x, view_y))
+
+            # Send periodic updates to C process (every 0.5 seconds)
+            current_time = time.time()
+            if current_time - last_network_send_time > 0.5:
+                network.send_game_state_to_c(
+                    network.client, units, buildings, ai, player_side_state.player_side
+                )
+                last_network_send_time = current_time
+        # Un seul envoi groupé pour les messages de la frame (récoltes, accusés de réception)
+        network.client.flush()
 
         # Auto-save game state (every 5 seconds)
         # last_save_time = periodic_autosave(units, buildings, game_map, ai, current_time, last_save_time, save_interval=5.0)
@@ -761,6 +865,7 @@ def game_loop_graphics():
             network.client = network.load_network_client(
                 NETWORK_PYTHON_PORT, NETWORK_MY_PORT
                 )
+    network.client.lockstep = lockstep_session
 
     # Initialiser pygame pour le mode graphique
     screen = initialize_graphics()
@@ -778,29 +883,44 @@ def game_loop_graphics():
         current_time = time.time()
 
         network.client.poll()
+        for msg_type, payload in network.client.consume_messages():
+            apply_network_message(msg_type, payload, units, buildings, game_map, ai)
 
         # Gère les entrées utilisateur pour le scrolling de la carte
         view_x, view_y = handle_input_pygame(
             view_x, view_y, max_width, max_height, game_map
         )
 
-        # Mise à jour du jeu à intervalles réguliers
-        last_update_time = update_game(
-            units,
-            buildings,
-            game_map,
-            ai,
-            strategy=current_strategy,
-            delay=0.01,
-            last_update_time=last_update_time,
-        )
+        if lockstep_session is not None:
+            # Simulation par tours : seules les commandes passent par le réseau
+            lockstep_update(
+                lockstep_session, network.client, units, buildings, game_map, current_strategy
+            )
+        else:
+            # Mise à jour du jeu à intervalles réguliers
+            last_update_time = update_game(
+                units,
+                buildings,
+                game_map,
+                ai,
+                strategy=current_strategy,
+                delay=0.01,
+                last_update_time=last_update_time,
+            )
 
-        # Send periodic updates to C process (every 0.5 seconds)
-        if current_time - last_network_send_time > 0.5:
-            network.send_game_state_to_c(
-                network.client, units, buildings, ai, player_side_state.player_side
+            # Le pair n'envoie en priorité que ce qui est affiché ici
+            network.client.send_view(
+                *visible_rect_graphics(game_map, view_x, view_y, max_width, max_height)
             )
-            last_network_send_time = current_time
+
+            # Send periodic updates to C process (every 0.5 seconds)
+            if current_time - last_network_send_time > 0.5:
+                network.send_game_state_to_c(
+                    network.client, units, buildings, ai, player_side_state.player_side
+                )
+                last_network_send_time = current_time
+        # Un seul envoi groupé pour les messages de la frame (récoltes, accusés de réception)
+        network.client.flush()
 
         # Auto-save game state (every 5 seconds)
         # last_save_time = periodic_autosave(units, buildings, game_map, ai, current_time, last_save_time, save_interval=5.0)
@@ -909,6 +1029,8 @@ def start_new_game_curses(stdscr):
         ("Port réseau (par défaut 5000): ", "5000"),
         ("Port pyhton (par défaut 5001): ", "5001"),
         ("Port distant (par défaut 6000): ", "6000"),
+        ("Recherche de chemin (auto/astar/jps/hpa): ", "auto"),
+        ("Génération de la carte (classic/numpy/noise/chunked): ", "classic"),
     ]
     input_values = []
 
@@ -955,6 +1077,8 @@ def start_new_game_curses(stdscr):
         my_port = int(input_values[4])
         python_port = int(input_values[5])
         dest_port = int(input_values[6])
+        path_engine = input_values[7].strip().lower()
+        generator = input_values[8].strip().lower()
 
     except ValueError:
         stdscr.addstr(
@@ -971,6 +1095,8 @@ def start_new_game_curses(stdscr):
         my_port = 5000
         python_port = 5001
         dest_port = 6000
+        path_engine = "auto"
+        generator = "classic"
 
     # Initialisation de la nouvelle partie
     global units, buildings, game_map, ai, player_side_state, NETWORK_MY_PORT, NETWORK_PYTHON_PORT, NETWORK_DEST_PORT
@@ -989,9 +1115,9 @@ def start_new_game_curses(stdscr):
 
     model_module.Joueur = player_side_state.player_side
 
-    game_map = Map(map_size, map_size)
-    game_map.generate_forest_clusters(num_clusters=wood_clusters, cluster_size=40)
-    game_map.generate_gold_clusters(num_clusters=gold_clusters)
+    game_map = Map(map_size, map_size, chunked=generator == "chunked")
+    game_map.set_path_engine(path_engine)
+    game_map.generate_resources(wood_clusters, gold_clusters, 40, generator)
 
     match player_side_state.player_side:
 
@@ -1018,6 +1144,7 @@ def start_new_game_curses(stdscr):
     villager3 = Unit("Villager", starting_x_V3, starting_y_V3, None)
     units = [villager1, villager2, villager3]
     buildings = [town_center]
+    game_map.sync_units(units)
 
     # Créez l'instance de l'AI après avoir créé les unités
     ai = AI(buildings, units)
@@ -1032,6 +1159,12 @@ def start_new_game_curses(stdscr):
     # Set the player AI in game state
     player_side_state.set_player_ai(ai)
 
+    if LOCKSTEP:
+        start_lockstep(
+            map_size, map_size, seed, generator, player_side_state.player_side, path_engine,
+            (wood_clusters, gold_clusters, 40),
+        )
+
     # Initialiser la communication réseau
     NET_ME = str(my_port)
     NET_DEST = str(dest_port)
@@ -1112,6 +1245,8 @@ def start_new_game_graphics(screen, font):
         ("Nombre de clusters de bois (par défaut 10): ", "10"),
         ("Nombre de clusters d'or (par défaut 4): ", "4"),
         ("Vitesse du jeu (par défaut 1.0): ", "1.0"),
+        ("Recherche de chemin (auto/astar/jps/hpa): ", "auto"),
+        ("Génération de la carte (classic/numpy/noise/chunked): ", "classic"),
     ]
     input_values = []
 
@@ -1177,12 +1312,16 @@ def start_new_game_graphics(screen, font):
         wood_clusters = int(input_values[1])
         gold_clusters = int(input_values[2])
         speed = float(input_values[3])
+        path_engine = input_values[4].strip().lower()
+        generator = input_values[5].strip().lower()
     except ValueError:
         # En cas d'erreur de saisie, utiliser les valeurs par défaut
         map_size = 120
         wood_clusters = 10
         gold_clusters = 4
         speed = 1.0
+        path_engine = "auto"
+        generator = "classic"
 
     # Initialisation de la nouvelle partie
     global units, buildings, game_map, ai, player_side_state
@@ -1196,9 +1335,9 @@ def start_new_game_graphics(screen, font):
     model_module.Joueur = player_side_state.player_side
 
     seed = int(time.time())
-    game_map = Map(map_size, map_size, seed)
-    game_map.generate_forest_clusters(num_clusters=10, cluster_size=40)
-    game_map.generate_gold_clusters(num_clusters=4)
+    game_map = Map(map_size, map_size, seed, chunked=generator == "chunked")
+    game_map.set_path_engine(path_engine)
+    game_map.generate_resources(wood_clusters, gold_clusters, 40, generator)
     match player_side_state.player_side:
 
         case "J1":
@@ -1215,22 +1354,31 @@ def start_new_game_graphics(screen, font):
 
     town_center = Building("Town Center", starting_x, starting_y)
     game_map.place_building(town_center, starting_x, starting_y)
-    ai = AI(buildings, units)  # Initialisation de l'objet AI
-    villager = Unit("Villager", starting_x_V1, starting_y_V1, ai)
-    villager2 = Unit("Villager", starting_x_V2, starting_y_V2, ai)
-    villager3 = Unit("Villager", starting_x_V3, starting_y_V3, ai)
+    villager = Unit("Villager", starting_x_V1, starting_y_V1, None)
+    villager2 = Unit("Villager", starting_x_V2, starting_y_V2, None)
+    villager3 = Unit("Villager", starting_x_V3, starting_y_V3, None)
     units = [villager, villager2, villager3]
     buildings = [town_center]
-    ai = AI(ai, buildings, units)  # Passage de l'objet ai à l'IA
+    game_map.sync_units(units)
+    # L'IA se crée après les unités et les bâtiments, puis les unités la reçoivent
+    ai = AI(buildings, units, owner=player_side_state.player_side)
+    for unit in units:
+        unit.ai = ai
 
     # Set the player AI in game state
     player_side_state.set_player_ai(ai)
 
+    if LOCKSTEP:
+        start_lockstep(
+            map_size, map_size, seed, generator, player_side_state.player_side, path_engine,
+            (wood_clusters, gold_clusters, 40),
+        )
+
     # Envoi du seed et des infos map au réseau si nécessaire
     try:
         import network
 
-        network.client.send(game_map.to_network_message())
+        send_map_init(network.client, game_map)
     except Exception:
         pass  # Le réseau peut ne pas être initialisé
 
@@ -1268,26 +1416,31 @@ def init_game():
             case "J1":
                 town_center = Building("Town Center", 10, 10)
                 game_map.place_building(town_center, 10, 10)
-                aiJ1 = AI(buildings, units)  # Initialisation de l'objet AI
-                villager = Unit("Villager", 9, 9, aiJ1)
-                villager2 = Unit("Villager", 12, 9, aiJ1)
-                villager3 = Unit("Villager", 9, 12, aiJ1)
+                villager = Unit("Villager", 9, 9, None)
+                villager2 = Unit("Villager", 12, 9, None)
+                villager3 = Unit("Villager", 9, 12, None)
                 units = [villager, villager2, villager3]
                 buildings = [town_center]
-                aiJ1 = AI(aiJ1, buildings, units)  # Passage de l'objet ai à l'IA
+                game_map.sync_units(units)
+                aiJ1 = AI(buildings, units, owner="J1")
+                for unit in units:
+                    unit.ai = aiJ1
 
             case "J2":
                 town_center = Building("Town Center", 110, 110)
                 game_map.place_building(town_center, 110, 110)
-                aiJ2 = AI(buildings, units)  # Initialisation de l'objet AI
-                villager = Unit("Villager", 109, 109, aiJ2)
-                villager2 = Unit("Villager", 112, 109, aiJ2)
-                villager3 = Unit("Villager", 109, 112, aiJ2)
+                villager = Unit("Villager", 109, 109, None)
+                villager2 = Unit("Villager", 112, 109, None)
+                villager3 = Unit("Villager", 109, 112, None)
                 units = [villager, villager2, villager3]
                 buildings = [town_center]
-                aiJ2 = AI(aiJ2, buildings, units)  # Passage de l'objet ai à l'IA
+                game_map.sync_units(units)
+                aiJ2 = AI(buildings, units, owner="J2")
+                for unit in units:
+                    unit.ai = aiJ2
 
-        network.send(game_map.to_network_message())
+        if network.client is not None:
+            send_map_init(network.client, game_map)
 
         # Set the player AI in game state
         # player_side_state.set_player_ai(ai)
@@ -0,0 +1,57 @@
+from collections import Counter
+
+from view import Print_Display
+
+
+class MessageRejected(Exception):
+    """Levée par un traitement pour refuser un message valide en forme (position hors carte...)."""
+
+
+class MessageDispatcher:
+    """Table des traitements des messages réseau, indexée par type.
+
+    Chaque traitement déclare une fois ses champs obligatoires et leur
+    conversion (int, str...) : dispatch() les vérifie et les convertit avant
+    l'appel, le traitement reçoit des valeurs déjà typées. Un message inconnu,
+    mal formé ou refusé par son traitement (MessageRejected) est compté dans
+    rejected au lieu d'être journalisé à chaque fois (seul le premier de chaque
+    type est affiché). Les autres erreurs d'un traitement ne sont pas masquées.
+    """
+
+    def __init__(self):
+        self.handlers = {}  # type -> (traitement, ((champ, conversion), ...))
+        self.rejected = Counter()  # type -> messages inconnus ou mal formés
+
+    def handler(self, msg_type, **fields):
+        """Décorateur : enregistre le traitement de msg_type et ses champs obligatoires."""
+        def register(func):
+            self.handlers[msg_type] = (func, tuple(fields.items()))
+            return func
+        return register
+
+    def dispatch(self, msg_type, data, *context):
+        """Appelle le traitement de msg_type avec (data, *context) ; renvoie False si le message est rejeté."""
+        entry = self.handlers.get(msg_type)
+        if entry is None:
+            self._reject(msg_type, "type inconnu", data)
+            return False
+        func, fields = entry
+        try:
+            for name, convert in fields:
+                value = data[name]
+                if value.__class__ is not convert:  # Les messages binaires arrivent déjà typés
+                    data[name] = convert(value)
+        except (KeyError, ValueError, TypeError) as e:
+            self._reject(msg_type, f"{type(e).__name__}: {e}", data)
+            return False
+        try:
+            func(data, *context)
+        except MessageRejected as e:
+            self._reject(msg_type, str(e), data)
+            return False
+        return True
+
+    def _reject(self, msg_type, reason, data):
+        self.rejected[msg_type] += 1
+        if self.rejected[msg_type] == 1:
+            Print_Display(f"[WARNING] Message {msg_type} rejeté ({reason}) : {data} (les suivants sont seulement comptés)")
@@ -0,0 +1,93 @@
+class EntityRegistry:
+    """Unités et bâtiments d'une carte, indexés pour les recherches en O(1).
+
+    Les unités sont retrouvées par (propriétaire, network_id) : les identifiants
+    réseau sont attribués par chaque pair, deux joueurs peuvent donc utiliser le
+    même. Les bâtiments sont retrouvés par case. Les deux sont aussi regroupés
+    par (propriétaire, type), dans l'ordre d'inscription.
+    """
+
+    def __init__(self):
+        self.units = {}  # (owner, network_id) -> Unit
+        self.buildings = {}  # (x, y) -> Building
+        self.by_owner_type = {}  # (owner, type) -> {entité: None} (ensemble ordonné)
+        self.units_by_owner = {}  # owner -> {Unit: None}
+
+    def _group(self, owner, kind):
+        return self.by_owner_type.setdefault((owner, kind), {})
+
+    def _ungroup(self, owner, kind, entity):
+        group = self.by_owner_type.get((owner, kind))
+        if group is not None:
+            group.pop(entity, None)
+            if not group:
+                del self.by_owner_type[(owner, kind)]
+
+    def add_unit(self, unit):
+        key = (unit.owner, unit.network_id)
+        previous = self.units.get(key)
+        if previous is not None and previous is not unit:
+            self.remove_unit(previous)
+        self.units[key] = unit
+        self.units_by_owner.setdefault(unit.owner, {})[unit] = None
+        self._group(unit.owner, unit.unit_type)[unit] = None
+
+    def remove_unit(self, unit):
+        key = (unit.owner, unit.network_id)
+        if self.units.get(key) is unit:
+            del self.units[key]
+        owned = self.units_by_owner.get(unit.owner)
+        if owned is not None:
+            owned.pop(unit, None)
+            if not owned:
+                del self.units_by_owner[unit.owner]
+        self._ungroup(unit.owner, unit.unit_type, unit)
+
+    def clear_units(self):
+        for unit in list(self.units.values()):
+            self.remove_unit(unit)
+
+    def add_building(self, building, x, y):
+        previous = self.buildings.get((x, y))
+        if previous is building:
+            return
+        if previous is not None:
+            self.remove_building(x, y)
+        self.buildings[(x, y)] = building
+        self._group(building.owner, building.building_type)[building] = None
+
+    def remove_building(self, x, y):
+        building = self.buildings.pop((x, y), None)
+        if building is not None:
+            self._ungroup(building.owner, building.building_type, building)
+
+    def unit(self, owner, network_id):
+        """Unité de ce joueur portant cet identifiant réseau, ou None."""
+        return self.units.get((owner, network_id))
+
+    def building_at(self, x, y):
+        return self.buildings.get((x, y))
+
+    def of(self, owner, kind):
+        """Entités d'un joueur d'un type donné ('Villager', 'Town Center'...), dans l'ordre d'inscription."""
+        return list(self.by_owner_type.get((owner, kind), ()))
+
+    def first(self, owner, kind):
+        for entity in self.by_owner_type.get((owner, kind), ()):
+            return entity
+        return None
+
+    def units_of(self, owner):
+        """Unités d'un joueur, dans l'ordre d'inscription."""
+        return list(self.units_by_owner.get(owner, ()))
+
+    def count(self, owner, kind):
+        return len(self.by_owner_type.get((owner, kind), ()))
+
+    def buildings_in_rect(self, x0, y0, x1, y1):
+        """Bâtiments dans le rectangle [x0, x1[ x [y0, y1[."""
+        return [
+            building
+            for (x, y), building in self.buildings.items()
+            if x0 <= x < x1 and y0 <= y < y1
+        ]
@@ -14,6 +14,8 @@ def load_game_state(filename="saves/default_game.pkl"):
     if os.path.exists(filename):
         with open(filename, "rb") as file:
             units, buildings, game_map, ai = pickle.load(file)
+            game_map.sync_units(units)  # Les anciennes sauvegardes n'ont pas d'occupation
+            game_map.sync_buildings(buildings)  # ni de registre des entités
             Print_Display(f"[INFO] Game loaded from {filename}")
             return units, buildings, game_map, ai
     else:
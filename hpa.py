@@ -0,0 +1,271 @@
+import heapq
+from collections import deque
+
+from pathfinding import DIRECTIONS, INF, astar, octile_distance, reconstruct_path
+
+CLUSTER_SIZE = 16
+# Au-delà de cette longueur, un passage entre clusters garde ses deux extrémités
+LONG_ENTRANCE = 6
+
+
+class HierarchicalPathfinder:
+    """Recherche de chemin hiérarchique (HPA*) au-dessus d'une Map.
+
+    La carte est découpée en clusters carrés. Les passages entre clusters voisins
+    donnent les noeuds d'un graphe abstrait, mis en cache ; un chemin abstrait est
+    ensuite raffiné par des A* limités à un cluster. Quand une case change, seul
+    son cluster (et ses voisins directs) est recalculé, au prochain appel.
+    """
+
+    def __init__(self, game_map, cluster_size=CLUSTER_SIZE):
+        self.game_map = game_map
+        self.cluster_size = cluster_size
+        self.clusters_x = -(-game_map.width // cluster_size)
+        self.clusters_y = -(-game_map.height // cluster_size)
+        self.transitions = {}  # bordure -> [(case d'un côté, case de l'autre)]
+        self.inter_edges = {}  # case -> cases adjacentes dans un autre cluster
+        self.intra_edges = {}  # cluster -> {noeud: {noeud: coût}}
+        self.cache = {}  # cluster -> liens et segments déjà raffinés dans ce cluster
+        # Les clusters et bordures absents des dictionnaires sont calculés à la demande
+        self.dirty = set()
+        self.stale_borders = set()
+        self.rebuilt_clusters = 0  # Clusters recalculés depuis la création
+        self.abstract_expanded = 0  # Noeuds abstraits développés
+
+    # ------------------------------------------------------------------ clusters
+
+    def cluster_of(self, x, y):
+        return (x // self.cluster_size, y // self.cluster_size)
+
+    def cluster_bounds(self, cluster):
+        cx, cy = cluster
+        size = self.cluster_size
+        return (
+            cx * size,
+            cy * size,
+            min((cx + 1) * size, self.game_map.width),
+            min((cy + 1) * size, self.game_map.height),
+        )
+
+    def _borders(self, cluster):
+        """Bordures d'un cluster : ("V", cx, cy) sépare (cx, cy) de (cx+1, cy), "H" de (cx, cy+1)."""
+        cx, cy = cluster
+        borders = []
+        if cx + 1 < self.clusters_x:
+            borders.append(("V", cx, cy))
+        if cx > 0:
+            borders.append(("V", cx - 1, cy))
+        if cy + 1 < self.clusters_y:
+            borders.append(("H", cx, cy))
+        if cy > 0:
+            borders.append(("H", cx, cy - 1))
+        return borders
+
+    def invalidate(self, x, y):
+        """Signale qu'une case a changé : seuls les clusters concernés seront recalculés."""
+        cluster = self.cluster_of(x, y)
+        self.dirty.add(cluster)
+        size = self.cluster_size
+        for border in self._borders(cluster):
+            kind, cx, cy = border
+            # Une case au bord d'un cluster modifie aussi les passages vers le voisin
+            line = (cx + 1) * size if kind == "V" else (cy + 1) * size
+            if (x if kind == "V" else y) in (line - 1, line):
+                self.stale_borders.add(border)
+                self.dirty.add((cx, cy))
+                self.dirty.add((cx + 1, cy) if kind == "V" else (cx, cy + 1))
+
+    def nodes(self, cluster):
+        """Noeuds abstraits d'un cluster et leurs arcs internes (recalculés si besoin)."""
+        if cluster not in self.intra_edges or cluster in self.dirty:
+            for border in self._borders(cluster):
+                if border not in self.transitions or border in self.stale_borders:
+                    self._set_transitions(border, self._compute_transitions(border))
+                    self.stale_borders.discard(border)
+            self._compute_intra_edges(cluster)
+            self.cache[cluster] = {}
+            self.dirty.discard(cluster)
+            self.rebuilt_clusters += 1
+        return self.intra_edges[cluster]
+
+    # --------------------------------------------------------- graphe abstrait
+
+    def _compute_transitions(self, border):
+        kind, cx, cy = border
+        size = self.cluster_size
+        game_map = self.game_map
+        if kind == "V":
+            x = (cx + 1) * size - 1
+            pairs = [
+                ((x, y), (x + 1, y))
+                for y in range(cy * size, min((cy + 1) * size, game_map.height))
+            ]
+        else:
+            y = (cy + 1) * size - 1
+            pairs = [
+                ((x, y), (x, y + 1))
+                for x in range(cx * size, min((cx + 1) * size, game_map.width))
+            ]
+
+        # Regroupe les cases franchissables des deux côtés en passages continus
+        runs, run = [], []
+        for a, b in pairs:
+            if game_map.is_walkable(*a) and game_map.is_walkable(*b):
+                run.append((a, b))
+            elif run:
+                runs.append(run)
+                run = []
+        if run:
+            runs.append(run)
+
+        transitions = []
+        for run in runs:
+            if len(run) >= LONG_ENTRANCE:
+                transitions.extend((run[0], run[-1]))
+            else:
+                transitions.append(run[len(run) // 2])
+        return transitions
+
+    def _set_transitions(self, border, transitions):
+        for a, b in self.transitions.get(border, []):
+            self.inter_edges[a].discard(b)
+            self.inter_edges[b].discard(a)
+        for a, b in transitions:
+            self.inter_edges.setdefault(a, set()).add(b)
+            self.inter_edges.setdefault(b, set()).add(a)
+        self.transitions[border] = transitions
+
+    def _local_distances(self, origin, cluster):
+        """Parcours en largeur limité au cluster depuis origin (qui peut être non franchissable)."""
+        game_map = self.game_map
+        min_x, min_y, max_x, max_y = self.cluster_bounds(cluster)
+        dist = {origin: 0}
+        queue = deque([origin])
+        while queue:
+            x, y = queue.popleft()
+            next_dist = dist[(x, y)] + 1
+            for dx, dy in DIRECTIONS:
+                node = (x + dx, y + dy)
+                if (
+                    min_x <= node[0] < max_x
+                    and min_y <= node[1] < max_y
+                    and node not in dist
+                    and game_map.is_walkable(*node)
+                ):
+                    dist[node] = next_dist
+                    queue.append(node)
+        return dist
+
+    def _compute_intra_edges(self, cluster):
+        nodes = set()
+        min_x, min_y, max_x, max_y = self.cluster_bounds(cluster)
+        for border in self._borders(cluster):
+            for pair in self.transitions.get(border, []):
+                for x, y in pair:
+                    if min_x <= x < max_x and min_y <= y < max_y:
+                        nodes.add((x, y))
+
+        edges = {}
+        for node in nodes:
+            dist = self._local_distances(node, cluster)
+            edges[node] = {
+                other: dist[other] for other in nodes if other != node and other in dist
+            }
+        self.intra_edges[cluster] = edges
+
+    # ---------------------------------------------------------------- recherche
+
+    def find_path(self, start, goal, is_goal):
+        """Chemin de start vers goal (sans la case de départ), ou None."""
+        game_map = self.game_map
+        if octile_distance(start, goal) <= self.cluster_size:
+            return astar(game_map, start, is_goal, goal)  # Trajet court : A* direct
+
+        start_links = self._links(start)
+        goal_links = self._links(goal)
+        abstract_path = self._abstract_search(start, goal, start_links, goal_links)
+        if abstract_path is None:
+            return None
+        return self._refine(abstract_path, is_goal)
+
+    def _links(self, origin):
+        """Distances d'une case (départ ou arrivée) vers les noeuds de son cluster."""
+        cluster = self.cluster_of(*origin)
+        nodes = self.nodes(cluster)
+        cache = self.cache[cluster]
+        key = ("links", origin)
+        if key not in cache:
+            dist = self._local_distances(origin, cluster)
+            cache[key] = {node: d for node, d in dist.items() if node in nodes}
+        return cache[key]
+
+    def _abstract_search(self, start, goal, start_links, goal_links):
+        goal_x, goal_y = goal
+        open_list = [(octile_distance(start, goal), start)]
+        cost_so_far = {start: 0}
+        came_from = {}
+        closed = set()
+
+        while open_list:
+            _, current = heapq.heappop(open_list)
+            if current in closed:
+                continue
+            closed.add(current)
+            self.abstract_expanded += 1
+            if current == goal:
+                return [start] + reconstruct_path(came_from, current)
+
+            edges = {}
+            if current == start:
+                edges.update(start_links)
+            cluster = self.cluster_of(*current)
+            edges.update(self.nodes(cluster).get(current, {}))
+            for other in self.inter_edges.get(current, ()):
+                edges[other] = 1
+            if current in goal_links:
+                edges[goal] = goal_links[current]
+
+            for node, cost in edges.items():
+                new_cost = cost_so_far[current] + cost
+                if node in closed or new_cost >= cost_so_far.get(node, INF):
+                    continue
+                cost_so_far[node] = new_cost
+                came_from[node] = current
+                estimate = max(abs(node[0] - goal_x), abs(node[1] - goal_y))
+                heapq.heappush(open_list, (new_cost + estimate, node))
+        return None
+
+    def _refine(self, abstract_path, is_goal):
+        """Transforme le chemin abstrait en cases, par des A* limités à un cluster."""
+        game_map = self.game_map
+        goal = abstract_path[-1]
+        path = []
+        for current, target in zip(abstract_path, abstract_path[1:]):
+            if current == target:
+                continue
+            if target in self.inter_edges.get(current, ()):
+                path.append(target)  # Passage direct vers le cluster voisin
+                continue
+            # Chaque segment reste dans un cluster : celui de la case visée
+            cluster = self.cluster_of(*target)
+            self.nodes(cluster)
+            cache = self.cache[cluster]
+            segment = cache.get((current, target))
+            if segment is None:
+
+                def reached(x, y, target=target):
+                    return is_goal(x, y) if target == goal else (x, y) == target
+
+                segment = astar(
+                    game_map,
+                    current,
+                    reached,
+                    target,
+                    bounds=self.cluster_bounds(cluster),
+                )
+                if segment is None:
+                    return astar(game_map, abstract_path[0], is_goal, goal)
+                if current != abstract_path[0]:
+                    cache[(current, target)] = segment
+            path.extend(segment)
+        return path
@@ -0,0 +1,51 @@
+from spatial_index import chebyshev
+
+# Distances (en cases) au bord de la zone affichée par le pair
+NEAR = 8
+FAR = 24
+# Une unité est envoyée un envoi sur RATES[i] : affichée, proche (NEAR), lointaine (FAR)
+RATES = (1, 3, 8)
+
+
+class InterestArea:
+    """Zone de la carte affichée par le pair (message VIEW), pour trier les unités à lui envoyer.
+
+    Une unité affichée part à chaque envoi, une unité proche moins souvent ;
+    au-delà de FAR elle n'est plus envoyée tant que la vue du pair ne s'en
+    approche pas (l'envoi en delta la rattrape alors). Tant que le pair n'a pas
+    annoncé sa vue, tout est envoyé.
+    """
+
+    def __init__(self, near=NEAR, far=FAR, rates=RATES):
+        self.near = near
+        self.far = far
+        self.rates = rates
+        self.rect = None  # (x0, y0, x1, y1) : [x0, x1[ x [y0, y1[
+
+    def update(self, x0, y0, x1, y1):
+        self.rect = (x0, y0, x1, y1)
+
+    def distance(self, x, y):
+        """Distance de (x, y) à la zone affichée (0 à l'intérieur)."""
+        x0, y0, x1, y1 = self.rect
+        cx = min(max(x, x0), x1 - 1)
+        cy = min(max(y, y0), y1 - 1)
+        return chebyshev(x, y, cx, cy)
+
+    def rate(self, x, y):
+        """Un envoi sur combien pour une unité en (x, y) ; 0 : pas envoyée."""
+        if self.rect is None:
+            return 1
+        distance = self.distance(x, y)
+        if distance == 0:
+            return self.rates[0]
+        if distance <= self.near:
+            return self.rates[1]
+        if distance <= self.far:
+            return self.rates[2]
+        return 0
+
+    def wants(self, x, y, phase):
+        """L'unité en (x, y) part-elle à cet envoi ? phase décale les unités d'une même zone."""
+        rate = self.rate(x, y)
+        return rate != 0 and phase % rate == 0
@@ -0,0 +1,216 @@
+import random
+import threading
+import time
+import zlib
+
+TURN_LENGTH = 0.1  # Secondes de jeu par tour
+# Une commande émise pendant le tour t est jouée au tour t + 1 + INPUT_DELAY par tous les pairs :
+# le temps qu'elle leur parvienne
+INPUT_DELAY = 3
+HASH_HISTORY = 64  # Tours dont l'empreinte locale est gardée pour comparaison
+
+
+class LockstepSession:
+    """Simulation en lockstep : la partie avance par tours numérotés de durée fixe.
+
+    Chaque pair simule toute la partie ; seules les commandes des joueurs (les
+    décisions de leur IA, prises par le pair qui la joue) passent par le
+    réseau (COMMAND), puis la clôture de chaque tour (TURN, avec le nombre de
+    commandes du tour et le dernier tour reçu au complet). Un tour n'est joué
+    que lorsque tous les joueurs l'ont clos : la bande passante ne dépend plus
+    du nombre d'unités. Les tours locaux sont renvoyés tant qu'un pair ne les
+    a pas confirmés.
+
+    Chaque TURN porte aussi l'empreinte de l'état (Map.state_hash) après le
+    dernier tour simulé par l'émetteur : la première divergence est signalée
+    avec son numéro de tour, les suivantes sont comptées dans desyncs.
+    """
+
+    def __init__(self, seed, players, local_player, turn_length=TURN_LENGTH, delay=INPUT_DELAY):
+        self.seed = seed
+        self.players = tuple(sorted(players))
+        self.local_player = local_player
+        self.turn_length = turn_length
+        self.delay = delay
+        self.turn = 0  # Prochain tour à jouer
+        self.current = -1  # Tour en cours de simulation (horloge, tirages aléatoires)
+        self.next_turn_time = time.time()
+        self.issued = []  # Commandes locales du tour turn + delay, pas encore clos
+        # tour -> commandes locales closes, gardées jusqu'à confirmation par tous les pairs.
+        # Les premiers tours sont clos d'office : personne n'a pu y émettre de commande.
+        self.sent = {turn: [] for turn in range(delay)}
+        self.received = {}  # (tour, joueur) -> {index: commande}
+        self.expected = {}  # (tour, joueur) -> nombre de commandes annoncé par TURN
+        self.peer_ack = {player: -1 for player in self.players if player != local_player}
+        self.rejected = 0  # Messages d'une autre partie (graine différente) ou d'un tour déjà joué
+        self.hashes = {}  # tour -> empreinte locale de l'état après ce tour
+        self.peer_hashes = {}  # (tour, joueur) -> empreinte d'un pair en avance sur nous
+        self.desyncs = 0  # Empreintes différentes de celles d'un pair
+        self.desync_turn = None  # Premier tour où l'état a divergé
+        # Message de cette première divergence, affiché par la boucle de jeu (desync_report) :
+        # _compare peut tourner sur le thread réseau, et curses n'est pas thread-safe
+        self.desync_message = None
+        self.lock = threading.Lock()  # Les messages peuvent arriver du thread réseau
+
+    @property
+    def is_host(self):
+        """Le premier joueur fixe la carte (MAP_INIT) pour les autres."""
+        return self.local_player == self.players[0]
+
+    def clock(self):
+        """Temps de la simulation : avance d'un tour à la fois, identique sur tous les pairs."""
+        return max(self.current, 0) * self.turn_length
+
+    def rng(self, stream):
+        """Générateur aléatoire du tour en cours pour un usage donné ('ai', 'combat'...)."""
+        return random.Random(zlib.crc32(f"{self.seed}:{self.current}:{stream}".encode()))
+
+    def issue(self, kind, unit=0, x=0, y=0, target=""):
+        """Commande du joueur local (unit : identifiant réseau de l'unité visée), jouée dans delay tours."""
+        with self.lock:
+            self.issued.append({"kind": kind, "unit": unit, "x": x, "y": y, "target": target})
+
+    def _complete(self, turn, player):
+        if player == self.local_player:
+            return turn in self.sent or turn < self.turn
+        count = self.expected.get((turn, player))
+        return count is not None and len(self.received.get((turn, player), ())) == count
+
+    def ready(self):
+        """Toutes les commandes du prochain tour sont arrivées."""
+        with self.lock:
+            return all(self._complete(self.turn, player) for player in self.players)
+
+    def due(self, now):
+        return now >= self.next_turn_time
+
+    def advance(self):
+        """Passe au tour suivant ; renvoie ses commandes, dans le même ordre sur tous les pairs."""
+        with self.lock:
+            turn = self.turn
+            commands = []
+            for player in self.players:
+                if player == self.local_player:
+                    batch = list(self.sent[turn])
+                else:
+                    received = self.received.pop((turn, player), {})
+                    self.expected.pop((turn, player), None)
+                    batch = [received[index] for index in sorted(received)]
+                commands.extend(dict(command, player=player) for command in batch)
+            # Le tour où tombent les commandes émises pendant celui-ci est clos
+            self.sent[turn + self.delay] = self.issued
+            self.issued = []
+            self.turn = turn + 1
+            self.current = turn
+            # Pas de rattrapage en rafale après une attente du pair
+            self.next_turn_time = max(self.next_turn_time + self.turn_length, time.time() - self.turn_length)
+            return commands
+
+    def record_hash(self, value):
+        """Empreinte de l'état après le tour qui vient d'être simulé."""
+        with self.lock:
+            turn = self.current
+            self.hashes[turn] = value
+            self.hashes.pop(turn - HASH_HISTORY, None)
+            for player in self.peer_ack:
+                peer_value = self.peer_hashes.pop((turn, player), None)
+                if peer_value is not None:
+                    self._compare(turn, player, peer_value)
+
+    def _compare(self, turn, player, value):
+        local = self.hashes.get(turn)
+        if local is None:
+            if turn > self.current:
+                self.peer_hashes[(turn, player)] = value  # Comparée quand nous aurons joué ce tour
+            return
+        if local != value:
+            self.desyncs += 1
+            if self.desync_turn is None:
+                self.desync_turn = turn
+                self.desync_message = f"[DESYNC] Tour {turn} : empreinte locale {local:016x}, {player} {value:016x}"
+
+    def desync_report(self):
+        """Message de la première divergence, renvoyé une seule fois (None sinon)."""
+        with self.lock:
+            message, self.desync_message = self.desync_message, None
+            return message
+
+    def _acked(self):
+        """Dernier tour reçu au complet de tous les pairs."""
+        turn = self.turn
+        while all(self._complete(turn, player) for player in self.players):
+            turn += 1
+        return turn - 1
+
+    def send(self, client):
+        """Envoie les tours locaux non confirmés (les pertes sont rattrapées au prochain envoi)."""
+        with self.lock:
+            oldest = min(self.peer_ack.values(), default=self.turn)
+            ack = self._acked()
+            turns = sorted(turn for turn in self.sent if turn > oldest)
+            batches = [(turn, list(self.sent[turn])) for turn in turns]
+            checked = self.current
+            state_hash = self.hashes.get(checked, 0)
+        for turn, commands in batches:
+            for index, command in enumerate(commands):
+                client.send_message(
+                    "COMMAND", turn=turn, index=index, player=self.local_player,
+                    seed=self.seed, **command,
+                )
+            client.send_message(
+                "TURN", turn=turn, count=len(commands), ack=ack,
+                player=self.local_player, seed=self.seed, checked=checked, hash=state_hash,
+            )
+
+    def _accept(self, fields):
+        """(tour, joueur) d'un message du pair, ou None s'il est à ignorer."""
+        try:
+            turn, seed = int(fields["turn"]), int(fields["seed"])
+            player = fields["player"]
+        except (KeyError, ValueError, TypeError):
+            self.rejected += 1
+            return None
+        if seed != self.seed or player not in self.peer_ack:
+            self.rejected += 1
+            return None
+        return turn, player
+
+    def receive_command(self, fields):
+        with self.lock:
+            key = self._accept(fields)
+            if key is None:
+                return
+            if key[0] < self.turn:
+                return  # Renvoi d'un tour déjà joué
+            try:
+                self.received.setdefault(key, {})[int(fields["index"])] = {
+                    "kind": fields.get("kind"),
+                    "unit": int(fields.get("unit") or 0),
+                    "x": int(fields.get("x") or 0),
+                    "y": int(fields.get("y") or 0),
+                    "target": fields.get("target") or "",
+                }
+            except ValueError:
+                self.rejected += 1
+
+    def receive_turn(self, fields):
+        with self.lock:
+            key = self._accept(fields)
+            if key is None:
+                return
+            turn, player = key
+            try:
+                count, ack = int(fields["count"]), int(fields["ack"])
+                checked, state_hash = int(fields.get("checked", -1)), int(fields.get("hash", 0))
+            except (KeyError, ValueError, TypeError):
+                self.rejected += 1
+                return
+            if checked >= 0:
+                self._compare(checked, player, state_hash)
+            if turn >= self.turn:
+                self.expected[key] = count
+            self.peer_ack[player] = max(self.peer_ack[player], ack)
+            # Les tours confirmés par tous les pairs ne sont plus renvoyés
+            oldest = min(self.peer_ack.values())
+            for old in [t for t in self.sent if t <= oldest and t < self.turn]:
+                del self.sent[old]
@@ -0,0 +1,94 @@
+try:
+    import numpy as np
+except ImportError:  # NumPy est optionnel : sans lui, seul le générateur classique existe
+    np = None
+
+# "classic" : Map.generate_forest_clusters / generate_gold_clusters, case par case
+# "numpy" : mêmes amas de ressources, calculés par blocs avec NumPy
+# "noise" : forêts et filons suivant un bruit de valeur lissé
+GENERATORS = ("classic", "numpy", "noise")
+
+# Flux aléatoires indépendants dérivés de Map.seed
+WOOD_STREAM = 1
+GOLD_STREAM = 2
+
+
+def available(generator):
+    return generator == "classic" or (generator in GENERATORS and np is not None)
+
+
+def generate(game_map, wood_clusters, gold_clusters, cluster_size, generator):
+    """Renvoie les codes de ressource de toute la carte (bytes, une case par octet).
+
+    Le résultat ne dépend que de Map.seed et des paramètres : les deux pairs
+    obtiennent la même carte. Les cases occupées par un bâtiment restent libres.
+    """
+    shape = (game_map.height, game_map.width)
+    codes = np.frombuffer(bytes(game_map.resources), dtype=np.uint8).reshape(shape).copy()
+    free = codes == 0
+    free &= np.frombuffer(game_map.building_ids, dtype=np.uint32).reshape(shape) == 0
+    wood = game_map._resource_code("Wood")
+    gold = game_map._resource_code("Gold")
+    wood_rng = np.random.default_rng([game_map.seed, WOOD_STREAM])
+    gold_rng = np.random.default_rng([game_map.seed, GOLD_STREAM])
+
+    if generator == "noise":
+        area = shape[0] * shape[1]
+        coverage = min(0.6, wood_clusters * cluster_size / area)
+        _fill_noise(codes, free, wood_rng, wood, coverage, cell=24)
+        # Taille moyenne d'un filon d'or : 6,5 cases (comme generate_gold_clusters)
+        _fill_noise(codes, free, gold_rng, gold, gold_clusters * 6.5 / area, cell=6)
+    else:
+        _fill_clusters(codes, free, wood_rng, wood, np.full(wood_clusters, cluster_size))
+        _fill_clusters(codes, free, gold_rng, gold, gold_rng.integers(3, 11, gold_clusters))
+    return codes.tobytes()
+
+
+def _fill_clusters(codes, free, rng, code, sizes):
+    """Pose un amas de chaque taille : les cases libres les plus proches du centre, bruitées."""
+    height, width = codes.shape
+    xs = rng.integers(0, width, len(sizes))
+    ys = rng.integers(0, height, len(sizes))
+    for cx, cy, size in zip(xs, ys, sizes):
+        radius = int(np.sqrt(size)) + 2
+        x0, x1 = max(cx - radius, 0), min(cx + radius + 1, width)
+        y0, y1 = max(cy - radius, 0), min(cy + radius + 1, height)
+        window_free = free[y0:y1, x0:x1]
+        gy, gx = np.mgrid[y0:y1, x0:x1]
+        # Le bruit ajouté à la distance donne des contours irréguliers
+        score = np.hypot(gx - cx, gy - cy) + rng.random(window_free.shape) * 2.0
+        score[~window_free] = np.inf
+        count = min(int(size), int(window_free.sum()))
+        if count == 0:
+            continue
+        chosen = np.argpartition(score, count - 1, axis=None)[:count]
+        codes[y0:y1, x0:x1].flat[chosen] = code
+        window_free.flat[chosen] = False
+
+
+def _value_noise(rng, height, width, cell):
+    """Bruit de valeur : grille aléatoire grossière interpolée (lissage cubique) sur la carte."""
+    lattice = rng.random((height // cell + 2, width // cell + 2))
+    y = np.arange(height) / cell
+    x = np.arange(width) / cell
+    y0, x0 = y.astype(int), x.astype(int)
+    ty, tx = y - y0, x - x0
+    ty = (ty * ty * (3 - 2 * ty))[:, None]
+    tx = (tx * tx * (3 - 2 * tx))[None, :]
+    top = lattice[y0][:, x0] * (1 - tx) + lattice[y0][:, x0 + 1] * tx
+    bottom = lattice[y0 + 1][:, x0] * (1 - tx) + lattice[y0 + 1][:, x0 + 1] * tx
+    return top * (1 - ty) + bottom * ty
+
+
+def _fill_noise(codes, free, rng, code, coverage, cell):
+    """Remplit la fraction coverage de la carte là où le bruit (deux octaves) est le plus fort."""
+    height, width = codes.shape
+    noise = _value_noise(rng, height, width, cell)
+    noise += 0.5 * _value_noise(rng, height, width, max(cell // 3, 1))
+    count = min(int(coverage * height * width), int(free.sum()))
+    if count <= 0:
+        return
+    noise[~free] = -np.inf
+    chosen = np.argpartition(noise, noise.size - count, axis=None)[noise.size - count:]
+    codes.flat[chosen] = code
+    free.flat[chosen] = False
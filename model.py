@@ -1,10 +1,29 @@
 import random
-import heapq  # Pour la recherche de chemin
 import time
+import zlib
+from array import array
 from view import Print_Display
 import network
+import mapgen
+from entities import EntityRegistry
+from chunks import ChunkedArray, ChunkStore
+from hpa import HierarchicalPathfinder
+from pathfinding import (
+    DistanceField,
+    astar,
+    dijkstra_nearest,
+    jps,
+    nearest_batch,
+    nearest_each,
+    octile_distance,
+    reconstruct_path,
+)
+from spatial_index import OccupancyGrid, ResourceIndex
+from statehash import base_key, building_key, resource_key, unit_key
 
 Joueur = "J1"  # Variable globale pour le joueur actuel
+# Horloge de la simulation (récoltes à la ferme) : celle des tours en mode lockstep
+clock = time.time
 
 
 class GameElement:
@@ -27,35 +46,309 @@ class GameElement:
 
 
 class Tile:
+    # Les vues TileView héritent de Tile : sans __slots__ ici, chacune aurait un __dict__
+    __slots__ = ("resource", "building", "unit", "element")
+
     def __init__(self):
         self.resource = None  # Peut être une ressource comme 'Wood', 'Gold', etc.
         self.building = None  # Référence à un objet Building s'il y en a un
         self.unit = None  # Référence à un objet Unit s'il y en a une
     
+    def __getstate__(self):
+        return _slots_state(self)
+
+    def __setstate__(self, state):
+        _restore_slots(self, state)
+
     def send_to_network(self, x, y):
         return f"type:'UPDATE_MAP',action:'PLACE_TILE',x:{x},y:{y},resource:{self.resource},building:{self.building},unit:{self.unit}"
     
     def delete_ressource_network(self, x, y):
         self.resource = None
         #Print_Display(str(network.client))
+        if network.client is not None and network.client.lockstep is not None:
+            return  # En lockstep, chaque pair simule la récolte lui-même
         try:
-            network.send_simple_message_to_c(network.client, "UPDATE_MAP", f"action:'DELETE_RESOURCE',x:{x},y:{y}")
+            network.send_reliable_to_c(network.client, "UPDATE_MAP", action="DELETE_RESOURCE", x=x, y=y)
         except Exception as e:
             Print_Display(f"[ERROR] Failed to send DELETE_RESOURCE message: {e}")
     
-    
+
+class TileView(Tile):
+    """Vue sur une case du stockage compact de la Map, avec les attributs d'une Tile.
+
+    Les lectures et écritures passent par les tableaux de la carte : écrire
+    tile.resource revient à appeler Map.set_resource.
+    """
+
+    __slots__ = ("_map", "x", "y", "_index")
+
+    def __init__(self, game_map, x, y):
+        self._map = game_map
+        self.x = x
+        self.y = y
+        self._index = y * game_map.width + x
+
+    @property
+    def resource(self):
+        return self._map.resource_names[self._map.resources[self._index]]
+
+    @resource.setter
+    def resource(self, resource):
+        self._map.set_resource(self.x, self.y, resource)
+
+    @property
+    def building(self):
+        return self._map._handles.objects[self._map.building_ids[self._index]]
+
+    @building.setter
+    def building(self, building):
+        self._map.set_building(self.x, self.y, building)
+
+    @property
+    def unit(self):
+        return self._map._handles.objects[self._map.unit_ids[self._index]]
+
+    @unit.setter
+    def unit(self, unit):
+        self._map.set_unit(self.x, self.y, unit)
+
+    @property
+    def element(self):
+        try:
+            return self._map._elements[self._index]
+        except KeyError:
+            raise AttributeError("element") from None
+
+    @element.setter
+    def element(self, element):
+        self._map._elements[self._index] = element
+
+
+class _Handles:
+    """Objets (bâtiments, unités) référencés par un entier dans les tableaux de la carte (0 : aucun).
+
+    Chaque handle compte les cases qui le référencent : quand la dernière
+    l'oublie, l'objet est relâché et son numéro réutilisé. Une unité ou un
+    bâtiment retiré de la carte ne reste donc pas dans les sauvegardes.
+    """
+
+    def __init__(self):
+        self.objects = [None]
+        self.refs = [0]  # Cases qui référencent chaque handle
+        self.free = []  # Handles relâchés, réutilisés en priorité
+        self.ids = {}
+
+    def __getstate__(self):
+        return {"objects": self.objects}
+
+    def __setstate__(self, state):
+        self.objects = state["objects"]
+        self.ids = {id(obj): handle for handle, obj in enumerate(self.objects) if obj is not None}
+        # Complété par recount, une fois les tableaux de la carte restaurés
+        self.refs = [0] * len(self.objects)
+        self.free = []
+
+    def handle(self, obj):
+        if obj is None:
+            return 0
+        handle = self.ids.get(id(obj))
+        if handle is None:
+            if self.free:
+                handle = self.free.pop()
+                self.objects[handle] = obj
+            else:
+                handle = len(self.objects)
+                self.objects.append(obj)
+                self.refs.append(0)
+            self.ids[id(obj)] = handle
+        return handle
+
+    def store(self, values, index, obj):
+        """Écrit le handle de obj dans values[index], en tenant le compte des références."""
+        handle = self.handle(obj)
+        old = values[index]
+        if old != handle:
+            values[index] = handle
+            if handle:
+                self.refs[handle] += 1
+            if old:
+                self._release(old)
+
+    def _release(self, handle):
+        self.refs[handle] -= 1
+        if not self.refs[handle]:
+            del self.ids[id(self.objects[handle])]
+            self.objects[handle] = None
+            self.free.append(handle)
+
+    def recount(self, arrays):
+        """Recompte les références depuis les tableaux ; relâche les objets que plus rien ne référence."""
+        refs = [0] * len(self.objects)
+        for values in arrays:
+            for handle in values:
+                if handle:
+                    refs[handle] += 1
+        self.refs = refs
+        self.free = []
+        for handle in range(len(self.objects) - 1, 0, -1):
+            if not refs[handle]:
+                obj = self.objects[handle]
+                if obj is not None:
+                    del self.ids[id(obj)]
+                    self.objects[handle] = None
+                self.free.append(handle)
+
+
+class _RowView:
+    def __init__(self, game_map, y):
+        self._map = game_map
+        self._y = y
+
+    def __len__(self):
+        return self._map.width
+
+    def __getitem__(self, x):
+        width = self._map.width
+        if x < 0:
+            x += width
+        if not 0 <= x < width:
+            raise IndexError("tile index out of range")
+        return TileView(self._map, x, self._y)
+
+    def __setitem__(self, x, tile):
+        self._map.place_tile(tile, x, self._y)
+
+    def __iter__(self):
+        for x in range(self._map.width):
+            yield TileView(self._map, x, self._y)
+
+
+class _GridView:
+    """grid[y][x] sur le stockage compact, comme l'ancienne liste de listes de Tile."""
+
+    def __init__(self, game_map):
+        self._map = game_map
+
+    def __len__(self):
+        return self._map.height
+
+    def __getitem__(self, y):
+        height = self._map.height
+        if y < 0:
+            y += height
+        if not 0 <= y < height:
+            raise IndexError("row index out of range")
+        return _RowView(self._map, y)
+
+    def __iter__(self):
+        for y in range(self._map.height):
+            yield _RowView(self._map, y)
 
 
 
 class Map:
-    def __init__(self, width, height, seed=4173):
+    PATH_ENGINES = ("astar", "jps", "hpa")
+    # Au-delà de cette taille, les champs de distance coûtent trop de mémoire
+    FIELD_MAX_TILES = 250_000
+    # Rayon des recherches sans cible connue sur une carte en chunks (sinon toute la carte serait générée)
+    CHUNKED_SEARCH_RADIUS = 48
+    # Codes des ressources dans Map.resources (les autres noms sont ajoutés à la demande)
+    RESOURCE_NAMES = (None, "Wood", "Gold", "Food")
+    # Amas de bois, d'or et taille des forêts par défaut (MAP_INIT d'un pair qui ne les transmet pas)
+    MAP_INIT_RESOURCES = (10, 4, 40)
+
+    def __init__(self, width, height, seed=4173, chunked=False):
         self.width = width
         self.height = height
-        self.grid = [
-            [Tile() for _ in range(width)] for _ in range(height)
-        ]  # Assume qu'une classe Tile est définie
+        # Carte découpée en chunks générés à la demande (voir chunks.ChunkStore)
+        self.chunks = ChunkStore(self) if chunked else None
+        self._allocate()
         self.seed = seed
         self.rng = random.Random(seed)
+        self.generator = "classic"  # Générateur de ressources utilisé (mapgen.GENERATORS)
+        self.resource_settings = self.MAP_INIT_RESOURCES  # Amas de bois, d'or et taille des forêts
+        self._fields = {}  # Champs de distance partagés, par type de cible
+        self.version = 0  # Incrémentée à chaque modification d'une case
+        # Moteur de recherche de chemin (PATH_ENGINES) : HPA* sur les grandes cartes
+        self.path_engine = (
+            "hpa" if chunked or width * height > self.FIELD_MAX_TILES else "astar"
+        )
+        self._hierarchy = None
+        self._walk_grid = None
+        self._resource_index = None
+        self.entities = EntityRegistry()  # Unités et bâtiments par identifiant, case, joueur et type
+        # Empreinte Zobrist des cases, bâtiments et unités, tenue à jour à chaque modification
+        self.state_hash = base_key(seed, width, height)
+
+    def _allocate(self):
+        """Stockage compact : un tableau par attribut de case, indexé par y * width + x."""
+        size = self.width * self.height
+        self.resource_names = list(self.RESOURCE_NAMES)
+        if self.chunks is not None:
+            self.resources = ChunkedArray(self.chunks, "resources")
+            self.building_ids = ChunkedArray(self.chunks, "building_ids")
+            self.unit_ids = ChunkedArray(self.chunks, "unit_ids")
+        else:
+            self.resources = bytearray(size)  # Code dans resource_names
+            self.building_ids = array("I", [0]) * size  # Handle dans _handles (0 : aucun)
+            self.unit_ids = array("I", [0]) * size
+        self._handles = _Handles()
+        self._elements = {}  # Index de case -> GameElement créé à la récolte
+        self.occupancy = OccupancyGrid()  # Unités par case, tenu à jour par Unit.move
+        self._grid_view = _GridView(self)
+
+    @property
+    def grid(self):
+        """Accès historique grid[y][x] : renvoie des vues TileView sur les tableaux."""
+        return self._grid_view
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        state["_fields"] = {}  # Caches recalculables, inutiles dans les sauvegardes
+        state["_hierarchy"] = None
+        state["_walk_grid"] = None
+        state["_resource_index"] = None
+        del state["_grid_view"]
+        return state
+
+    def __setstate__(self, state):
+        legacy_grid = state.pop("grid", None)
+        self.__dict__.update(state)
+        self.__dict__.setdefault("chunks", None)
+        self.__dict__.setdefault("occupancy", OccupancyGrid())
+        # Anciennes sauvegardes : complété par sync_units et sync_buildings au chargement
+        self.__dict__.setdefault("entities", EntityRegistry())
+        # Les toutes premières sauvegardes n'ont que grid, width et height : graine par défaut de Map
+        self.__dict__.setdefault("seed", 4173)
+        self.__dict__.setdefault("rng", random.Random(self.seed))
+        self.__dict__.setdefault("_fields", {})
+        self.__dict__.setdefault("version", 0)
+        self.__dict__.setdefault("generator", "classic")
+        self.__dict__.setdefault("resource_settings", self.MAP_INIT_RESOURCES)
+        self.__dict__.setdefault("path_engine", "astar")
+        self.__dict__.setdefault("_hierarchy", None)
+        self.__dict__.setdefault("_walk_grid", None)
+        self.__dict__.setdefault("_resource_index", None)
+        # Les unités ne sont peut-être pas encore restaurées : sync_units recalcule
+        # l'empreinte au chargement (load_game_state). Avant la conversion, qui la met à jour
+        self.__dict__.setdefault("state_hash", 0)
+        if legacy_grid is not None:
+            # Ancienne sauvegarde : liste de listes de Tile, convertie en tableaux
+            self._allocate()
+            for y, row in enumerate(legacy_grid):
+                for x, tile in enumerate(row):
+                    self._store_tile(tile, x, y)
+        self._grid_view = _GridView(self)
+        # Les anciennes sauvegardes gardaient tous les objets retirés : ils sont relâchés ici
+        self._handles.recount(self._handle_arrays())
+
+    def _handle_arrays(self):
+        """Tableaux de handles de la carte (sur une carte en chunks, ceux des chunks modifiés)."""
+        if self.chunks is None:
+            return [self.building_ids, self.unit_ids]
+        chunks = self.chunks.modified.values()
+        return [chunk.building_ids for chunk in chunks] + [chunk.unit_ids for chunk in chunks]
 
     # Nouvelle méthode is_empty
     def is_empty(self, x, y):
@@ -64,10 +357,417 @@ class Map:
         if x < 0 or y < 0 or x >= self.width or y >= self.height:
             return False  # La position est hors de la carte
 
-        tile = self.grid[y][x]
+        index = y * self.width + x
 
         # Vérifie si la case ne contient ni ressource ni bâtiment
-        return not tile.resource and not tile.building and not tile.unit
+        return not (
+            self.resources[index] or self.building_ids[index] or self.unit_ids[index]
+        )
+
+    def is_walkable(self, x, y):
+        """Une case est franchissable sans bois, sans or et sans bâtiment autre qu'une ferme."""
+        index = y * self.width + x
+        if self.resources[index] in (1, 2):  # Wood, Gold
+            return False
+        building = self.building_ids[index]
+        return building == 0 or self._handles.objects[building].building_type == "Farm"
+
+    def building_at(self, x, y):
+        return self._handles.objects[self.building_ids[y * self.width + x]]
+
+    def resource_at(self, x, y):
+        return self.resource_names[self.resources[y * self.width + x]]
+
+    def matches_target(self, x, y, target_type, target_building=None):
+        """Vérifie si la case (x, y) est une destination du type recherché."""
+        index = y * self.width + x
+        if target_type == "Wood" or target_type == "Gold":
+            return self.resource_names[self.resources[index]] == target_type
+        if target_type == "Farm":
+            building = self._handles.objects[self.building_ids[index]]
+            return isinstance(building, Building) and building.building_type == "Farm"
+        if target_type == "Town Center":
+            return (
+                target_building is not None
+                and (x, y) == (target_building.x, target_building.y)
+            )
+        return False
+
+    def distance_field(self, target_type, target_building=None):
+        """Renvoie le champ de distance partagé vers un type de cible (None si la carte est trop grande)."""
+        if self.chunks is not None or self.width * self.height > self.FIELD_MAX_TILES:
+            return None
+        if target_building is not None:
+            key = (target_type, target_building.x, target_building.y)
+        else:
+            key = target_type
+        field = self._fields.get(key)
+        if field is None:
+            field = DistanceField(self, target_type, target_building)
+            self._fields[key] = field
+        elif field.stale:
+            field.rebuild()
+        return field
+
+    def nearest_targets(self, positions, target_types, target_building=None):
+        """Requête groupée : {position: {type: (prochain pas, distance, chemin)}} pour toutes les positions.
+
+        Chaque type de cible est résolu une seule fois pour tout le lot : lecture du
+        champ de distance partagé, ou un unique parcours sur les très grandes cartes.
+        Le chemin vient du parcours ; il vaut None quand il se lit dans le champ de
+        distance (distance_field(type).path_from), pour ne suivre que celui retenu.
+        """
+        positions = set(positions)
+        results = {position: {} for position in positions}
+        if self.chunks is not None:
+            # Carte en chunks : un parcours global générerait toute la carte, chaque
+            # position fait donc un seul parcours local pour tous les types à la fois
+            goals = {
+                target_type: (
+                    lambda x, y, target_type=target_type: self.matches_target(x, y, target_type, target_building)
+                )
+                for target_type in target_types
+            }
+            for position in positions:
+                paths = nearest_each(self, position, goals, self.search_bounds(*position))
+                for target_type, path in paths.items():
+                    results[position][target_type] = (
+                        (None, float("inf"), None) if path is None
+                        else ((path[0] if path else None), len(path), path)
+                    )
+            return results
+        for target_type in target_types:
+            field = self.distance_field(target_type, target_building)
+            if field is not None:
+                for x, y in positions:
+                    results[(x, y)][target_type] = (
+                        field.next_step(x, y),
+                        field.distance(x, y),
+                        None,
+                    )
+                continue
+
+            def is_goal(x, y, target_type=target_type):
+                return self.matches_target(x, y, target_type, target_building)
+
+            sources = self.target_positions(target_type, target_building)
+            for position, answer in nearest_batch(self, positions, is_goal, sources).items():
+                results[position][target_type] = answer
+        return results
+
+    def search_bounds(self, x, y):
+        """Rectangle des recherches sans cible connue depuis (x, y) : None pour toute la carte."""
+        if self.chunks is None:
+            return None
+        radius = self.CHUNKED_SEARCH_RADIUS
+        return (
+            max(x - radius, 0),
+            max(y - radius, 0),
+            min(x + radius + 1, self.width),
+            min(y + radius + 1, self.height),
+        )
+
+    def set_path_engine(self, engine):
+        """Choisit le moteur de recherche de chemin de la partie ("auto" garde le choix par défaut)."""
+        if engine in self.PATH_ENGINES and not (engine == "jps" and self.chunks is not None):
+            self.path_engine = engine  # JPS demande une grille complète, absente en mode chunks
+
+    def _walk_code(self, x, y):
+        """0 : bloqué, 1 : franchissable, 2 : ferme (franchissable mais cible possible)."""
+        if not self.is_walkable(x, y):
+            return 0
+        return 2 if self.building_ids[y * self.width + x] else 1
+
+    def walk_grid(self):
+        """Grille de franchissabilité entourée d'une bordure bloquée (largeur + 2 colonnes)."""
+        if self._walk_grid is None:
+            stride = self.width + 2
+            grid = bytearray(stride * (self.height + 2))
+            for y in range(self.height):
+                for x in range(self.width):
+                    grid[(y + 1) * stride + x + 1] = self._walk_code(x, y)
+            self._walk_grid = grid
+        return self._walk_grid
+
+    def _index_kinds(self, x, y):
+        """Types sous lesquels une case est indexée : sa ressource, et "Farm" pour une ferme."""
+        resource = self.resource_at(x, y)
+        kinds = [resource] if resource else []
+        if self.matches_target(x, y, "Farm"):
+            kinds.append("Farm")
+        return kinds
+
+    def resource_index(self):
+        """Index spatial des ressources (Wood, Gold, Food) et des fermes, construit au premier appel.
+
+        Sur une carte en chunks, seuls les chunks déjà générés y figurent.
+        """
+        if self._resource_index is None:
+            index = ResourceIndex()
+            width = self.width
+            self._resource_index = index
+            if self.chunks is not None:
+                self._index_chunks(index)
+                return index
+            for i in range(width * self.height):
+                if self.resources[i] or self.building_ids[i]:
+                    index.update(i % width, i // width, self._index_kinds(i % width, i // width))
+        return self._resource_index
+
+    def _index_chunks(self, index):
+        size = self.chunks.chunk_size
+        chunks = list(self.chunks.cache.items()) + list(self.chunks.modified.items())
+        for (cx, cy), chunk in chunks:
+            for i in range(size * size):
+                if chunk.resources[i] or chunk.building_ids[i]:
+                    x, y = cx * size + i % size, cy * size + i // size
+                    index.update(x, y, self._index_kinds(x, y))
+
+    def nearest_resources(self, resource, x, y, k=1):
+        """Les k cases de ressource les plus proches de (x, y), à vol d'oiseau."""
+        return self.resource_index().nearest(resource, x, y, k)
+
+    def resources_in_radius(self, resource, x, y, radius):
+        """Cases de ressource à au plus radius pas de (x, y)."""
+        return self.resource_index().within(resource, x, y, radius)
+
+    def target_positions(self, target_type, target_building=None):
+        """Cases d'arrivée d'un type de cible, lues dans l'index plutôt qu'en parcourant la carte."""
+        if target_type == "Wood" or target_type == "Gold" or target_type == "Farm":
+            return list(self.resource_index().positions(target_type))
+        if target_type == "Town Center" and target_building is not None:
+            return [(target_building.x, target_building.y)]
+        return []
+
+    def hierarchy(self):
+        """Graphe de recherche hiérarchique (HPA*), construit à la première utilisation."""
+        if self._hierarchy is None:
+            self._hierarchy = HierarchicalPathfinder(self)
+        return self._hierarchy
+
+    def tile_changed(self, x, y):
+        """Signale qu'une case a changé : les champs de distance sont réparés localement."""
+        self.version += 1
+        for field in self._fields.values():
+            if not field.stale:
+                field.repair(x, y)
+        if self._hierarchy is not None:
+            self._hierarchy.invalidate(x, y)
+        if self._walk_grid is not None:
+            self._walk_grid[(y + 1) * (self.width + 2) + x + 1] = self._walk_code(x, y)
+        if self._resource_index is not None:
+            self._resource_index.update(x, y, self._index_kinds(x, y))
+
+    def _resource_code(self, resource):
+        try:
+            return self.resource_names.index(resource)
+        except ValueError:
+            self.resource_names.append(resource)
+            return len(self.resource_names) - 1
+
+    def set_resource(self, x, y, resource):
+        """Modifie la ressource d'une case et met à jour les caches de recherche."""
+        index = y * self.width + x
+        code = self._resource_code(resource)
+        old = self.resources[index]
+        if old != code:
+            self.resources[index] = code
+            self.state_hash ^= resource_key(index, old) ^ resource_key(index, code)
+            self.tile_changed(x, y)
+
+    def _replace_building(self, index, building):
+        """Écrit le handle du bâtiment de la case, en tenant l'empreinte à jour."""
+        old = self._handles.objects[self.building_ids[index]]
+        self._handles.store(self.building_ids, index, building)
+        self.state_hash ^= building_key(index, old) ^ building_key(index, building)
+
+    def set_building(self, x, y, building):
+        index = y * self.width + x
+        if self._handles.objects[self.building_ids[index]] is not building:
+            self._replace_building(index, building)
+            if building is None:
+                self.entities.remove_building(x, y)
+            else:
+                self.entities.add_building(building, x, y)
+            self.tile_changed(x, y)
+
+    def set_unit(self, x, y, unit):
+        """Place une unité sur la case (None vide la case de ses unités)."""
+        if unit is not None:
+            self.add_unit(unit, x, y)
+            return
+        for occupant in self.occupancy.at(x, y):
+            self.remove_unit(occupant)
+
+    def _sync_unit_id(self, x, y):
+        # unit_ids garde la première unité de la case : is_empty reste un simple accès
+        self._handles.store(self.unit_ids, y * self.width + x, self.occupancy.first(x, y))
+
+    def add_unit(self, unit, x=None, y=None):
+        """Inscrit une unité sur la carte ; ses déplacements (Unit.move) tiennent l'occupation à jour."""
+        if unit.game_map is not None:
+            unit.game_map.remove_unit(unit)
+        if x is not None:
+            unit.x, unit.y = x, y
+        assert 0 <= unit.x < self.width and 0 <= unit.y < self.height, (unit.x, unit.y)
+        unit.game_map = self
+        self.occupancy.add(unit, unit.x, unit.y)
+        self._sync_unit_id(unit.x, unit.y)
+        self.entities.add_unit(unit)
+        self.state_hash ^= unit_key(unit.y * self.width + unit.x, unit)
+
+    def remove_unit(self, unit):
+        self.occupancy.remove(unit, unit.x, unit.y)
+        self._sync_unit_id(unit.x, unit.y)
+        self.entities.remove_unit(unit)
+        self.state_hash ^= unit_key(unit.y * self.width + unit.x, unit)
+        unit.game_map = None
+
+    def unit_moved(self, unit, old_x, old_y):
+        """Appelé par Unit.move après le changement de position."""
+        assert 0 <= unit.x < self.width and 0 <= unit.y < self.height, (unit.x, unit.y)
+        self.occupancy.remove(unit, old_x, old_y)
+        self._sync_unit_id(old_x, old_y)
+        self.occupancy.add(unit, unit.x, unit.y)
+        self._sync_unit_id(unit.x, unit.y)
+        self.state_hash ^= unit_key(old_y * self.width + old_x, unit) ^ unit_key(unit.y * self.width + unit.x, unit)
+
+    def sync_units(self, units):
+        """Réinscrit toutes les unités (partie chargée d'une sauvegarde)."""
+        self.occupancy = OccupancyGrid()
+        self.entities.clear_units()
+        for unit in units:
+            unit.game_map = None
+            self.add_unit(unit)
+        self.rehash()  # Les unités oubliées avec l'ancienne occupation n'ont pas été retirées
+
+    def sync_buildings(self, buildings):
+        """Réinscrit tous les bâtiments dans le registre (partie chargée d'une sauvegarde)."""
+        for building in buildings:
+            if self.building_at(building.x, building.y) is building:
+                self.entities.add_building(building, building.x, building.y)
+
+    def units_at(self, x, y):
+        return self.occupancy.at(x, y)
+
+    def units_in_rect(self, x0, y0, x1, y1):
+        """Unités dans le rectangle [x0, x1[ x [y0, y1[, sans parcourir la liste des unités."""
+        return self.occupancy.in_rect(x0, y0, x1, y1)
+
+    def _store_tile(self, tile, x, y):
+        """Copie une Tile autonome dans les tableaux, sans prévenir les caches."""
+        index = y * self.width + x
+        code = self._resource_code(tile.resource)
+        self.state_hash ^= resource_key(index, self.resources[index]) ^ resource_key(index, code)
+        self.resources[index] = code
+        self._replace_building(index, tile.building)
+        if tile.building is not None:
+            self.entities.add_building(tile.building, x, y)
+        unit = getattr(tile, "unit", None)  # Absent des toutes premières sauvegardes
+        if unit is not None:
+            self.set_unit(x, y, unit)
+        element = getattr(tile, "element", None)
+        if element is not None:
+            self._elements[index] = element
+        else:
+            self._elements.pop(index, None)
+
+    def checksum(self):
+        """Empreinte CRC32 de l'état des cases (ressources et bâtiments), pour comparer deux cartes."""
+        if self.chunks is not None:
+            # Les chunks intacts ne dépendent que de la graine : seuls les chunks modifiés comptent
+            crc = zlib.crc32(repr((self.seed, self.width, self.height)).encode())
+            for key in sorted(self.chunks.modified):
+                chunk = self.chunks.modified[key]
+                crc = zlib.crc32(repr(key).encode(), crc)
+                crc = zlib.crc32(chunk.resources, crc)
+                buildings = [
+                    (i, self._handles.objects[handle].building_type)
+                    for i, handle in enumerate(chunk.building_ids)
+                    if handle
+                ]
+                crc = zlib.crc32(repr(buildings).encode(), crc)
+            return crc
+        crc = zlib.crc32(self.resources)
+        buildings = sorted(
+            (i, self._handles.objects[handle].building_type)
+            for i, handle in enumerate(self.building_ids)
+            if handle
+        )
+        return zlib.crc32(repr(buildings).encode(), crc)
+
+    def reset_caches(self):
+        """Oublie tous les caches de recherche après une modification massive des cases."""
+        self.version += 1
+        self._fields = {}
+        self._hierarchy = None
+        self._walk_grid = None
+        self._resource_index = None
+        self.rehash()
+
+    def rehash(self):
+        """Recalcule state_hash en parcourant tout l'état (après une modification massive).
+
+        Sur une carte en chunks, les cases générées ne dépendent que de la graine :
+        seules leurs modifications ultérieures entrent dans l'empreinte, comme dans
+        set_resource (chaque chunk modifié est comparé à son contenu généré).
+        """
+        value = base_key(self.seed, self.width, self.height)
+        width = self.width
+        if self.chunks is None:
+            for index, code in enumerate(self.resources):
+                if code:
+                    value ^= resource_key(index, code)
+        else:
+            size = self.chunks.chunk_size
+            for (cx, cy), chunk in self.chunks.modified.items():
+                generated = self.chunks.pristine(cx, cy).resources
+                for offset, code in enumerate(chunk.resources):
+                    if code != generated[offset]:
+                        index = (cy * size + offset // size) * width + cx * size + offset % size
+                        value ^= resource_key(index, generated[offset]) ^ resource_key(index, code)
+        for (x, y), building in self.entities.buildings.items():
+            value ^= building_key(y * width + x, building)
+        for (x, y), occupants in self.occupancy.cells.items():
+            for unit in occupants:
+                value ^= unit_key(y * width + x, unit)
+        self.state_hash = value
+
+    def rebuild(self, width, height, seed, generator, buildings=(), units=(), resources=MAP_INIT_RESOURCES):
+        """Recrée la carte annoncée par MAP_INIT, en gardant les bâtiments et unités déjà connus.
+
+        L'hôte génère ses ressources avant de poser ses bâtiments, et la génération
+        évite les cases bâties : les bâtiments connus sont donc posés après, sinon
+        les tirages aléatoires se décaleraient et la carte serait différente.
+        """
+        self.__init__(width, height, seed, chunked=generator == "chunked")
+        self.generate_resources(*resources, generator)
+        for building in buildings:
+            self.place_building(building, building.x, building.y)
+        self.sync_units(units)
+
+    def generate_resources(self, wood_clusters, gold_clusters, cluster_size=40, generator="classic"):
+        """Génère le bois et l'or avec le générateur choisi (voir mapgen.GENERATORS).
+
+        Une carte en chunks ne génère rien ici : chaque chunk sera généré à son
+        premier accès, avec la même densité d'amas.
+        """
+        self.resource_settings = (wood_clusters, gold_clusters, cluster_size)  # Transmis par MAP_INIT
+        if self.chunks is not None:
+            self.chunks.configure(wood_clusters, gold_clusters, cluster_size)
+            self.generator = "chunked"
+            self.reset_caches()
+            return
+        if not mapgen.available(generator):
+            Print_Display(f"[WARNING] Générateur {generator} indisponible (NumPy absent ?), utilisation de classic")
+            generator = "classic"
+        self.generator = generator
+        if generator == "classic":
+            self.generate_forest_clusters(wood_clusters, cluster_size)
+            self.generate_gold_clusters(gold_clusters)
+            return
+        self.resources[:] = mapgen.generate(self, wood_clusters, gold_clusters, cluster_size, generator)
+        self.reset_caches()
 
     def generate_forest_clusters(self, num_clusters, cluster_size):
         for _ in range(num_clusters):
@@ -102,11 +802,9 @@ class Map:
             if (
                 0 <= current_x < self.width and 0 <= current_y < self.height
             ):  # passer en assert
-                if (
-                    self.grid[current_y][current_x].resource is None
-                    and self.grid[current_y][current_x].building is None
-                ):
-                    self.grid[current_y][current_x].resource = resource_type
+                index = current_y * self.width + current_x
+                if not self.resources[index] and not self.building_ids[index]:
+                    self.set_resource(current_x, current_y, resource_type)
                     size -= 1
 
                     self.rng.shuffle(
@@ -124,22 +822,56 @@ class Map:
     def place_building(self, building, x, y):
         """Place un bâtiment sur une tuile donnée"""
         if 0 <= x < self.width and 0 <= y < self.height:
-            self.grid[y][x].building = building
+            index = y * self.width + x
+            self._replace_building(index, building)
+            self.entities.add_building(building, x, y)
             if building.building_type == "Farm":
-                self.grid[y][x].resource = "Food"
+                code = self._resource_code("Food")
+                self.state_hash ^= resource_key(index, self.resources[index]) ^ resource_key(index, code)
+                self.resources[index] = code
+            self.tile_changed(x, y)
 
     def to_network_message(self):
         return (
-            f"type:'MAP_INIT',seed:{self.seed},width:{self.width},height:{self.height}"
+            f"type:'MAP_INIT',seed:{self.seed},width:{self.width},height:{self.height},"
+            f"generator:{self.generator}"
         )
 
     def place_tile(self, tile, x, y):
         """Place une tuile personnalisée à une position donnée"""
         if 0 <= x < self.width and 0 <= y < self.height:
-            self.grid[y][x] = tile
+            self._store_tile(tile, x, y)
+            self.tile_changed(x, y)
+
+
+def _slots_state(obj):
+    """État picklable d'un objet à __slots__ : les attributs définis, dans un dict."""
+    return {name: getattr(obj, name) for name in obj.__slots__ if hasattr(obj, name)}
+
+
+def _restore_slots(obj, state):
+    # Les sauvegardes antérieures aux __slots__ peuvent contenir des attributs disparus
+    for name, value in state.items():
+        if name in obj.__slots__:
+            setattr(obj, name, value)
 
 
 class Building:
+    # Données communes à tous les bâtiments d'un type, partagées au lieu d'être copiées
+    COSTS = {
+        "Town Center": {"Wood": 200, "Gold": 50},
+        "House": {"Wood": 50, "Gold": 0},
+        "Barracks": {"Wood": 150, "Gold": 50},
+        "Farm": {"Wood": 60, "Gold": 0},  # Coût de la ferme
+    }
+    POPULATION_CAPACITY = {"House": 5}  # Chaque maison ajoute de la population
+    FOOD_CAPACITY = {"Farm": 300}  # Chaque ferme contient 300 unités de nourriture
+
+    __slots__ = (
+        "building_type", "x", "y", "owner", "resources", "occupied",
+        "food_capacity", "network_owner",
+    )
+
     def __init__(self, building_type, x, y, owner=None):
         self.building_type = building_type  # Par exemple, 'Town Center'
         self.x = x
@@ -148,26 +880,33 @@ class Building:
             owner if owner is not None else Joueur
         )  # Utilise Joueur si owner n'est pas fourni
         self.resources = {"Wood": 0, "Gold": 0, "Food": 0}
-        self.costs = {
-            "Town Center": {"Wood": 200, "Gold": 50},
-            "House": {"Wood": 50, "Gold": 0},
-            "Barracks": {"Wood": 150, "Gold": 50},
-            "Farm": {"Wood": 60, "Gold": 0},  # Coût de la ferme
-        }
-        self.population_capacity = (
-            0  # Capacité maximale de population pour certains bâtiments
-        )
         self.occupied = False  # Assurez-vous que cet attribut est bien initialisé
+        self.food_capacity = self.FOOD_CAPACITY.get(building_type, 0)
+        # network_owner n'est défini qu'à la première récolte (voir gather_food_from_farm)
 
-        # Ajuster la capacité selon le type de bâtiment
-        if self.building_type == "House":
-            self.population_capacity = 5  # Chaque maison ajoute de la population
-        if self.building_type == "Farm":
-            self.food_capacity = 300  # Chaque ferme contient 300 unités de nourriture
+    def __getstate__(self):
+        return _slots_state(self)
+
+    def __setstate__(self, state):
+        # Valeurs par défaut pour les attributs absents des anciennes sauvegardes
+        self.owner = Joueur
+        self.resources = {"Wood": 0, "Gold": 0, "Food": 0}
+        self.occupied = False
+        self.food_capacity = self.FOOD_CAPACITY.get(state.get("building_type"), 0)
+        _restore_slots(self, state)
+
+    @property
+    def costs(self):
+        return self.COSTS
+
+    @property
+    def population_capacity(self):
+        """Capacité maximale de population apportée par le bâtiment."""
+        return self.POPULATION_CAPACITY.get(self.building_type, 0)
 
     def get_construction_cost(self):
         """Renvoie le coût de construction pour ce type de bâtiment."""
-        return self.costs.get(self.building_type, {"Wood": 0, "Gold": 0})
+        return self.COSTS.get(self.building_type, {"Wood": 0, "Gold": 0})
 
     def gather_food(self, amount):
         """Récolte la nourriture de la ferme jusqu'à épuisement."""
@@ -202,6 +941,13 @@ class Building:
 class Unit:
     _NEXT_NETWORK_ID = 1
 
+    __slots__ = (
+        "network_id", "is_remote", "unit_type", "x", "y", "ai", "owner",
+        "resource_collected", "max_capacity", "returning_to_town_center",
+        "current_resource", "working_farm", "action_end_time", "game_map",
+        "path", "path_target", "path_target_type", "path_target_building", "path_token",
+    )
+
     def __init__(
         self, unit_type, x, y, ai, owner=None, network_id=None, is_remote=False
     ):
@@ -225,11 +971,78 @@ class Unit:
         self.working_farm = (
             None  # Référence à la ferme sur laquelle le villageois travaille
         )
+        self.action_end_time = None  # Fin de la récolte en cours à la ferme
+        self.game_map = None  # Carte où l'unité est inscrite (Map.add_unit)
+        self.clear_path()
+
+    def __getstate__(self):
+        return _slots_state(self)
+
+    def __setstate__(self, state):
+        # Valeurs par défaut pour les attributs absents des anciennes sauvegardes
+        self.owner = Joueur
+        self.is_remote = False
+        self.action_end_time = None
+        self.game_map = None
+        _restore_slots(self, state)
+        if "network_id" not in state:
+            self.network_id = Unit._NEXT_NETWORK_ID
+            Unit._NEXT_NETWORK_ID += 1
+        if "path" not in state:  # Sauvegardes antérieures au cache de chemin
+            self.clear_path()
 
     def move(self, new_x, new_y):
+        old_x, old_y = self.x, self.y
         self.x = new_x
         self.y = new_y
+        if self.game_map is not None:
+            self.game_map.unit_moved(self, old_x, old_y)
         # Network message would be sent from controller level
+
+    def clear_path(self):
+        """Oublie le trajet en cours"""
+        self.path = ()  # Cases restantes jusqu'à la cible (liste une fois planifié)
+        self.path_target = None  # Case d'arrivée du trajet
+        self.path_target_type = None
+        self.path_target_building = None
+        self.path_token = None  # Version de la carte pour laquelle le chemin est vérifié
+
+    def plan_path(self, game_map, target_type, target_building=None, path=None):
+        """Calcule et mémorise le chemin d'un trajet : une seule recherche par trajet"""
+        if path is None:
+            path = self.find_nearest_path(game_map, target_type, target_building)
+        if path is None:
+            self.clear_path()
+            return None
+        self.path = path
+        self.path_target = path[-1] if path else (self.x, self.y)
+        self.path_target_type = target_type
+        self.path_target_building = target_building
+        self.path_token = game_map.version
+        return path
+
+    def path_is_valid(self, game_map):
+        """Vérifie que la cible du trajet existe toujours et que le chemin n'est pas bloqué"""
+        if self.path_target is None:
+            return False
+        if self.path_token == game_map.version:
+            return True  # Rien n'a changé sur la carte depuis la dernière vérification
+        target_x, target_y = self.path_target
+        if not game_map.matches_target(
+            target_x, target_y, self.path_target_type, self.path_target_building
+        ):
+            return False
+        for x, y in self.path[:-1]:
+            if not game_map.is_walkable(x, y):
+                return False
+        self.path_token = game_map.version
+        return True
+
+    def follow_path(self):
+        """Avance d'un pas sur le trajet mémorisé ; renvoie True si la cible est atteinte"""
+        if self.path:
+            self.move(*self.path.pop(0))
+        return not self.path and (self.x, self.y) == self.path_target
     
 
 
@@ -255,6 +1068,7 @@ class Unit:
                 # Network message would be sent from controller level
                 if self.resource_collected >= self.max_capacity:
                     self.returning_to_town_center = True
+                game_map.set_resource(self.x, self.y, None)
                 tile.delete_ressource_network(self.x, self.y)
                 #tile.resource = None
             else:
@@ -292,8 +1106,8 @@ class Unit:
             self.working_farm.occupy()
         # Print_Display(f"{self.unit_type} commence à récolter dans la ferme à ({self.working_farm.x}, {self.working_farm.y}).")
 
-        current_time = time.time()
-        if not hasattr(self, "action_end_time"):
+        current_time = clock()
+        if self.action_end_time is None:
             self.action_end_time = current_time + 5  # Timer initial pour la récolte
 
         if current_time >= self.action_end_time:
@@ -352,7 +1166,7 @@ class Unit:
 
     def find_nearest_farm(self, game_map):
         """Recherche la ferme la plus proche qui contient de la nourriture et qui n'est pas occupée."""
-        path = self.find_path(game_map, (self.x, self.y), "Farm")
+        path = self.find_nearest_path(game_map, "Farm")
         if path:
             # Récupération de la tuile et du bâtiment sur cette tuile
             farm_tile = game_map.grid[path[-1][1]][path[-1][0]]
@@ -372,7 +1186,7 @@ class Unit:
 
     def find_nearest_gold(self, game_map):
         """Utilise une recherche de chemin pour trouver l'or le plus proche"""
-        path = self.find_path(game_map, (self.x, self.y), "Gold")
+        path = self.find_nearest_path(game_map, "Gold")
         # if path:
         ##Print_Display(f"Chemin trouvé vers l'or : ") #{path}
         # else:
@@ -381,7 +1195,7 @@ class Unit:
 
     def find_nearest_wood(self, game_map):
         """Utilise une recherche de chemin pour trouver le bois le plus proche"""
-        path = self.find_path(game_map, (self.x, self.y), "Wood")
+        path = self.find_nearest_path(game_map, "Wood")
         # if path:
         ##Print_Display(f"Chemin trouvé vers le bois : ") #{path}
         # else:
@@ -396,106 +1210,68 @@ class Unit:
             ##Print_Display(f"{self.unit_type} est déjà sur le Town Center.")
             return None  # Pas besoin de trouver un chemin
 
-        path = self.find_path(game_map, (self.x, self.y), "Town Center", town_center)
+        path = self.find_nearest_path(game_map, "Town Center", town_center)
         # if path:
         ##Print_Display(f"Chemin trouvé vers le Town Center : {path}")
         # else:
         ##Print_Display(f"Aucun chemin vers le Town Center trouvé pour {self.unit_type} à ({self.x}, {self.y})")
         return path
 
-    def find_path(self, game_map, start, target_type, target_building=None):
-        """Recherche un chemin vers une destination donnée avec déplacements diagonaux"""
-
-        def heuristic(a, b):
-            return abs(a[0] - b[0]) + abs(a[1] - b[1])  # Distance de Manhattan
-
-        open_list = []
-        heapq.heappush(open_list, (0, start))
-        came_from = {}
-        cost_so_far = {start: 0}
-
-        # Ajout des déplacements diagonaux
-        directions = [
-            (-1, 0),
-            (1, 0),
-            (0, -1),
-            (0, 1),
-            (-1, -1),
-            (1, 1),
-            (-1, 1),
-            (1, -1),
-        ]
-
-        while open_list:
-            _, current = heapq.heappop(open_list)
-
-            # Vérification pour le bois
-            if (
-                target_type == "Wood"
-                and game_map.grid[current[1]][current[0]].resource == "Wood"
-            ):
-                ##Print_Display(f"Bois trouvé à {current}")  # Log la position du bois trouvé
-                return self.reconstruct_path(
-                    came_from, current
-                )  # Retourner le chemin trouvé
-
-            # Vérification pour l'or
-            if (
-                target_type == "Gold"
-                and game_map.grid[current[1]][current[0]].resource == "Gold"
-            ):
-                ##Print_Display(f"Or trouvé à {current}")  # Log la position de l'or trouvé
-                return self.reconstruct_path(
-                    came_from, current
-                )  # Retourner le chemin trouvé
-
-            # Vérification pour le Town Center
-            if (
-                target_type == "Town Center"
-                and target_building
-                and (current[0], current[1]) == (target_building.x, target_building.y)
-            ):
-                ##Print_Display(f"Town Center trouvé à {current}")  # Log la position du Town Center trouvé
-                return self.reconstruct_path(came_from, current)
-
-            # Vérification pour une ferme
-            if (
-                target_type == "Farm"
-                and isinstance(game_map.grid[current[1]][current[0]].building, Building)
-                and game_map.grid[current[1]][current[0]].building.building_type
-                == "Farm"
-            ):
-                ##Print_Display(f"Ferme trouvée à {current}")  # Log la position de la ferme trouvée
-                return self.reconstruct_path(came_from, current)
-
-            # Exploration des voisins
-            for dx, dy in directions:
-                next_node = (current[0] + dx, current[1] + dy)
-                if (
-                    0 <= next_node[0] < game_map.width
-                    and 0 <= next_node[1] < game_map.height
-                ):
-                    new_cost = cost_so_far[current] + 1
-                    if (
-                        next_node not in cost_so_far
-                        or new_cost < cost_so_far[next_node]
-                    ):
-                        cost_so_far[next_node] = new_cost
-                        priority = new_cost + heuristic(next_node, (self.x, self.y))
-                        heapq.heappush(open_list, (priority, next_node))
-                        came_from[next_node] = current
-
-        ##Print_Display(f"Aucun chemin trouvé pour {target_type}")
-        return None
+    def find_nearest_path(self, game_map, target_type, target_building=None):
+        """Chemin vers la cible la plus proche, lu dans le champ de distance partagé si possible"""
+        field = game_map.distance_field(target_type, target_building)
+        if field is None:
+            return self.find_path(game_map, (self.x, self.y), target_type, target_building)
+        return field.path_from(self.x, self.y)
+
+    def next_step_towards(self, game_map, target_type, target_building=None):
+        """Renvoie (prochain pas, distance) vers la cible la plus proche du type donné"""
+        field = game_map.distance_field(target_type, target_building)
+        if field is not None:
+            return field.next_step(self.x, self.y), field.distance(self.x, self.y)
+        path = self.find_path(game_map, (self.x, self.y), target_type, target_building)
+        if path is None:
+            return None, float("inf")
+        return (path[0] if path else None), len(path)
+
+    def find_path(
+        self, game_map, start, target_type, target_building=None, heuristic=None
+    ):
+        """Recherche un chemin vers une destination donnée avec déplacements diagonaux
+
+        Avec une cible connue (Town Center), A* guidé par l'heuristique vers la
+        cible ; sinon Dijkstra jusqu'à la case du type recherché la plus proche,
+        guidé pour le bois et l'or par la distance à vol d'oiseau lue dans l'index
+        spatial de la carte. game_map.path_engine permet de choisir JPS ou HPA* à la place de A*.
+        """
+
+        def is_goal(x, y):
+            return game_map.matches_target(x, y, target_type, target_building)
+
+        goal = None
+        if target_building is not None:
+            goal = (target_building.x, target_building.y)
+        if game_map.path_engine == "jps":
+            return jps(game_map, start, is_goal, goal)
+        if goal is None:
+            # Guidage par l'index seulement s'il couvre toute la carte (pas en mode chunks)
+            if (target_type == "Wood" or target_type == "Gold") and game_map.chunks is None:
+                index = game_map.resource_index()
+                if not index.count(target_type):
+                    return None  # Plus aucune ressource de ce type sur la carte
+
+                def lower_bound(node):
+                    return index.nearest_distance(target_type, *node)
+
+                return dijkstra_nearest(game_map, start, is_goal, lower_bound=lower_bound)
+            return dijkstra_nearest(game_map, start, is_goal, bounds=game_map.search_bounds(*start))
+        if game_map.path_engine == "hpa":
+            return game_map.hierarchy().find_path(start, goal, is_goal)
+        return astar(game_map, start, is_goal, goal, heuristic or octile_distance)
 
     def reconstruct_path(self, came_from, current):
         """Recrée le chemin à partir de la position courante"""
-        path = []
-        while current in came_from:
-            path.append(current)
-            current = came_from[current]
-        path.reverse()  # On inverse le chemin pour partir de la position de départ
-        return path
+        return reconstruct_path(came_from, current)
 
     def to_network_message(self):
         return f"id:{self.id},type:{self.unit_type},x:{self.x},y:{self.y},owner:{self.owner}"
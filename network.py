@@ -1,20 +1,103 @@
 import time
+import random
 import socket
+import asyncio
+import threading
+from collections import deque
+import protocol
+import reliable
+from interest import InterestArea
+from sync import StateSync
 from view import Print_Display
 
 NETWORK_PYTHON_PORT = 5001
 NETWORK_MY_PORT = 5000
 NETWORK_DEST_PORT = 6000
+# Taille maximale d'un datagramme groupé : sous le MTU Ethernet une fois les en-têtes IP/UDP
+# ajoutés, et jamais plus que le tampon de réception du pont C (BUFFER_SIZE de connect-game.c)
+DEFAULT_MTU = 1200
+BRIDGE_BUFFER_SIZE = 4096
+HELLO_INTERVAL = 1.0  # Secondes entre deux HELLO tant que le pair ne nous connaît pas
+# Au-delà, le pair ne parle sans doute que le texte ; un HELLO reçu plus tard relance l'échange
+HELLO_ATTEMPTS = 30
+VIEW_INTERVAL = 2.0  # Secondes entre deux VIEW quand la vue ne bouge pas (pertes)
+# Octets par envoi de l'état (toutes les 0,5 s) : au-delà, les entités les moins prioritaires attendent
+TICK_BUDGET = 4 * DEFAULT_MTU
+# Priorité gagnée à chaque envoi où une entité changée attend ; une unité inactive compte moins
+PRIORITIES = {"BUILDING_STATE": 8.0, "RESOURCES": 4.0, "UNIT_UPDATE": 1.0}
+IDLE_PRIORITY = 0.25
+
+
+class SendScheduler:
+    """Choisit les entités changées envoyées à chaque envoi de l'état, dans un budget d'octets.
+
+    Chaque entité en attente accumule sa priorité à chaque envoi : les plus
+    importantes partent tout de suite, les autres quand elles ont assez attendu.
+    Les messages partis entre deux envois (suppressions de ressources, accusés
+    de réception...) sont toujours envoyés aussitôt mais pris sur le budget.
+    """
+
+    def __init__(self, budget=TICK_BUDGET):
+        self.budget = budget
+        self.accumulated = {}  # clé d'entité -> priorité accumulée en attente
+        self.mark = 0  # NetworkClient.bytes_sent à la fin du dernier envoi de l'état
+        self.deferred = 0  # Entités reportées au dernier envoi (mesure)
+
+    def select(self, changed, priorities, size, spent=0):
+        """Sous-ensemble de changed ({clé: champs}) à envoyer ; size(type, champs) donne leur taille."""
+        accumulated = {
+            key: self.accumulated.get(key, 0.0) + priorities.get(key, 1.0) for key in changed
+        }
+        remaining = self.budget - spent
+        selected = {}
+        for key in sorted(changed, key=accumulated.__getitem__, reverse=True):
+            cost = size(key[0], changed[key])
+            if cost <= remaining:
+                remaining -= cost
+                selected[key] = changed[key]
+        self.accumulated = {key: value for key, value in accumulated.items() if key not in selected}
+        self.deferred = len(changed) - len(selected)
+        return selected
+
 
 class NetworkClient:
-    def __init__(self, python_port, my_port):
+    def __init__(self, python_port, my_port, mtu=DEFAULT_MTU):
         self.python_port = python_port
         self.bridge_port = my_port
+        # Messages binaires d'une frame regroupés, envoyés par flush()
+        self.batcher = protocol.Batcher(min(mtu, BRIDGE_BUFFER_SIZE))
+        self.send_lock = threading.Lock()  # Le batcher sert aussi au thread réseau (AsyncNetworkClient)
 
         self.connected = False
-        self.inbox = []
+        self.inbox = deque()
+        # Avertissements de la réception, affichés par la boucle de jeu (consume_messages) :
+        # la réception peut tourner sur un autre thread et curses n'est pas thread-safe
+        self.notices = deque()
         self.last_msg_time = time.time()
 
+        # Tampon de réception préalloué (recvfrom_into) : chaque datagramme y est décodé
+        # sur place, seuls les champs des messages en sortent
+        self._buffer = bytearray(BRIDGE_BUFFER_SIZE)
+
+        # Négociation du format (HELLO) : texte tant que le pair n'a pas annoncé le binaire
+        self.wire_format = protocol.FORMAT_TEXT
+        self.peer_formats = None  # Formats annoncés par le pair (None : pas encore de HELLO)
+        self.peer_knows_us = False  # Le pair a reçu notre HELLO
+        self.last_hello_time = 0.0
+        self.hellos_sent = 0
+        # Identifiant de ce démarrage, annoncé dans HELLO : le pair sait ainsi si nous redémarrons
+        self.session = random.getrandbits(31) or 1
+        self.peer_session = None
+
+        self.sync = StateSync()  # Envois en delta de l'état du jeu (voir send_game_state_to_c)
+        self.scheduler = SendScheduler()  # Budget d'octets et priorités de ces envois
+        self.bytes_sent = 0
+        self.lockstep = None  # LockstepSession en mode lockstep : seules les commandes sont échangées
+        self.peer_view = InterestArea()  # Zone affichée par le pair : unités envoyées en priorité
+        self.view_sent = None
+        self.last_view_time = 0.0
+        self.reliable = reliable.ReliableChannel()  # Suppressions de ressources, bâtiments
+
         # Socket UDP Non-Bloquant
         self.sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
         self.sock.bind(("127.0.0.1", self.python_port))
@@ -26,52 +109,330 @@ class NetworkClient:
 
     def poll(self):
         """Récupère les messages du C et vérifie le timeout"""
+        buffer, recv_into = self._buffer, self.sock.recvfrom_into
         try:
             while True:  # On vide tout le buffer d'un coup
-                data, _ = self.sock.recvfrom(4096)
-                msg = data.decode().strip()
-
-                # Parsing simple
-                if "|" in msg:
-                    parts = msg.split("|", 1)
-                    self.inbox.append((parts[0], parts[1]))
-                else:
-                    self.inbox.append((msg, ""))
-
-                # Le spam de données maintient la connexion en vie
-                self.last_msg_time = time.time()
-                if not self.connected:
-                    self.connected = True
-                    Print_Display("[NET] Connexion détectée !")
-
+                size, _ = recv_into(buffer)
+                self._handle_datagram(buffer, size)
         except BlockingIOError:
             pass  # Rien à lire
         except ConnectionResetError:
             pass
+        self._check_connection()
+
+    def _handle_datagram(self, data, size=None):
+        """Traite un datagramme data[:size] (tampon de réception réutilisé : rien n'en est gardé)."""
+        if size is None:
+            size = len(data)
+        if protocol.is_batch(data, size):
+            try:
+                spans = protocol.batch_spans(data, size)
+            except protocol.ProtocolError as e:
+                self._notify(f"[WARNING] Lot de messages ignoré : {e}")
+                return
+            for start, end in spans:
+                try:
+                    self._receive(*protocol.decode(data, start, end))
+                except protocol.ProtocolError as e:
+                    self._notify(f"[WARNING] Message binaire ignoré : {e}")
+        elif protocol.is_binary(data, size):
+            try:
+                msg_type, fields = protocol.decode(data, 0, size)
+            except protocol.ProtocolError as e:
+                self._notify(f"[WARNING] Message binaire ignoré : {e}")
+                return
+            self._receive(msg_type, fields)
+        else:
+            msg = data[:size].decode("utf-8", errors="replace").strip()
+
+            # Parsing simple
+            if "|" in msg:
+                msg_type, payload = msg.split("|", 1)
+                if payload.startswith(f"{msg_type}|"):
+                    payload = payload.split("|", 1)[1]  # Préfixe doublé des anciens pairs
+                self._receive(msg_type, protocol.parse_text(payload))
+            else:
+                self.inbox.append((msg, ""))
+
+        # Le spam de données maintient la connexion en vie
+        self.last_msg_time = time.time()
+        if not self.connected:
+            self.connected = True
+            self._notify("[NET] Connexion détectée !")
+
+    def _notify(self, text):
+        self.notices.append(text)
+
+    def _print_notices(self):
+        notices = self.notices
+        while notices:
+            Print_Display(notices.popleft())
 
+    def _check_connection(self):
         # Timeout : Si le "spam" s'arrête pendant 2s, c'est mort
         if self.connected and (time.time() - self.last_msg_time > 2.0):
             Print_Display("[NET] ⚠️  Connexion perdue (Plus de données)")
             self.connected = False
 
-    def send(self, msg_type, payload=""):
-        """Envoie vers le C"""
-        msg = f"{msg_type}|{payload}" if payload else msg_type
+        if (
+            not self.peer_knows_us
+            and self.hellos_sent < HELLO_ATTEMPTS
+            and time.time() - self.last_hello_time > HELLO_INTERVAL
+        ):
+            self.send_hello()
+
+    def send_hello(self):
+        """Annonce nos formats ; toujours en texte, lisible par un pair qui ne connaît que lui."""
+        self.last_hello_time = time.time()
+        self.hellos_sent += 1
+        fields = {
+            "version": protocol.VERSION,
+            "formats": protocol.SUPPORTED_FORMATS,
+            "seen": int(self.peer_formats is not None),
+            "session": self.session,
+        }
+        self._send_raw(protocol.encode_text("HELLO", fields).encode())
+
+    def _receive(self, msg_type, payload):
+        """Traite les messages propres au réseau, transmet les autres au jeu via inbox."""
+        if msg_type == "HELLO":
+            self._receive_hello(payload)
+        elif msg_type == "SNAPSHOT":
+            try:
+                seq, count = int(payload["seq"]), int(payload["count"])
+            except (KeyError, ValueError):
+                return
+            if self.sync.snapshot_received(seq, count):
+                self.send_message("SYNC_ACK", seq=seq)
+        elif msg_type == "SYNC_ACK":
+            try:
+                self.sync.acknowledge(int(payload["seq"]))
+            except (KeyError, ValueError):
+                pass
+        elif msg_type == "VIEW":
+            try:
+                self.peer_view.update(
+                    int(payload["x0"]), int(payload["y0"]), int(payload["x1"]), int(payload["y1"])
+                )
+            except (KeyError, ValueError):
+                pass
+        elif msg_type == "RELIABLE":
+            try:
+                seq, inner = int(payload["seq"]), payload["type"]
+            except (KeyError, ValueError, TypeError):
+                return
+            if self.reliable.receive(seq) and inner:
+                # Hors des envois en delta : n'entre pas dans le décompte du SNAPSHOT
+                self.inbox.append((inner, reliable.unpack_fields(payload.get("payload") or "")))
+        elif msg_type == "RACK":
+            try:
+                self.reliable.acknowledge(int(payload["ack"]), int(payload["bits"]))
+            except (KeyError, ValueError, TypeError):
+                pass
+        elif msg_type == "COMMAND" and self.lockstep is not None:
+            self.lockstep.receive_command(payload)
+        elif msg_type == "TURN" and self.lockstep is not None:
+            self.lockstep.receive_turn(payload)
+        else:
+            if msg_type in StateSync.ENTITY_MESSAGES:
+                self.sync.entity_received()
+            self.inbox.append((msg_type, payload))
+
+    def _receive_hello(self, payload):
+        try:
+            version = int(payload.get("version", 0))
+            formats = int(payload.get("formats", protocol.FORMAT_TEXT))
+            seen = int(payload.get("seen", 0))
+            session = int(payload.get("session", 0))
+        except ValueError:
+            return
+        if session:
+            if self.peer_session is not None and session != self.peer_session:
+                # Le pair a redémarré : ses numéros fiables repartent de 1, ses états sont à renvoyer
+                self.reliable.peer_reset()
+            self.peer_session = session
+        first = self.peer_formats is None
+        self.peer_formats = formats
+        if version == protocol.VERSION and formats & protocol.FORMAT_BINARY:
+            if self.wire_format != protocol.FORMAT_BINARY:
+                self._notify("[NET] Format binaire négocié avec le pair")
+            self.wire_format = protocol.FORMAT_BINARY
+        else:
+            self.wire_format = protocol.FORMAT_TEXT
+        if seen:
+            self.peer_knows_us = True
+        if first or not seen:
+            # Le pair ignore encore que nous l'avons entendu, ou ne nous a pas entendus
+            self.send_hello()
+
+    def _send_raw(self, data):
+        self.bytes_sent += len(data)
         try:
-            self.sock.sendto(msg.encode(), ("127.0.0.1", self.bridge_port))
+            self.sock.sendto(data, ("127.0.0.1", self.bridge_port))
         except OSError:
             pass
 
+    def send(self, msg_type, payload=""):
+        """Envoie vers le C un message texte déjà formaté"""
+        msg = f"{msg_type}|{payload}" if payload else msg_type
+        self._send_raw(msg.encode())
+
+    def send_message(self, msg_type, **fields):
+        """Envoie un message de protocol.MESSAGES dans le format négocié avec le pair.
+
+        En binaire, le message attend le prochain flush() pour partir groupé avec
+        les autres messages de la frame ; le texte des anciens pairs part aussitôt.
+        """
+        if self.wire_format == protocol.FORMAT_BINARY:
+            message = protocol.encode(msg_type, fields)
+            with self.send_lock:
+                ready = self.batcher.add(message)
+            if ready is not None:
+                self._send_raw(ready)
+        else:
+            self._send_raw(protocol.encode_text(msg_type, fields).encode())
+
+    @property
+    def peer_reliable(self):
+        return self.peer_formats is not None and bool(self.peer_formats & protocol.FEATURE_RELIABLE)
+
+    def send_reliable(self, msg_type, **fields):
+        """Envoie un message qui ne doit pas se perdre : renvoyé jusqu'à sa confirmation par le pair.
+
+        Un pair sans voie fiable (ou pas encore annoncé) le reçoit comme un message ordinaire.
+        """
+        if not self.peer_reliable:
+            self.send_message(msg_type, **fields)
+            return
+        seq = self.reliable.register(msg_type, fields, time.time())
+        self.send_message("RELIABLE", seq=seq, type=msg_type, payload=reliable.pack_fields(fields))
+
+    def encoded_size(self, msg_type, fields):
+        """Octets qu'ajoute ce message à l'envoi, dans le format négocié"""
+        if self.wire_format == protocol.FORMAT_BINARY:
+            return protocol.LENGTH.size + len(protocol.encode(msg_type, fields))
+        return len(protocol.encode_text(msg_type, fields))
+
+    def pending_bytes(self):
+        """Octets en attente du prochain flush()"""
+        with self.send_lock:
+            return self.batcher.size - protocol.HEADER.size if self.batcher.messages else 0
+
+    def flush(self):
+        """Envoie les messages en attente (à appeler une fois par frame)"""
+        if self.peer_reliable:
+            # Renvois des messages fiables non confirmés, confirmations jointes au même datagramme
+            for seq, msg_type, fields in self.reliable.due(time.time()):
+                self.send_message("RELIABLE", seq=seq, type=msg_type, payload=reliable.pack_fields(fields))
+            for ack, bits in self.reliable.acks():
+                self.send_message("RACK", ack=ack, bits=bits)
+        with self.send_lock:
+            ready = self.batcher.flush()
+        if ready is not None:
+            self._send_raw(ready)
+
+    def send_view(self, x0, y0, x1, y1):
+        """Annonce au pair la zone affichée, quand elle change (et périodiquement, en cas de perte)"""
+        now = time.time()
+        rect = (x0, y0, x1, y1)
+        if rect != self.view_sent or now - self.last_view_time > VIEW_INTERVAL:
+            self.send_message("VIEW", x0=x0, y0=y0, x1=x1, y1=y1)
+            self.view_sent = rect
+            self.last_view_time = now
+
     def send_ping(self, unit_id, x, y):
         """Envoie un ping pour notifier un mouvement de villager"""
-        payload = f"unit_id:{unit_id},x:{x},y:{y}"
-        self.send("PING", payload)
+        self.send_message("PING", unit_id=unit_id, x=x, y=y)
 
     def consume_messages(self):
-        msgs = self.inbox[:]
-        self.inbox.clear()
+        self._print_notices()
+        # La file est remplacée plutôt que copiée
+        msgs, self.inbox = self.inbox, deque()
         return msgs
 
+    def close(self):
+        self.sock.close()
+
+
+class AsyncNetworkClient(NetworkClient):
+    """NetworkClient dont la réception tourne dans une boucle asyncio sur son propre thread.
+
+    Les datagrammes sont décodés dès leur arrivée, quel que soit le temps d'une
+    frame ; HELLO, SNAPSHOT et SYNC_ACK y sont traités aussitôt. Les messages du
+    jeu attendent dans une file que la boucle de jeu vide par consume_messages().
+    Le thread réseau n'écrit ni à l'écran ni sur le socket : ses réponses (HELLO,
+    SYNC_ACK en texte) attendent dans outbox le prochain poll() ou flush().
+    """
+
+    def __init__(self, python_port, my_port, mtu=DEFAULT_MTU):
+        super().__init__(python_port, my_port, mtu)
+        # Le thread réseau reçoit dans le tampon préalloué (sock_recvfrom_into) et le décode sur place.
+        # La file n'est pas remplacée par consume_messages (append / popleft sont sûrs entre threads).
+        self.outbox = deque()
+        self.loop = asyncio.new_event_loop()
+        ready = threading.Event()
+        self.thread = threading.Thread(
+            target=self._run, args=(ready,), name="network", daemon=True
+        )
+        self.thread.start()
+        ready.wait()
+
+    def _run(self, ready):
+        loop = self.loop
+        asyncio.set_event_loop(loop)
+        receiver = loop.create_task(self._receive_loop())
+        ready.set()
+        loop.run_forever()
+        receiver.cancel()
+        loop.run_until_complete(asyncio.gather(receiver, return_exceptions=True))
+        loop.close()
+
+    async def _receive_loop(self):
+        loop, sock, buffer = self.loop, self.sock, self._buffer
+        while True:
+            try:
+                size, _ = await loop.sock_recvfrom_into(sock, buffer)
+            except ConnectionResetError:
+                continue  # Sous Windows, quand le pont C n'écoute pas encore
+            try:
+                self._handle_datagram(buffer, size)
+            except Exception as e:
+                # Une erreur ne doit pas arrêter la réception
+                self._notify(f"[WARNING] Datagramme ignoré : {e}")
+
+    def poll(self):
+        """La réception est faite par le thread réseau : ne reste que la surveillance du lien"""
+        self._send_outbox()
+        self._check_connection()
+
+    def _send_raw(self, data):
+        if threading.current_thread() is self.thread:
+            self.outbox.append(data)
+        else:
+            super()._send_raw(data)
+
+    def _send_outbox(self):
+        outbox = self.outbox
+        while outbox:
+            super()._send_raw(outbox.popleft())
+
+    def flush(self):
+        super().flush()
+        self._send_outbox()
+
+    def consume_messages(self):
+        self._print_notices()
+        msgs = []
+        inbox = self.inbox
+        while inbox:
+            msgs.append(inbox.popleft())
+        return msgs
+
+    def close(self):
+        self.loop.call_soon_threadsafe(self.loop.stop)
+        self.thread.join()
+        self.sock.close()
+
 
 def send_simple_message_to_c(network, msg_type, payload):
     """Send a simple message to C process"""
@@ -81,37 +442,92 @@ def send_simple_message_to_c(network, msg_type, payload):
     except Exception as e:
         Print_Display(f"[WARNING] Error sending message to C: {str(e)}")
 
+def send_message_to_c(network, msg_type, **fields):
+    """Send a protocol message to C process, in the negotiated format"""
+    try:
+        network.send_message(msg_type, **fields)
+    except Exception as e:
+        Print_Display(f"[WARNING] Error sending message to C: {str(e)}")
+
+def send_reliable_to_c(network, msg_type, **fields):
+    """Send a protocol message to C process on the reliable lane (resent until acknowledged)"""
+    try:
+        network.send_reliable(msg_type, **fields)
+    except Exception as e:
+        Print_Display(f"[WARNING] Error sending message to C: {str(e)}")
+
 def send_game_state_to_c(network, units, buildings, ai, player_side):
     """Send current game state to C process"""
 
     try:
-        # Send unit positions
+        # État courant des entités du joueur local (celles du pair ne lui sont pas renvoyées).
+        # Les unités loin de la vue du pair partent moins souvent, ou plus du tout
+        states = {}
+        priorities = {}
+        interest, phase = network.peer_view, network.sync.seq
         for unit in units:
-            msg = f"UNIT_UPDATE|id:{unit.network_id},type:{unit.unit_type},x:{unit.x},y:{unit.y},owner:{unit.owner}"
-            network.send("UNIT_UPDATE", msg)
-            # Print_Display(f"[DEBUG] Sent to C: {msg}")
+            if (
+                unit.owner == player_side and not getattr(unit, 'is_remote', False)
+                and interest.wants(unit.x, unit.y, phase + unit.network_id)
+            ):
+                key = ("UNIT_UPDATE", unit.network_id)
+                states[key] = dict(
+                    id=unit.network_id, type=unit.unit_type,
+                    x=unit.x, y=unit.y, owner=unit.owner,
+                )
+                if not unit.path and not unit.returning_to_town_center:
+                    priorities[key] = IDLE_PRIORITY
 
-        # Send resource information
         if ai and ai.resources:
-            res_msg = f"wood:{ai.resources.get('Wood', 0)},gold:{ai.resources.get('Gold', 0)},food:{ai.resources.get('Food', 0)}"
-            network.send("RESOURCES", res_msg)
-            # Print_Display(f"[DEBUG] Sent to C: {res_msg}")
+            states[("RESOURCES",)] = dict(
+                wood=ai.resources.get('Wood', 0),
+                gold=ai.resources.get('Gold', 0), food=ai.resources.get('Food', 0),
+            )
 
-        # Send building information
+        # Bâtiments sur la voie fiable : envoyés une fois par changement, renvoyés seulement s'ils se perdent
+        reliable_lane = network.peer_reliable
         for building in buildings:
-            bld_msg = f"type:{building.building_type},x:{building.x},y:{building.y},owner:{building.owner}"
-            network.send("BUILDING_STATE", bld_msg)
-            # Print_Display(f"[DEBUG] Sent to C: {bld_msg}")
+            if building.owner == player_side:
+                key = ("BUILDING_STATE", building.x, building.y)
+                fields = dict(
+                    type=building.building_type,
+                    x=building.x, y=building.y, owner=building.owner,
+                )
+                if not reliable_lane:
+                    states[key] = fields
+                elif network.reliable.changed(key, fields):
+                    network.send_reliable("BUILDING_STATE", **fields)
+
+        for key in states:
+            priorities.setdefault(key, PRIORITIES[key[0]])
+
+        # Seules les entités changées depuis le dernier état confirmé partent (tout, sur une keyframe),
+        # les plus prioritaires d'abord dans la limite du budget
+        scheduler = network.scheduler
+        sync = network.sync
+        spent = network.bytes_sent + network.pending_bytes() - scheduler.mark
+        # Le SNAPSHOT de fin est pris sur le même budget (taille maximale : tout l'état)
+        spent += network.encoded_size("SNAPSHOT", dict(seq=sync.seq + 1, count=len(states), keyframe=1))
+        seq, keyframe, changed = sync.delta(
+            states, lambda changed: scheduler.select(changed, priorities, network.encoded_size, spent)
+        )
+        for key, fields in changed.items():
+            network.send_message(key[0], **fields)
+        # Le marqueur de fin permet au pair de confirmer la réception complète
+        network.send_message("SNAPSHOT", seq=seq, count=len(changed), keyframe=int(keyframe))
+        network.flush()
+        scheduler.mark = network.bytes_sent
 
     except Exception as e:
         Print_Display(f"[WARNING] Error sending game state to C: {str(e)}")
 
 
-def load_network_client(Python_port, My_port):
+def load_network_client(Python_port, My_port, use_async=True):
     """Initializes and returns a NetworkClient instance."""
 
     try:
-        client = NetworkClient(
+        client_class = AsyncNetworkClient if use_async else NetworkClient
+        client = client_class(
             python_port=Python_port, my_port=int(My_port)
         )
         return client
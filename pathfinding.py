@@ -0,0 +1,553 @@
+import heapq
+from collections import deque
+
+# Déplacements autorisés (8 voisins), dans le même ordre que Unit.find_path
+DIRECTIONS = [
+    (-1, 0),
+    (1, 0),
+    (0, -1),
+    (0, 1),
+    (-1, -1),
+    (1, 1),
+    (-1, 1),
+    (1, -1),
+]
+
+INF = float("inf")
+
+
+class SearchStats:
+    """Compteurs des recherches de chemin, pour les mesures de performance."""
+
+    def __init__(self):
+        self.reset()
+
+    def reset(self):
+        self.searches = 0
+        self.expanded = 0  # Nombre de cases sorties de la liste ouverte
+
+
+search_stats = SearchStats()
+
+
+def octile_distance(a, b, straight=1, diagonal=1):
+    """Heuristique octile ; avec des diagonales au même coût, c'est la distance de Chebyshev."""
+    dx = abs(a[0] - b[0])
+    dy = abs(a[1] - b[1])
+    return straight * (dx + dy) + (diagonal - 2 * straight) * min(dx, dy)
+
+
+def reconstruct_path(came_from, current):
+    """Recrée le chemin à partir de la position courante (sans la case de départ)"""
+    path = []
+    while current in came_from:
+        path.append(current)
+        current = came_from[current]
+    path.reverse()  # On inverse le chemin pour partir de la position de départ
+    return path
+
+
+def astar(
+    game_map,
+    start,
+    is_goal,
+    goal=None,
+    heuristic=octile_distance,
+    stats=None,
+    bounds=None,
+):
+    """A* de start vers goal ; sans goal, l'heuristique est nulle (Dijkstra).
+
+    is_goal(x, y) indique les cases d'arrivée ; elles peuvent être non franchissables
+    (arbre, Town Center) mais ne servent jamais de passage. bounds = (x0, y0, x1, y1)
+    limite la recherche à un rectangle (x1 et y1 exclus).
+    """
+    stats = stats or search_stats
+    stats.searches += 1
+    min_x, min_y, max_x, max_y = bounds or (0, 0, game_map.width, game_map.height)
+
+    def estimate(node):
+        return heuristic(node, goal) if goal is not None else 0
+
+    open_list = [(estimate(start), 0, start)]
+    came_from = {}
+    cost_so_far = {start: 0}
+    closed = set()
+
+    while open_list:
+        _, _, current = heapq.heappop(open_list)
+        if current in closed:
+            continue  # Entrée périmée
+        closed.add(current)
+        stats.expanded += 1
+
+        if is_goal(*current):
+            return reconstruct_path(came_from, current)
+
+        new_cost = cost_so_far[current] + 1
+        for dx, dy in DIRECTIONS:
+            next_node = (current[0] + dx, current[1] + dy)
+            if not (min_x <= next_node[0] < max_x and min_y <= next_node[1] < max_y):
+                continue
+            if next_node in closed or new_cost >= cost_so_far.get(next_node, INF):
+                continue
+            if not (game_map.is_walkable(*next_node) or is_goal(*next_node)):
+                continue
+            cost_so_far[next_node] = new_cost
+            came_from[next_node] = current
+            h = estimate(next_node)
+            heapq.heappush(open_list, (new_cost + h, h, next_node))
+
+    return None
+
+
+def dijkstra_nearest(game_map, start, is_goal, stats=None, lower_bound=None, bounds=None):
+    """Recherche de la case la plus proche vérifiant is_goal (sans cible connue).
+
+    lower_bound(node), s'il est fourni, minore la distance à la cible la plus proche
+    (ex : distance à vol d'oiseau lue dans l'index spatial) et guide la recherche.
+    bounds limite la recherche à un rectangle, comme pour astar.
+    """
+    if lower_bound is None:
+        return astar(game_map, start, is_goal, None, stats=stats, bounds=bounds)
+    return astar(
+        game_map,
+        start,
+        is_goal,
+        start,
+        lambda node, _: lower_bound(node),
+        stats=stats,
+        bounds=bounds,
+    )
+
+
+def nearest_each(game_map, start, goals, bounds=None, stats=None):
+    """Un seul parcours en largeur depuis start pour plusieurs types de cible.
+
+    goals est un dict {nom: is_goal}. Renvoie {nom: chemin vers la cible la plus
+    proche (sans la case de départ), ou None}. Le parcours s'arrête quand chaque
+    type est trouvé ; bounds le limite à un rectangle, comme pour astar.
+    """
+    stats = stats or search_stats
+    stats.searches += 1
+    min_x, min_y, max_x, max_y = bounds or (0, 0, game_map.width, game_map.height)
+    found = {}
+    for name, is_goal in goals.items():
+        if is_goal(*start):
+            found[name] = []
+    came_from = {start: None}
+    queue = deque([start])
+
+    while queue and len(found) < len(goals):
+        current = queue.popleft()
+        stats.expanded += 1
+        for dx, dy in DIRECTIONS:
+            node = (current[0] + dx, current[1] + dy)
+            if not (min_x <= node[0] < max_x and min_y <= node[1] < max_y) or node in came_from:
+                continue
+            for name, is_goal in goals.items():
+                if name not in found and is_goal(*node):
+                    came_from[node] = current
+                    found[name] = _path_to(came_from, node)
+            # Une cible non franchissable (arbre, or) ne sert pas de passage
+            if game_map.is_walkable(*node):
+                came_from[node] = current
+                queue.append(node)
+    return {name: found.get(name) for name in goals}
+
+
+def _path_to(came_from, node):
+    """Chemin depuis la racine d'un parcours (came_from[racine] = None), sans la racine."""
+    path = []
+    while came_from[node] is not None:
+        path.append(node)
+        node = came_from[node]
+    path.reverse()
+    return path
+
+
+def jps(game_map, start, is_goal, goal=None, stats=None):
+    """Jump Point Search : A* qui saute les cases symétriques d'une grille à coût uniforme.
+
+    Seuls les points de saut entrent dans la liste ouverte ; le chemin renvoyé est
+    détaillé case par case. Sans goal, la recherche s'arrête sur la première case
+    vérifiant is_goal. Les parcours utilisent la grille de franchissabilité de la
+    carte (Map.walk_grid) plutôt que des appels à is_walkable.
+    """
+    stats = stats or search_stats
+    stats.searches += 1
+    width, height = game_map.width, game_map.height
+    grid = game_map.walk_grid()
+    stride = width + 2
+    goal_index = (goal[1] + 1) * stride + goal[0] + 1 if goal is not None else -1
+
+    def reached(i):
+        """Case d'arrivée ? is_goal n'est appelé que pour les cases non ordinaires."""
+        if i == goal_index:
+            return True
+        if grid[i] == 1:
+            return False
+        x, y = i % stride - 1, i // stride - 1
+        return 0 <= x < width and 0 <= y < height and is_goal(x, y)
+
+    def passable(i):
+        return grid[i] != 0 or reached(i)
+
+    def jump(i, dx, dy):
+        """Avance dans la direction (dx, dy) jusqu'au prochain point de saut."""
+        step = dy * stride + dx
+        while True:
+            i += step
+            if i == goal_index:
+                return i  # Le but peut être une case ordinaire
+            cell = grid[i]
+            if cell != 1:
+                if reached(i):
+                    return i
+                if cell == 0:
+                    return None
+            if dx and dy:
+                if (not passable(i - dx) and passable(i - dx + dy * stride)) or (
+                    not passable(i - dy * stride) and passable(i + dx - dy * stride)
+                ):
+                    return i
+                if jump(i, dx, 0) is not None or jump(i, 0, dy) is not None:
+                    return i
+            elif dx:
+                if (not passable(i + stride) and passable(i + stride + dx)) or (
+                    not passable(i - stride) and passable(i - stride + dx)
+                ):
+                    return i
+            else:
+                if (not passable(i + 1) and passable(i + 1 + dy * stride)) or (
+                    not passable(i - 1) and passable(i - 1 + dy * stride)
+                ):
+                    return i
+
+    def directions(i, parent):
+        """Voisins conservés après élagage (tous pour le départ)."""
+        if parent is None:
+            return DIRECTIONS
+        x, y = i % stride, i // stride
+        px, py = parent % stride, parent // stride
+        dx = (x > px) - (x < px)
+        dy = (y > py) - (y < py)
+        if dx and dy:
+            dirs = [(dx, 0), (0, dy), (dx, dy)]
+            if not passable(i - dx):
+                dirs.append((-dx, dy))
+            if not passable(i - dy * stride):
+                dirs.append((dx, -dy))
+        elif dx:
+            dirs = [(dx, 0)]
+            if not passable(i + stride):
+                dirs.append((dx, 1))
+            if not passable(i - stride):
+                dirs.append((dx, -1))
+        else:
+            dirs = [(0, dy)]
+            if not passable(i + 1):
+                dirs.append((1, dy))
+            if not passable(i - 1):
+                dirs.append((-1, dy))
+        return dirs
+
+    def estimate(i):
+        if goal is None:
+            return 0
+        return max(abs(i % stride - 1 - goal[0]), abs(i // stride - 1 - goal[1]))
+
+    start_index = (start[1] + 1) * stride + start[0] + 1
+    open_list = [(estimate(start_index), start_index)]
+    came_from = {}
+    cost_so_far = {start_index: 0}
+    closed = set()
+
+    while open_list:
+        _, current = heapq.heappop(open_list)
+        if current in closed:
+            continue
+        closed.add(current)
+        stats.expanded += 1
+
+        if reached(current):
+            jump_points = [
+                (i % stride - 1, i // stride - 1)
+                for i in reconstruct_path(came_from, current)
+            ]
+            return _expand_jumps(start, jump_points)
+
+        for dx, dy in directions(current, came_from.get(current)):
+            jump_point = jump(current, dx, dy)
+            if jump_point is None or jump_point in closed:
+                continue
+            distance = max(
+                abs(jump_point % stride - current % stride),
+                abs(jump_point // stride - current // stride),
+            )
+            new_cost = cost_so_far[current] + distance
+            if new_cost < cost_so_far.get(jump_point, INF):
+                cost_so_far[jump_point] = new_cost
+                came_from[jump_point] = current
+                heapq.heappush(open_list, (new_cost + estimate(jump_point), jump_point))
+
+    return None
+
+
+def _expand_jumps(start, jump_points):
+    """Détaille une suite de points de saut en cases successives."""
+    path = []
+    x, y = start
+    for target_x, target_y in jump_points:
+        while (x, y) != (target_x, target_y):
+            x += (target_x > x) - (target_x < x)
+            y += (target_y > y) - (target_y < y)
+            path.append((x, y))
+    return path
+
+
+def nearest_batch(game_map, starts, is_goal, sources=None, stats=None):
+    """Un seul parcours en largeur depuis toutes les cibles pour plusieurs départs.
+
+    Renvoie {départ: (prochain pas, distance, chemin)} ; le parcours s'arrête dès
+    que tous les départs sont atteints. Un départ non franchissable (unité sur un bâtiment)
+    sort par son meilleur voisin, comme DistanceField.distance. sources (les cases
+    cibles) évite de balayer toute la carte pour les trouver.
+    """
+    stats = stats or search_stats
+    stats.searches += 1
+    width, height = game_map.width, game_map.height
+    pending = set(starts)
+    result = {start: (None, INF, None) for start in pending}
+    dist = {}
+    came_from = {}  # Case -> voisin d'un pas plus proche d'une cible (None pour une cible)
+    queue = deque()
+
+    if sources is None:
+        sources = [(x, y) for y in range(height) for x in range(width) if is_goal(x, y)]
+    for source in sources:
+        dist[source] = 0
+        came_from[source] = None
+        queue.append(source)
+        if source in pending:
+            result[source] = (None, 0, [])
+            pending.discard(source)
+
+    while queue and pending:
+        x, y = queue.popleft()
+        stats.expanded += 1
+        next_dist = dist[(x, y)] + 1
+        for dx, dy in DIRECTIONS:
+            node = (nx, ny) = (x + dx, y + dy)
+            if not (0 <= nx < width and 0 <= ny < height) or node in dist:
+                continue
+            if node in pending:
+                # Le parent est d'un pas plus proche d'une cible : c'est le prochain pas
+                result[node] = ((x, y), next_dist, _path_down(came_from, (x, y)))
+                pending.discard(node)
+            if game_map.is_walkable(nx, ny):
+                dist[node] = next_dist
+                came_from[node] = (x, y)
+                queue.append(node)
+    return result
+
+
+def _path_down(came_from, node):
+    """Chemin de node jusqu'à la cible d'un parcours multi-sources (came_from[cible] = None)."""
+    path = []
+    while node is not None:
+        path.append(node)
+        node = came_from[node]
+    return path
+
+
+class DistanceField:
+    """Champ de distance multi-sources vers un type de cible (bois, or, ferme, Town Center).
+
+    Chaque case franchissable contient le nombre de pas jusqu'à la cible la plus
+    proche : n'importe quelle unité lit sa distance et son prochain pas en O(1).
+    Quand une case change, le champ est réparé localement (voir repair).
+    """
+
+    def __init__(self, game_map, target_type, target_building=None):
+        self.game_map = game_map
+        self.target_type = target_type
+        self.target_building = target_building
+        self.dist = []
+        self.stale = True
+        self.last_repair_touched = 0  # Cases touchées par la dernière réparation
+        self.total_repair_touched = 0
+        self.repair_count = 0
+        self.rebuild()
+
+    def is_source(self, x, y):
+        return self.game_map.matches_target(
+            x, y, self.target_type, self.target_building
+        )
+
+    def rebuild(self):
+        """Recalcule tout le champ par un parcours en largeur depuis toutes les cibles."""
+        game_map = self.game_map
+        width, height = game_map.width, game_map.height
+        dist = [INF] * (width * height)
+        queue = deque()
+
+        # Les cibles viennent de l'index spatial de la carte : pas de balayage complet
+        for x, y in game_map.target_positions(self.target_type, self.target_building):
+            dist[y * width + x] = 0
+            queue.append((x, y))
+
+        while queue:
+            x, y = queue.popleft()
+            next_dist = dist[y * width + x] + 1
+            for dx, dy in DIRECTIONS:
+                nx, ny = x + dx, y + dy
+                if 0 <= nx < width and 0 <= ny < height:
+                    index = ny * width + nx
+                    if dist[index] == INF and game_map.is_walkable(nx, ny):
+                        dist[index] = next_dist
+                        queue.append((nx, ny))
+
+        self.dist = dist
+        self.stale = False
+
+    def repair(self, x, y):
+        """Répare le champ après la modification de la case (x, y).
+
+        Renvoie le nombre de cases touchées, au lieu d'un recalcul complet.
+        """
+        width = self.game_map.width
+        dist = self.dist
+        index = y * width + x
+        old = dist[index]
+
+        if self.is_source(x, y):
+            new = 0
+        elif self.game_map.is_walkable(x, y):
+            new = self._neighbor_distance(x, y) + 1
+        else:
+            new = INF
+
+        touched = 0
+        if new < old:
+            # La case se rapproche d'une cible : propagation vers l'extérieur
+            dist[index] = new
+            touched = self._lower([(new, x, y)])
+        elif new > old:
+            # Les cases qui passaient par celle-ci perdent leur distance
+            region = self._dependents(x, y)
+            for i in region:
+                dist[i] = INF
+            heap = []
+            for i in region:
+                rx, ry = i % width, i // width
+                if self.is_source(rx, ry):
+                    dist[i] = 0
+                    heap.append((0, rx, ry))
+                    continue
+                for nx, ny in self._neighbors(rx, ry):
+                    n = ny * width + nx
+                    if n not in region and dist[n] != INF:
+                        heap.append((dist[n], nx, ny))
+            touched = len(region) + self._lower(heap)
+
+        self.last_repair_touched = touched
+        self.total_repair_touched += touched
+        self.repair_count += 1
+        return touched
+
+    def _neighbors(self, x, y):
+        width, height = self.game_map.width, self.game_map.height
+        for dx, dy in DIRECTIONS:
+            nx, ny = x + dx, y + dy
+            if 0 <= nx < width and 0 <= ny < height:
+                yield nx, ny
+
+    def _dependents(self, x, y):
+        """Cases dont la plus courte distance passe obligatoirement par (x, y)."""
+        width = self.game_map.width
+        dist = self.dist
+        start = y * width + x
+        region = {start}
+        queue = deque([(x, y)])
+
+        # Parcours par niveaux : un niveau est complet avant d'examiner le suivant
+        while queue:
+            cx, cy = queue.popleft()
+            expected = dist[cy * width + cx] + 1
+            for nx, ny in self._neighbors(cx, cy):
+                n = ny * width + nx
+                if n in region or dist[n] != expected:
+                    continue
+                supported = False
+                for sx, sy in self._neighbors(nx, ny):
+                    s = sy * width + sx
+                    if dist[s] == expected - 1 and s not in region:
+                        supported = True
+                        break
+                if not supported:
+                    region.add(n)
+                    queue.append((nx, ny))
+        return region
+
+    def _lower(self, heap):
+        """Propage des distances plus courtes depuis les cases du tas ; renvoie les cases visitées."""
+        game_map = self.game_map
+        width = game_map.width
+        dist = self.dist
+        heapq.heapify(heap)
+        touched = 0
+
+        while heap:
+            d, x, y = heapq.heappop(heap)
+            if d > dist[y * width + x]:
+                continue
+            touched += 1
+            for nx, ny in self._neighbors(x, y):
+                n = ny * width + nx
+                if d + 1 < dist[n] and game_map.is_walkable(nx, ny):
+                    dist[n] = d + 1
+                    heapq.heappush(heap, (d + 1, nx, ny))
+        return touched
+
+    def _neighbor_distance(self, x, y):
+        """Plus petite distance parmi les voisins d'une case (INF si aucun)."""
+        width, height = self.game_map.width, self.game_map.height
+        best = INF
+        for dx, dy in DIRECTIONS:
+            nx, ny = x + dx, y + dy
+            if 0 <= nx < width and 0 <= ny < height:
+                best = min(best, self.dist[ny * width + nx])
+        return best
+
+    def distance(self, x, y):
+        """Nombre de pas depuis (x, y) jusqu'à la cible la plus proche."""
+        d = self.dist[y * self.game_map.width + x]
+        if d != INF or self.game_map.is_walkable(x, y):
+            return d
+        # Case non franchissable (ex : unité posée sur le Town Center) : on sort par un voisin
+        return self._neighbor_distance(x, y) + 1
+
+    def next_step(self, x, y):
+        """Renvoie la case suivante vers la cible la plus proche, ou None."""
+        current = self.distance(x, y)
+        if current == 0 or current == INF:
+            return None
+        width, height = self.game_map.width, self.game_map.height
+        for dx, dy in DIRECTIONS:
+            nx, ny = x + dx, y + dy
+            if 0 <= nx < width and 0 <= ny < height:
+                if self.dist[ny * width + nx] == current - 1:
+                    return (nx, ny)
+        return None
+
+    def path_from(self, x, y):
+        """Chemin complet (sans la case de départ) en suivant le champ, ou None."""
+        if self.distance(x, y) == INF:
+            return None
+        path = []
+        step = self.next_step(x, y)
+        while step is not None:
+            path.append(step)
+            step = self.next_step(*step)
+        return path
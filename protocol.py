@@ -0,0 +1,206 @@
+import struct
+
+# Format binaire v1 d'un message : en-tête fixe (MAGIC, version, type) puis les
+# champs numériques du type packés d'un bloc, puis ses chaînes (longueur sur un
+# octet + UTF-8). Le premier octet d'un message texte (« TYPE|k:v,... ») est
+# toujours ASCII : MAGIC suffit à distinguer les deux formats à la réception.
+MAGIC = 0xAE
+VERSION = 1
+HEADER = struct.Struct("!BBB")
+
+FORMAT_TEXT = 1
+FORMAT_BINARY = 2
+# Capacité annoncée dans le même champ du HELLO : voie fiable (RELIABLE / RACK)
+FEATURE_RELIABLE = 4
+SUPPORTED_FORMATS = FORMAT_TEXT | FORMAT_BINARY | FEATURE_RELIABLE
+
+# Type -> (identifiant, champs). Code struct par champ, "s" pour une chaîne.
+MESSAGES = {
+    # session : tiré au démarrage de l'émetteur, change s'il redémarre
+    "HELLO": (1, (("version", "B"), ("formats", "B"), ("seen", "B"), ("session", "I"))),
+    "PING": (2, (("unit_id", "I"), ("x", "I"), ("y", "I"))),
+    "UNIT_UPDATE": (3, (("id", "I"), ("x", "I"), ("y", "I"), ("type", "s"), ("owner", "s"))),
+    "BUILDING_STATE": (4, (("x", "I"), ("y", "I"), ("type", "s"), ("owner", "s"))),
+    "RESOURCES": (5, (("wood", "i"), ("gold", "i"), ("food", "i"))),
+    "UPDATE_MAP": (6, (("x", "I"), ("y", "I"), ("action", "s"))),
+    # wood, gold, cluster : amas de bois, d'or et taille des forêts choisis par l'hôte
+    "MAP_INIT": (7, (("seed", "q"), ("width", "I"), ("height", "I"), ("wood", "H"), ("gold", "H"),
+                     ("cluster", "H"), ("generator", "s"))),
+    "SNAPSHOT": (8, (("seq", "I"), ("count", "I"), ("keyframe", "B"))),
+    "SYNC_ACK": (9, (("seq", "I"),)),
+    # Lockstep (lockstep.LockstepSession) : commandes d'un tour, puis sa clôture
+    # (unit : identifiant réseau de l'unité visée)
+    "COMMAND": (10, (("turn", "I"), ("index", "H"), ("seed", "q"), ("unit", "I"), ("x", "i"), ("y", "i"),
+                     ("player", "s"), ("kind", "s"), ("target", "s"))),
+    # checked : dernier tour simulé par l'émetteur, hash : son empreinte (Map.state_hash)
+    "TURN": (11, (("turn", "I"), ("count", "H"), ("ack", "i"), ("seed", "q"), ("checked", "i"),
+                  ("hash", "Q"), ("player", "s"))),
+    # Zone de la carte affichée par l'émetteur (interest.InterestArea)
+    "VIEW": (12, (("x0", "i"), ("y0", "i"), ("x1", "i"), ("y1", "i"))),
+    # Voie fiable (reliable.ReliableChannel) : message numéroté (champs en « k=v;k=v »), confirmation
+    "RELIABLE": (13, (("seq", "I"), ("type", "s"), ("payload", "s"))),
+    "RACK": (14, (("ack", "I"), ("bits", "I"))),
+}
+
+
+# Datagramme regroupant plusieurs messages binaires : en-tête puis (longueur, message)*
+BATCH_TYPE = 100
+BATCH_HEADER = HEADER.pack(MAGIC, VERSION, BATCH_TYPE)
+LENGTH = struct.Struct("!H")
+
+
+class ProtocolError(ValueError):
+    """Message binaire illisible (tronqué, version ou type inconnus)."""
+
+
+class _Schema:
+    __slots__ = ("name", "type_id", "header", "numbers", "strings", "packer")
+
+    def __init__(self, name, type_id, fields):
+        self.name = name
+        self.type_id = type_id
+        self.header = HEADER.pack(MAGIC, VERSION, type_id)
+        self.numbers = [field for field, code in fields if code != "s"]
+        self.strings = [field for field, code in fields if code == "s"]
+        self.packer = struct.Struct("!" + "".join(code for _, code in fields if code != "s"))
+
+
+_SCHEMAS = {name: _Schema(name, type_id, fields) for name, (type_id, fields) in MESSAGES.items()}
+_BY_ID = {schema.type_id: schema for schema in _SCHEMAS.values()}
+
+
+def is_binary(data, size=None):
+    return (len(data) if size is None else size) > 0 and data[0] == MAGIC
+
+
+def encode(msg_type, fields):
+    """Message binaire (bytes) ; les champs absents valent 0 ou une chaîne vide."""
+    schema = _SCHEMAS[msg_type]
+    data = schema.header + schema.packer.pack(*[fields.get(name, 0) for name in schema.numbers])
+    for name in schema.strings:
+        value = fields.get(name)
+        if name in _UNCACHED:
+            data += _pack_string(value)
+            continue
+        raw = _STRINGS.get(value)
+        if raw is None:
+            raw = _encode_string(value)
+        data += raw
+    return data
+
+
+# Chaînes déjà encodées : types d'unité, joueurs... reviennent à chaque message
+_STRINGS = {}
+# Champs presque toujours différents (champs d'un message RELIABLE) : ils rempliraient _STRINGS
+_UNCACHED = frozenset(("payload",))
+
+
+def _pack_string(value):
+    raw = b"" if value is None else str(value).encode()[:255]
+    return bytes((len(raw),)) + raw
+
+
+def _encode_string(value):
+    raw = _pack_string(value)
+    if len(_STRINGS) < 1024:
+        _STRINGS[value] = raw
+    return raw
+
+
+def decode(data, start=0, end=None):
+    """Renvoie (type, champs) du message binaire data[start:end] ; lève ProtocolError s'il est illisible.
+
+    Le message est lu sur place (tampon de réception, message d'un lot) : seules
+    les chaînes des champs sont copiées.
+    """
+    if end is None:
+        end = len(data)
+    if end - start < HEADER.size:
+        raise ProtocolError("message tronqué")
+    magic, version, type_id = data[start], data[start + 1], data[start + 2]
+    if magic != MAGIC or version != VERSION:
+        raise ProtocolError(f"version {version} non supportée")
+    schema = _BY_ID.get(type_id)
+    if schema is None:
+        raise ProtocolError(f"type {type_id} inconnu")
+    offset = start + HEADER.size
+    if offset + schema.packer.size > end:
+        raise ProtocolError("message tronqué")
+    fields = dict(zip(schema.numbers, schema.packer.unpack_from(data, offset)))
+    offset += schema.packer.size
+    for name in schema.strings:
+        if offset >= end:
+            raise ProtocolError("chaîne tronquée")
+        string_end = offset + 1 + data[offset]
+        if string_end > end:
+            raise ProtocolError("chaîne tronquée")
+        fields[name] = data[offset + 1:string_end].decode(errors="replace") or None
+        offset = string_end
+    return schema.name, fields
+
+
+def parse_text(payload):
+    """Champs d'un payload texte « k:v,k:v » (comme controller.parse_kv)."""
+    out = {}
+    for part in payload.split(","):
+        if ":" in part:
+            k, v = part.split(":", 1)
+            out[k.strip()] = v.strip()
+    return out
+
+
+def encode_text(msg_type, fields):
+    """Même message au format texte historique « TYPE|k:v,k:v »."""
+    payload = ",".join(f"{name}:{value}" for name, value in fields.items())
+    return f"{msg_type}|{payload}" if payload else msg_type
+
+
+def is_batch(data, size=None):
+    size = len(data) if size is None else size
+    return size >= HEADER.size and data[0] == MAGIC and data[2] == BATCH_TYPE
+
+
+def batch_spans(data, size=None):
+    """Positions (début, fin) des messages d'un datagramme groupé, à passer à decode."""
+    size = len(data) if size is None else size
+    spans = []
+    offset = HEADER.size
+    while offset < size:
+        if offset + LENGTH.size > size:
+            raise ProtocolError("lot tronqué")
+        (length,) = LENGTH.unpack_from(data, offset)
+        offset += LENGTH.size
+        if offset + length > size:
+            raise ProtocolError("lot tronqué")
+        spans.append((offset, offset + length))
+        offset += length
+    return spans
+
+
+class Batcher:
+    """Regroupe les messages binaires d'une frame en datagrammes d'au plus mtu octets."""
+
+    def __init__(self, mtu):
+        self.mtu = mtu
+        self.messages = []
+        self.size = HEADER.size  # Taille du datagramme groupé en cours
+
+    def add(self, message):
+        """Ajoute un message ; renvoie le datagramme précédent s'il fallait le fermer, sinon None."""
+        ready = None
+        if self.messages and self.size + LENGTH.size + len(message) > self.mtu:
+            ready = self.flush()
+        self.messages.append(message)
+        self.size += LENGTH.size + len(message)
+        return ready
+
+    def flush(self):
+        """Datagramme des messages en attente (None s'il n'y en a pas)."""
+        if not self.messages:
+            return None
+        messages = self.messages
+        self.messages = []
+        self.size = HEADER.size
+        if len(messages) == 1:
+            return messages[0]  # Un message seul part sans en-tête de lot
+        return BATCH_HEADER + b"".join(LENGTH.pack(len(m)) + m for m in messages)
@@ -0,0 +1,124 @@
+import threading
+
+RESEND_INTERVAL = 0.2  # Secondes avant de renvoyer un message fiable non confirmé
+RESEND_MAX = 50  # Au-delà (10 s sans confirmation), le pair est parti : le message est abandonné
+ACK_BITS = 32  # Messages confirmés par un RACK en plus du dernier reçu
+RECEIVED_WINDOW = 1024  # Numéros reçus mémorisés pour écarter les doublons
+
+
+def pack_fields(fields):
+    """Champs d'un message transporté par RELIABLE : « k=v;k=v », sans les ',' et ':' du format texte."""
+    return ";".join(f"{name}={value}" for name, value in fields.items())
+
+
+def unpack_fields(payload):
+    out = {}
+    for part in payload.split(";"):
+        if "=" in part:
+            k, v = part.split("=", 1)
+            out[k] = v
+    return out
+
+
+class ReliableChannel:
+    """Voie fiable des messages qui ne doivent pas se perdre (suppression de ressource, bâtiment).
+
+    Chaque message fiable reçoit un numéro et part dans une enveloppe RELIABLE ;
+    le récepteur le remet une seule fois au jeu et le confirme par RACK (dernier
+    numéro reçu et champ de bits des ACK_BITS précédents), joint au prochain
+    datagramme envoyé. Seuls les messages non confirmés après resend_interval
+    sont renvoyés. Les positions des unités restent sur la voie ordinaire : un
+    état perdu est remplacé par le suivant.
+    """
+
+    def __init__(self, resend_interval=RESEND_INTERVAL):
+        self.resend_interval = resend_interval
+        self.seq = 0
+        self.unacked = {}  # seq -> [type, champs, heure du dernier envoi, envois]
+        self.states = {}  # clé d'entité -> dernier état envoyé (changed)
+        self.received = set()  # Numéros reçus du pair, au plus RECEIVED_WINDOW sous highest
+        self.highest = 0
+        self.to_ack = set()  # Reçus depuis le dernier RACK (doublons compris : le RACK a pu se perdre)
+        self.resent = 0  # Renvois (mesure)
+        self.dropped = 0  # Messages abandonnés sans confirmation
+        # Les envois viennent de la boucle de jeu, la réception peut venir du thread réseau
+        self.lock = threading.Lock()
+
+    def register(self, msg_type, fields, now):
+        """Numéro du nouveau message fiable, gardé jusqu'à sa confirmation."""
+        with self.lock:
+            self.seq += 1
+            self.unacked[self.seq] = [msg_type, fields, now, 1]
+            return self.seq
+
+    def changed(self, key, fields):
+        """L'entité key a-t-elle changé depuis son dernier envoi fiable ? (mémorise fields)"""
+        with self.lock:
+            if self.states.get(key) == fields:
+                return False
+            self.states[key] = fields
+            return True
+
+    def due(self, now):
+        """Messages (seq, type, champs) non confirmés à renvoyer."""
+        with self.lock:
+            resend = []
+            for seq, entry in list(self.unacked.items()):
+                if now - entry[2] < self.resend_interval:
+                    continue
+                if entry[3] >= RESEND_MAX:
+                    del self.unacked[seq]
+                    self.dropped += 1
+                    continue
+                entry[2] = now
+                entry[3] += 1
+                resend.append((seq, entry[0], entry[1]))
+            self.resent += len(resend)
+            return resend
+
+    def acknowledge(self, ack, bits):
+        """RACK du pair : ack et les numéros marqués dans bits (bit i : ack - 1 - i) sont reçus."""
+        with self.lock:
+            unacked = self.unacked
+            unacked.pop(ack, None)
+            for i in range(ACK_BITS):
+                if bits >> i & 1:
+                    unacked.pop(ack - 1 - i, None)
+
+    def receive(self, seq):
+        """Message fiable seq du pair ; renvoie True s'il est nouveau et doit être remis au jeu."""
+        with self.lock:
+            self.to_ack.add(seq)
+            if seq in self.received or seq <= self.highest - RECEIVED_WINDOW:
+                return False
+            self.received.add(seq)
+            if seq > self.highest:
+                self.highest = seq
+                if len(self.received) > 2 * RECEIVED_WINDOW:
+                    floor = seq - RECEIVED_WINDOW
+                    self.received = {s for s in self.received if s > floor}
+            return True
+
+    def acks(self):
+        """RACK (ack, bits) couvrant les numéros reçus depuis le dernier appel (un seul d'habitude)."""
+        with self.lock:
+            received, pending = self.received, sorted(self.to_ack, reverse=True)
+            self.to_ack = set()
+            acks = []
+            while pending:
+                ack = pending[0]
+                bits = 0
+                for i in range(ACK_BITS):
+                    if ack - 1 - i in received:
+                        bits |= 1 << i
+                acks.append((ack, bits))
+                pending = [seq for seq in pending if seq < ack - ACK_BITS]
+            return acks
+
+    def peer_reset(self):
+        """Le pair (re)démarre : ses numéros repartent de 1, ses états sont à renvoyer."""
+        with self.lock:
+            self.received = set()
+            self.highest = 0
+            self.to_ack = set()
+            self.states = {}
@@ -0,0 +1,170 @@
+BUCKET_SIZE = 16
+
+
+def chebyshev(x0, y0, x1, y1):
+    """Distance en nombre de pas avec déplacements diagonaux (minorant du chemin réel)."""
+    return max(abs(x0 - x1), abs(y0 - y1))
+
+
+class ResourceIndex:
+    """Index spatial des cases de ressource, par type, sous forme de grille de seaux.
+
+    Chaque seau couvre BUCKET_SIZE x BUCKET_SIZE cases : les requêtes (k plus
+    proches, rayon) n'examinent que les seaux voisins de la position demandée,
+    leur coût dépend donc des ressources proches et non de la taille de la carte.
+    """
+
+    def __init__(self, bucket_size=BUCKET_SIZE):
+        self.bucket_size = bucket_size
+        self.buckets = {}  # type -> {(bx, by): {cases}}
+        self.kinds = {}  # case -> types sous lesquels elle est indexée
+        self.counts = {}  # type -> nombre de cases indexées
+
+    def update(self, x, y, kinds):
+        """Met à jour l'index pour la case (x, y) ; kinds contient ses types (vide si rien)."""
+        position = (x, y)
+        kinds = frozenset(kinds)
+        old = self.kinds.get(position, frozenset())
+        if old == kinds:
+            return
+        bucket = (x // self.bucket_size, y // self.bucket_size)
+        for kind in old - kinds:
+            cells = self.buckets[kind][bucket]
+            cells.discard(position)
+            if not cells:
+                del self.buckets[kind][bucket]
+            self.counts[kind] -= 1
+        for kind in kinds - old:
+            self.buckets.setdefault(kind, {}).setdefault(bucket, set()).add(position)
+            self.counts[kind] = self.counts.get(kind, 0) + 1
+        if kinds:
+            self.kinds[position] = kinds
+        else:
+            del self.kinds[position]
+
+    def count(self, resource):
+        return self.counts.get(resource, 0)
+
+    def positions(self, resource):
+        """Toutes les cases indexées pour ce type."""
+        for cells in self.buckets.get(resource, {}).values():
+            yield from cells
+
+    def within(self, resource, x, y, radius):
+        """Cases du type donné à au plus radius pas de (x, y)."""
+        buckets = self.buckets.get(resource, {})
+        size = self.bucket_size
+        found = []
+        for by in range((y - radius) // size, (y + radius) // size + 1):
+            for bx in range((x - radius) // size, (x + radius) // size + 1):
+                for cx, cy in buckets.get((bx, by), ()):
+                    if chebyshev(x, y, cx, cy) <= radius:
+                        found.append((cx, cy))
+        return found
+
+    def nearest(self, resource, x, y, k=1):
+        """Les k cases du type donné les plus proches de (x, y), de la plus proche à la plus lointaine."""
+        buckets = self.buckets.get(resource)
+        if not buckets or k <= 0:
+            return []
+        size = self.bucket_size
+        bx, by = x // size, y // size
+        candidates = []
+        seen = 0
+        ring = 0
+        while True:
+            for cell in self._ring(bx, by, ring):
+                cells = buckets.get(cell)
+                if cells:
+                    seen += len(cells)
+                    candidates.extend(
+                        (chebyshev(x, y, cx, cy), cy, cx) for cx, cy in cells
+                    )
+            # Toute case hors des anneaux déjà parcourus est à plus de ring * size pas
+            candidates.sort()
+            if seen == self.counts[resource] or (
+                len(candidates) >= k and candidates[k - 1][0] <= ring * size
+            ):
+                return [(cx, cy) for _, cy, cx in candidates[:k]]
+            ring += 1
+
+    def nearest_distance(self, resource, x, y):
+        """Distance (en pas, sans obstacle) jusqu'à la case la plus proche du type, ou None."""
+        buckets = self.buckets.get(resource)
+        if not buckets:
+            return None
+        # Version sans tri de nearest(k=1) : appelée pour chaque noeud d'un A*
+        size = self.bucket_size
+        bx, by = x // size, y // size
+        best = None
+        ring = 0
+        while best is None or best > (ring - 1) * size:
+            for cell in self._ring(bx, by, ring):
+                for cx, cy in buckets.get(cell, ()):
+                    d = max(abs(cx - x), abs(cy - y))
+                    if best is None or d < best:
+                        best = d
+            ring += 1
+        return best
+
+    @staticmethod
+    def _ring(bx, by, ring):
+        """Seaux à exactement ring seaux de distance de (bx, by)."""
+        if ring == 0:
+            yield (bx, by)
+            return
+        for dx in range(-ring, ring + 1):
+            yield (bx + dx, by - ring)
+            yield (bx + dx, by + ring)
+        for dy in range(-ring + 1, ring):
+            yield (bx - ring, by + dy)
+            yield (bx + ring, by + dy)
+
+
+class OccupancyGrid:
+    """Unités présentes sur chaque case, avec une grille de seaux pour les requêtes par rectangle."""
+
+    def __init__(self, bucket_size=BUCKET_SIZE):
+        self.bucket_size = bucket_size
+        self.cells = {}  # (x, y) -> [unités]
+        self.buckets = {}  # (bx, by) -> {cases occupées}
+
+    def add(self, unit, x, y):
+        cell = self.cells.get((x, y))
+        if cell is None:
+            self.cells[(x, y)] = [unit]
+            bucket = (x // self.bucket_size, y // self.bucket_size)
+            self.buckets.setdefault(bucket, set()).add((x, y))
+        elif unit not in cell:
+            cell.append(unit)
+
+    def remove(self, unit, x, y):
+        cell = self.cells.get((x, y))
+        if cell is None or unit not in cell:
+            return
+        cell.remove(unit)
+        if not cell:
+            del self.cells[(x, y)]
+            bucket = (x // self.bucket_size, y // self.bucket_size)
+            self.buckets[bucket].discard((x, y))
+            if not self.buckets[bucket]:
+                del self.buckets[bucket]
+
+    def at(self, x, y):
+        """Unités sur la case (x, y)."""
+        return list(self.cells.get((x, y), ()))
+
+    def first(self, x, y):
+        cell = self.cells.get((x, y))
+        return cell[0] if cell else None
+
+    def in_rect(self, x0, y0, x1, y1):
+        """Unités dans le rectangle [x0, x1[ x [y0, y1[."""
+        size = self.bucket_size
+        found = []
+        for by in range(y0 // size, (y1 - 1) // size + 1):
+            for bx in range(x0 // size, (x1 - 1) // size + 1):
+                for x, y in self.buckets.get((bx, by), ()):
+                    if x0 <= x < x1 and y0 <= y < y1:
+                        found.extend(self.cells[(x, y)])
+        return found
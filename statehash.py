@@ -0,0 +1,48 @@
+import zlib
+
+# Empreinte Zobrist de l'état du jeu : XOR d'une clé 64 bits par élément (ressource d'une
+# case, bâtiment, unité à sa position). Ajouter ou retirer un élément revient à XORer sa
+# clé, une modification coûte donc O(1). Les clés sont calculées (splitmix64) plutôt que
+# tirées dans des tables : une carte en chunks peut être très grande.
+_MASK = (1 << 64) - 1
+
+_RESOURCE = 1
+_BUILDING = 2
+_UNIT = 3
+
+_NAMES = {}  # Chaîne -> entier stable (hash() change d'un processus à l'autre)
+
+
+def _name(value):
+    code = _NAMES.get(value)
+    if code is None:
+        code = 0 if value is None else zlib.crc32(str(value).encode())
+        _NAMES[value] = code
+    return code
+
+
+def _key(kind, a, b, c):
+    z = (kind * 0x9E3779B97F4A7C15 + a * 0xBF58476D1CE4E5B9 + b * 0x94D049BB133111EB + c) & _MASK
+    z = ((z ^ (z >> 30)) * 0xBF58476D1CE4E5B9) & _MASK
+    z = ((z ^ (z >> 27)) * 0x94D049BB133111EB) & _MASK
+    return z ^ (z >> 31)
+
+
+def base_key(seed, width, height):
+    """Empreinte d'une carte sans ressource, bâtiment ni unité."""
+    return _key(0, _name(seed), width, height)
+
+
+def resource_key(index, code):
+    """Clé de la ressource code (Map.resource_names) sur la case index ; 0 pour une case vide."""
+    return _key(_RESOURCE, index, code, 0) if code else 0
+
+
+def building_key(index, building):
+    if building is None:
+        return 0
+    return _key(_BUILDING, index, _name(building.building_type), _name(building.owner))
+
+
+def unit_key(index, unit):
+    return _key(_UNIT, index, unit.network_id, _name(unit.owner))
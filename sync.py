@@ -0,0 +1,87 @@
+import threading
+
+# Un envoi sur KEYFRAME_INTERVAL renvoie tout l'état (toutes les 5 s à un envoi par 0,5 s)
+KEYFRAME_INTERVAL = 10
+# Envois en attente de confirmation gardés au plus (les plus anciens sont oubliés)
+PENDING_MAX = 32
+
+
+class StateSync:
+    """Synchronisation de l'état du jeu en delta par rapport au dernier état confirmé.
+
+    Côté envoi, delta() ne garde que les entités dont l'état diffère de celui que
+    le pair a confirmé (SYNC_ACK) ; tant qu'une modification n'est pas confirmée
+    elle est renvoyée. Une keyframe périodique renvoie tout, pour rattraper un
+    pair qui aurait perdu son état ; les entités qu'elle n'a pas pu envoyer
+    (budget) restent à rafraîchir aux envois suivants. Côté réception, un SNAPSHOT termine chaque
+    envoi : il n'est confirmé que si tous ses messages sont arrivés.
+    """
+
+    ENTITY_MESSAGES = ("UNIT_UPDATE", "BUILDING_STATE", "RESOURCES")
+
+    def __init__(self, keyframe_interval=KEYFRAME_INTERVAL):
+        self.keyframe_interval = keyframe_interval
+        self.seq = 0
+        self.acked = {}  # clé d'entité -> état confirmé par le pair
+        self.pending = {}  # seq -> {clé: état} envoyés, pas encore confirmés
+        self.refresh = set()  # Clés de la dernière keyframe pas encore envoyées (budget)
+        self.received = 0  # Messages d'entité reçus depuis le dernier SNAPSHOT
+        self.sent_entities = 0  # Messages d'entité envoyés (mesure)
+        # delta() vient de la boucle de jeu, acknowledge() peut venir du thread réseau
+        self.lock = threading.Lock()
+
+    def delta(self, states, select=None):
+        """Renvoie (seq, keyframe, {clé: état}) à envoyer pour l'état courant states.
+
+        select, s'il est donné, réduit les changements à ceux qui partent vraiment
+        (budget d'envoi) : les autres restent à envoyer au prochain appel.
+        """
+        with self.lock:
+            self.seq += 1
+            keyframe = (self.seq - 1) % self.keyframe_interval == 0
+            refresh = self.refresh
+            if keyframe:
+                refresh = self.refresh = set(states)
+            else:
+                refresh.intersection_update(states)  # Entités disparues depuis la keyframe
+            acked = self.acked
+            changed = {
+                key: state for key, state in states.items()
+                if key in refresh or acked.get(key) != state
+            }
+            if select is not None:
+                changed = select(changed)
+            refresh.difference_update(changed)
+            self.pending[self.seq] = changed
+            if len(self.pending) > PENDING_MAX:
+                self._forget(self.pending.pop(min(self.pending)), ())
+            self.sent_entities += len(changed)
+            return self.seq, keyframe, changed
+
+    def acknowledge(self, seq):
+        """Le pair a reçu tout l'envoi seq : ses états deviennent la référence."""
+        with self.lock:
+            sent = self.pending.get(seq)
+            if sent is None:
+                return  # Déjà confirmé, ou trop ancien
+            del self.pending[seq]
+            # Un envoi plus ancien, non confirmé, a pu arriver ou non : l'état que le pair a
+            # gardé pour ses entités absentes de seq est inconnu, elles seront renvoyées
+            for old in sorted(s for s in self.pending if s < seq):
+                self._forget(self.pending.pop(old), sent)
+            self.acked.update(sent)
+
+    def _forget(self, sent, confirmed):
+        """Oublie l'état confirmé des entités d'un envoi perdu de vue, sauf celles de confirmed."""
+        for key in sent:
+            if key not in confirmed:
+                self.acked.pop(key, None)
+
+    def entity_received(self):
+        self.received += 1
+
+    def snapshot_received(self, seq, count):
+        """Fin d'un envoi du pair ; renvoie True s'il est complet et doit être confirmé."""
+        complete = self.received == count
+        self.received = 0
+        return complete
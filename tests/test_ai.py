@@ -0,0 +1,19 @@
+import pytest
+
+from ai_strategies.base_strategies import AI
+from model import Building, Map
+
+
+def test_owner_is_keyword_only():
+    buildings = [Building("Town Center", 10, 10, "J2")]
+    with pytest.raises(TypeError):
+        AI(AI(buildings, []), buildings, [])
+
+
+def test_farms_belong_to_the_ai_owner():
+    game_map = Map(30, 30)
+    town_center = Building("Town Center", 10, 10, "J2")
+    game_map.place_building(town_center, 10, 10)
+    ai = AI([town_center], [], owner="J2")
+    ai.build(game_map)
+    assert [b.owner for b in ai.buildings] == ["J2", "J2"]
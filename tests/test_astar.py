@@ -0,0 +1,9 @@
+from model import Map
+from pathfinding import astar
+
+
+def test_astar_to_explicit_goal():
+    game_map = Map(60, 60)
+    goal = (5, 5)
+    path = astar(game_map, (0, 0), lambda x, y: (x, y) == goal, goal=goal)
+    assert path is not None and len(path) == 5 and path[-1] == goal
@@ -0,0 +1,27 @@
+import protocol
+
+SAMPLES = {
+    "UNIT_UPDATE": dict(id=12, x=1, y=2, type="Villager", owner="J1"),
+    "SNAPSHOT": dict(seq=9, count=2, keyframe=1),
+    "RACK": dict(ack=5, bits=2**32 - 1),
+}
+
+
+def test_batch_spans():
+    batcher = protocol.Batcher(1200)
+    messages = [protocol.encode(t, SAMPLES[t]) for t in ("UNIT_UPDATE", "SNAPSHOT", "RACK")]
+    for message in messages:
+        assert batcher.add(message) is None
+    data = batcher.flush()
+    assert protocol.is_batch(data)
+    decoded = [protocol.decode(data, start, end) for start, end in protocol.batch_spans(data)]
+    assert decoded == [(t, SAMPLES[t]) for t in ("UNIT_UPDATE", "SNAPSHOT", "RACK")]
+
+
+def test_batcher_respects_mtu():
+    message = protocol.encode("UNIT_UPDATE", SAMPLES["UNIT_UPDATE"])
+    batcher = protocol.Batcher(100)
+    datagrams = [d for d in (batcher.add(message) for _ in range(10)) if d is not None]
+    datagrams.append(batcher.flush())
+    assert all(len(d) <= 100 for d in datagrams)
+    assert sum(len(protocol.batch_spans(d)) if protocol.is_batch(d) else 1 for d in datagrams) == 10
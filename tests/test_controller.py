@@ -0,0 +1,62 @@
+import pytest
+
+pytest.importorskip("pygame")
+
+import controller  # noqa: E402
+from model import Map, Unit  # noqa: E402
+
+
+@pytest.mark.parametrize("x, y", [(-1, 3), (3, 10), (10, 0)])
+def test_unit_update_out_of_bounds_is_rejected(x, y):
+    game_map, units = Map(10, 10), []
+    data = {"id": "1", "x": str(x), "y": str(y), "owner": "J2", "type": "Villager"}
+    assert not controller.network_messages.dispatch("UNIT_UPDATE", data, units, [], game_map, None)
+    assert units == [] and game_map.occupancy.cells == {}
+
+
+def test_map_init_too_small_for_known_units_is_rejected():
+    game_map = Map(120, 120)
+    unit = Unit("Villager", 109, 109, None, owner="J1")
+    game_map.add_unit(unit)
+    data = {"seed": "5", "width": "100", "height": "100", "generator": "classic"}
+    assert not controller.network_messages.dispatch("MAP_INIT", data, [unit], [], game_map, None)
+    assert game_map.width == 120 and unit.game_map is game_map
+
+
+class _Wire:
+    def send_message(self, msg_type, **fields):
+        self.sent = (msg_type, fields)
+
+
+def test_map_init_carries_the_resource_settings():
+    sender = Map(80, 80, 9)
+    sender.generate_resources(25, 1, 15)
+    wire = _Wire()
+    controller.send_map_init(wire, sender)
+    msg_type, fields = wire.sent
+    receiver = Map(80, 80, 1)
+    data = {key: str(value) for key, value in fields.items()}  # Comme un MAP_INIT texte
+    assert controller.network_messages.dispatch(msg_type, data, [], [], receiver, None)
+    assert receiver.resource_settings == (25, 1, 15)
+    assert receiver.checksum() == sender.checksum()
+
+
+def test_lockstep_commands_are_checked_against_the_turn_state(monkeypatch):
+    import model
+
+    for name in ("units", "buildings", "game_map", "ai", "lockstep_session"):
+        monkeypatch.setattr(controller, name, getattr(controller, name))
+    monkeypatch.setattr(model, "Joueur", model.Joueur)
+    monkeypatch.setattr(model, "clock", model.clock)
+    controller.start_lockstep(60, 60, 3, "classic", "J1")
+    game_map, ais = controller.game_map, controller.lockstep_ais
+    context = (controller.units, controller.buildings, game_map, ais, controller.current_strategy)
+
+    gather = dict(player="J2", unit="1", target="Wood")
+    assert controller.lockstep_commands.dispatch("GATHER", gather, *context)
+    assert game_map.entities.unit("J2", 1).path_target_type == "Wood"
+    town_center = ais["J1"].town_center
+    build = dict(player="J1", x=str(town_center.x), y=str(town_center.y), target="Farm")
+    assert controller.lockstep_commands.dispatch("BUILD", build, *context)  # Case occupée : rien n'est construit
+    assert len(controller.buildings) == 2
+    assert not controller.lockstep_commands.dispatch("GATHER", dict(gather, target="Stone"), *context)
@@ -0,0 +1,37 @@
+import pytest
+
+from dispatch import MessageDispatcher, MessageRejected
+
+
+def make_dispatcher(handler):
+    dispatcher = MessageDispatcher()
+    dispatcher.handler("MOVE", x=int)(handler)
+    return dispatcher
+
+
+def test_malformed_fields_are_rejected():
+    calls = []
+    dispatcher = make_dispatcher(lambda data: calls.append(data))
+    assert not dispatcher.dispatch("MOVE", {"x": "abc"})
+    assert not dispatcher.dispatch("MOVE", {})
+    assert dispatcher.dispatch("MOVE", {"x": "3"})
+    assert calls == [{"x": 3}] and dispatcher.rejected["MOVE"] == 2
+
+
+def test_handler_can_reject():
+    def handler(data):
+        raise MessageRejected("hors limites")
+
+    dispatcher = make_dispatcher(handler)
+    assert not dispatcher.dispatch("MOVE", {"x": 1})
+    assert dispatcher.rejected["MOVE"] == 1
+
+
+def test_handler_errors_propagate():
+    def handler(data):
+        raise KeyError("bug")
+
+    dispatcher = make_dispatcher(handler)
+    with pytest.raises(KeyError):
+        dispatcher.dispatch("MOVE", {"x": 1})
+    assert dispatcher.rejected["MOVE"] == 0
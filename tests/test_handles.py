@@ -0,0 +1,43 @@
+import pickle
+import random
+
+from model import Map, Building, Unit
+
+
+def test_removed_objects_are_released():
+    rng = random.Random(1)
+    game_map = Map(20, 20)
+    for _ in range(200):
+        unit = Unit("Villager", rng.randrange(20), rng.randrange(20), None, owner="J1")
+        game_map.add_unit(unit)
+        unit.move(rng.randrange(20), rng.randrange(20))
+        game_map.remove_unit(unit)
+        x, y = rng.randrange(20), rng.randrange(20)
+        game_map.place_building(Building("House", x, y, "J1"), x, y)
+        game_map.set_building(x, y, None)
+    assert [obj for obj in game_map._handles.objects if obj is not None] == []
+    assert len(game_map._handles.objects) < 10
+
+
+def test_handles_survive_pickling():
+    game_map = Map(20, 20)
+    house = Building("House", 3, 4, "J1")
+    game_map.place_building(house, 3, 4)
+    unit = Unit("Villager", 5, 5, None, owner="J1")
+    game_map.add_unit(unit)
+    gone = Unit("Villager", 6, 6, None, owner="J2")
+    game_map.add_unit(gone)
+    game_map.remove_unit(gone)
+
+    loaded = pickle.loads(pickle.dumps(game_map))
+    assert loaded.building_at(3, 4).building_type == "House"
+    assert loaded.grid[5][5].unit.network_id == unit.network_id
+    kept = [obj for obj in loaded._handles.objects if obj is not None]
+    assert len(kept) == 2
+    loaded.set_building(3, 4, None)
+    assert loaded.building_at(3, 4) is None
+
+
+def test_tile_views_have_no_dict():
+    game_map = Map(5, 5)
+    assert not hasattr(game_map.grid[1][1], "__dict__")
@@ -0,0 +1,38 @@
+import random
+
+from model import Map
+from pathfinding import astar, jps
+
+
+def _map(seed, width=40, height=30):
+    game_map = Map(width, height, seed)
+    game_map.generate_forest_clusters(6, 40)
+    game_map.generate_gold_clusters(3)
+    return game_map
+
+
+def test_jps_matches_astar_length():
+    rng = random.Random(2)
+    for seed in range(10):
+        game_map = _map(seed)
+
+        def is_wood(x, y):
+            return game_map.resource_at(x, y) == "Wood"
+
+        for _ in range(10):
+            start = (rng.randrange(game_map.width), rng.randrange(game_map.height))
+            if not game_map.is_walkable(*start):
+                continue
+            expected = astar(game_map, start, is_wood)
+            found = jps(game_map, start, is_wood)
+            assert (found is None) == (expected is None)
+            if found is not None:
+                assert len(found) == len(expected)
+                assert is_wood(*found[-1])
+
+
+def test_jps_to_explicit_goal_on_plain_tile():
+    game_map = Map(60, 60)
+    goal = (5, 5)
+    path = jps(game_map, (0, 0), lambda x, y: (x, y) == goal, goal=goal)
+    assert path is not None and len(path) == 5 and path[-1] == goal
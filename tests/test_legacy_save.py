@@ -0,0 +1,42 @@
+import os
+import pickle
+import random
+
+from model import Map, Building, Tile
+
+
+def test_legacy_grid_save_loads():
+    # Sauvegarde d'avant le stockage compact : liste de listes de Tile, sans empreinte
+    grid = [[Tile() for _ in range(8)] for _ in range(6)]
+    grid[1][2].resource = "Wood"
+    house = Building("House", 4, 3, "J1")
+    grid[3][4].building = house
+    legacy = Map.__new__(Map)
+    legacy.__setstate__({"width": 8, "height": 6, "seed": 3, "rng": random.Random(3), "grid": grid})
+    assert legacy.resource_at(2, 1) == "Wood" and legacy.building_at(4, 3) is house
+    legacy.sync_units([])  # Comme load_game_state
+    legacy.sync_buildings([house])
+    state_hash = legacy.state_hash
+    legacy.rehash()
+    assert legacy.state_hash == state_hash
+
+
+def test_grid_only_save_loads():
+    # Toutes premières sauvegardes : ni graine ni générateur
+    grid = [[Tile() for _ in range(5)] for _ in range(4)]
+    grid[2][3].resource = "Gold"
+    legacy = Map.__new__(Map)
+    legacy.__setstate__({"width": 5, "height": 4, "grid": grid})
+    legacy.sync_units([])
+    assert legacy.seed == 4173 and legacy.resource_at(3, 2) == "Gold"
+    state_hash = legacy.state_hash
+    legacy.rehash()
+    assert legacy.state_hash == state_hash
+
+
+def test_repository_save_loads():
+    with open(os.path.join(os.path.dirname(__file__), "..", "saves", "aaaa.pkl"), "rb") as file:
+        units, buildings, game_map, ai = pickle.load(file)
+    game_map.sync_units(units)
+    game_map.sync_buildings(buildings)
+    assert all(game_map.building_at(b.x, b.y) is b for b in buildings)
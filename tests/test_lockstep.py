@@ -0,0 +1,89 @@
+from lockstep import LockstepSession
+
+
+class Wire:
+    def __init__(self, drop=()):
+        self.sent = []
+        self.drop = set(drop)  # Types de messages perdus en route
+
+    def send_message(self, msg_type, **fields):
+        if msg_type not in self.drop:
+            self.sent.append((msg_type, fields))
+
+    def deliver(self, session):
+        for msg_type, fields in self.sent:
+            if msg_type == "COMMAND":
+                session.receive_command(dict(fields))
+            else:
+                session.receive_turn(dict(fields))
+        self.sent.clear()
+
+
+def _pair(delay=2):
+    return LockstepSession(7, ("J1", "J2"), "J1", delay=delay), LockstepSession(7, ("J1", "J2"), "J2", delay=delay)
+
+
+def test_turns_wait_for_every_player():
+    j1, j2 = _pair()
+    assert not j1.ready()
+    wire = Wire()
+    j2.send(wire)
+    wire.deliver(j1)
+    assert [j1.ready() and j1.advance() == [] for _ in range(2)] == [True, True]
+    assert not j1.ready()  # Tour 2 pas encore clos par J2
+    j2.advance()
+    j2.send(wire)
+    wire.deliver(j1)
+    assert j1.ready()
+
+
+def test_commands_are_played_delay_turns_later_on_every_peer():
+    j1, j2 = _pair()
+    wire = Wire()
+    j2.issue("GATHER", unit=3, target="Wood")  # Avant le tour 0 : jouée au tour 2
+    j2.advance()
+    j2.send(wire)
+    wire.deliver(j1)
+    assert j1.advance() == [] and j1.advance() == []
+    j2.advance()
+    j2_turn2 = j2.advance()
+    assert j1.ready() and j1.advance() == j2_turn2
+    assert j2_turn2 == [dict(kind="GATHER", unit=3, x=0, y=0, target="Wood", player="J2")]
+
+
+def test_lost_command_is_resent_until_acknowledged():
+    j1, j2 = _pair()
+    j2.issue("BUILD", x=4, y=5, target="Farm")
+    j2.advance()
+    lossy = Wire(drop={"COMMAND"})
+    j2.send(lossy)
+    lossy.deliver(j1)
+    j1.advance(), j1.advance()
+    assert not j1.ready()  # TURN du tour 2 reçu, sa commande non
+    wire = Wire()
+    j2.send(wire)
+    wire.deliver(j1)
+    assert j1.ready() and j1.advance()[0]["kind"] == "BUILD"
+
+
+def test_other_game_is_rejected():
+    session = LockstepSession(7, ("J1", "J2"), "J1")
+    session.receive_turn(dict(turn=0, count=0, ack=-1, seed=8, player="J2", checked=-1, hash=0))
+    session.receive_turn(dict(turn=0, count=0, ack=-1, seed=7, player="J3", checked=-1, hash=0))
+    assert session.rejected == 2 and not session.ready()
+
+
+def test_first_desync_turn_is_recorded():
+    session = LockstepSession(7, ("J1", "J2"), "J1")
+    session.receive_turn(dict(turn=5, count=0, ack=-1, seed=7, player="J2", checked=0, hash=1))
+    session.advance()
+    session.record_hash(2)
+    assert session.desync_turn == 0 and session.desyncs == 1
+    assert session.desync_report().startswith("[DESYNC] Tour 0") and session.desync_report() is None
+
+
+def test_turn_rng_is_shared_per_turn_and_stream():
+    j1, j2 = _pair()
+    j1.advance(), j2.advance()
+    assert j1.rng("ai:J1").random() == j2.rng("ai:J1").random()
+    assert j1.rng("ai:J1").random() != j1.rng("ai:J2").random()
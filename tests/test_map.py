@@ -0,0 +1,13 @@
+import pytest
+
+from model import Map, Unit
+
+
+def test_units_cannot_leave_the_map():
+    game_map = Map(10, 10)
+    unit = Unit("Villager", 2, 2, None, owner="J1")
+    game_map.add_unit(unit)
+    with pytest.raises(AssertionError):
+        game_map.add_unit(Unit("Villager", -1, 3, None, owner="J1"))
+    with pytest.raises(AssertionError):
+        unit.move(2, 10)
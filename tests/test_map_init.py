@@ -0,0 +1,40 @@
+import random
+
+import pytest
+
+from model import Map, Building, Unit
+
+
+def _receiver_buildings(rng):
+    """Bâtiments du pair qui reçoit MAP_INIT : son Town Center et quelques maisons."""
+    buildings = [Building("Town Center", 110, 110, "J2")]
+    for _ in range(6):
+        x, y = rng.randrange(120), rng.randrange(120)
+        buildings.append(Building("House", x, y, "J2"))
+    return buildings
+
+
+@pytest.mark.parametrize("seed", range(40))
+def test_receiver_rebuilds_the_sender_map(seed):
+    rng = random.Random(seed)
+    theirs = _receiver_buildings(rng)
+
+    # Hôte : ressources générées, puis son Town Center ; les bâtiments du pair arrivent ensuite
+    sender = Map(120, 120, seed)
+    sender.generate_resources(*Map.MAP_INIT_RESOURCES)
+    town_center = Building("Town Center", 10, 10, "J1")
+    sender.place_building(town_center, 10, 10)
+    for building in theirs:
+        sender.place_building(building, building.x, building.y)
+
+    # Pair : sa carte locale est remplacée à la réception de MAP_INIT
+    receiver = Map(120, 120, seed + 1000)
+    for building in theirs:
+        receiver.place_building(building, building.x, building.y)
+    units = [Unit("Villager", 109, 109, None, owner="J2")]
+    receiver.sync_units(units)
+    receiver.rebuild(120, 120, seed, "classic", theirs, units)
+    receiver.place_building(town_center, 10, 10)
+
+    assert receiver.checksum() == sender.checksum()
+    assert receiver.units_at(109, 109) == units
@@ -0,0 +1,28 @@
+from model import Map
+from pathfinding import astar, nearest_batch
+
+
+def _map(seed, width=40, height=30):
+    game_map = Map(width, height, seed)
+    game_map.generate_forest_clusters(6, 40)
+    game_map.generate_gold_clusters(3)
+    return game_map
+
+
+def test_nearest_batch_paths_match_distances():
+    game_map = _map(3)
+
+    def is_gold(x, y):
+        return game_map.resource_at(x, y) == "Gold"
+
+    starts = [(x, y) for x in range(0, 40, 7) for y in range(0, 30, 7) if game_map.is_walkable(x, y)]
+    for start, (step, distance, path) in nearest_batch(game_map, starts, is_gold).items():
+        expected = astar(game_map, start, is_gold)
+        assert distance == len(expected)
+        assert len(path) == distance and is_gold(*path[-1])
+        previous = start
+        for node in path:
+            assert max(abs(node[0] - previous[0]), abs(node[1] - previous[1])) == 1
+            previous = node
+        assert all(game_map.is_walkable(*node) for node in path[:-1])
+        assert step == (path[0] if path else None)
@@ -0,0 +1,43 @@
+import threading
+import time
+
+import network
+
+
+def test_async_client_prints_and_sends_from_game_thread(monkeypatch):
+    shown = []
+    monkeypatch.setattr(network, "Print_Display", lambda text: shown.append((text, threading.current_thread())))
+    sent = []
+    real_send = network.NetworkClient._send_raw
+
+    def record(self, data):
+        sent.append(threading.current_thread())
+        real_send(self, data)
+
+    monkeypatch.setattr(network.NetworkClient, "_send_raw", record)
+    a = network.NetworkClient(7520, 7521)
+    b = network.AsyncNetworkClient(7521, 7520)
+    try:
+        for _ in range(10):
+            a.poll(); b.poll(); a.flush(); b.flush()
+            b.consume_messages()
+            time.sleep(0.02)
+        assert b.connected
+        assert shown and all(thread is threading.main_thread() for _, thread in shown)
+        assert sent and b.thread not in sent
+    finally:
+        b.close(); a.close()
+
+
+def test_reliable_state_is_reset_only_when_the_peer_restarts():
+    client = network.NetworkClient(7530, 7531)
+    try:
+        client._receive_hello(dict(version=1, formats=7, seen=0, session=11))
+        assert client.reliable.receive(1)
+        # HELLO répété avant que le pair nous entende : même démarrage, le doublon reste écarté
+        client._receive_hello(dict(version=1, formats=7, seen=0, session=11))
+        assert not client.reliable.receive(1)
+        client._receive_hello(dict(version=1, formats=7, seen=0, session=12))
+        assert client.reliable.receive(1)
+    finally:
+        client.close()
@@ -0,0 +1,36 @@
+import random
+
+from model import Map, Building
+from pathfinding import DistanceField
+
+
+def _map(seed, width=40, height=30):
+    game_map = Map(width, height, seed)
+    game_map.generate_forest_clusters(6, 40)
+    game_map.generate_gold_clusters(3)
+    return game_map
+
+
+def test_repair_matches_rebuild():
+    rng = random.Random(5)
+    for trial in range(10):
+        game_map = _map(trial)
+        town_center = Building("Town Center", 5, 5)
+        game_map.place_building(town_center, 5, 5)
+        keys = [("Wood", None), ("Gold", None), ("Farm", None), ("Town Center", town_center)]
+        for key in keys:
+            game_map.distance_field(*key)
+        for _ in range(40):
+            x, y = rng.randrange(game_map.width), rng.randrange(game_map.height)
+            r = rng.random()
+            if r < 0.4:
+                game_map.set_resource(x, y, None)
+            elif r < 0.6:
+                game_map.set_resource(x, y, "Wood")
+            elif r < 0.7:
+                game_map.set_resource(x, y, "Gold")
+            else:
+                building_type = "Farm" if r < 0.85 else "House"
+                game_map.place_building(Building(building_type, x, y), x, y)
+            for key in keys:
+                assert game_map.distance_field(*key).dist == DistanceField(game_map, *key).dist
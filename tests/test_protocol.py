@@ -0,0 +1,55 @@
+import pytest
+
+import protocol
+
+SAMPLES = {
+    "HELLO": dict(version=1, formats=7, seen=1, session=2**31 - 1),
+    "PING": dict(unit_id=3, x=4, y=5),
+    "UNIT_UPDATE": dict(id=12, x=1, y=2, type="Villager", owner="J1"),
+    "BUILDING_STATE": dict(x=10, y=11, type="Town Center", owner="J2"),
+    "RESOURCES": dict(wood=-5, gold=100, food=3),
+    "UPDATE_MAP": dict(x=7, y=8, action="DELETE_RESOURCE"),
+    "MAP_INIT": dict(seed=-123456789, width=120, height=120, wood=10, gold=4, cluster=40, generator="classic"),
+    "SNAPSHOT": dict(seq=9, count=2, keyframe=1),
+    "SYNC_ACK": dict(seq=9),
+    "COMMAND": dict(turn=4, index=0, seed=42, unit=3, x=-1, y=3, player="J1", kind="BUILD", target="Farm"),
+    "TURN": dict(turn=4, count=1, ack=-1, seed=42, checked=3, hash=2**64 - 1, player="J2"),
+    "VIEW": dict(x0=-3, y0=0, x1=40, y1=30),
+    "RELIABLE": dict(seq=5, type="UPDATE_MAP", payload="action=DELETE_RESOURCE;x=1;y=2"),
+    "RACK": dict(ack=5, bits=2**32 - 1),
+}
+
+
+def test_every_message_has_a_sample():
+    assert set(SAMPLES) == set(protocol.MESSAGES)
+
+
+@pytest.mark.parametrize("msg_type", sorted(SAMPLES))
+def test_binary_round_trip(msg_type):
+    fields = SAMPLES[msg_type]
+    data = protocol.encode(msg_type, fields)
+    assert protocol.is_binary(data)
+    assert protocol.decode(data) == (msg_type, fields)
+
+
+def test_text_round_trip():
+    text = protocol.encode_text("UPDATE_MAP", SAMPLES["UPDATE_MAP"])
+    msg_type, payload = text.split("|", 1)
+    assert msg_type == "UPDATE_MAP"
+    assert protocol.parse_text(payload) == {k: str(v) for k, v in SAMPLES["UPDATE_MAP"].items()}
+    assert not protocol.is_binary(text.encode())
+
+
+def test_truncated_message_is_rejected():
+    data = protocol.encode("UNIT_UPDATE", SAMPLES["UNIT_UPDATE"])
+    with pytest.raises(protocol.ProtocolError):
+        protocol.decode(data[:-3])
+    with pytest.raises(protocol.ProtocolError):
+        protocol.decode(bytes((protocol.MAGIC, protocol.VERSION, 99)))
+
+
+def test_reliable_payloads_are_not_cached():
+    before = len(protocol._STRINGS)
+    for seq in range(50):
+        protocol.encode("RELIABLE", dict(seq=seq, type="UPDATE_MAP", payload=f"x={seq};y=3"))
+    assert len(protocol._STRINGS) <= before + 1  # Seul le type du message interne
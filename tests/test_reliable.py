@@ -0,0 +1,55 @@
+from reliable import ReliableChannel, pack_fields, unpack_fields
+
+
+def _exchange(sender, receiver):
+    for ack, bits in receiver.acks():
+        sender.acknowledge(ack, bits)
+
+
+def test_acks_cover_every_received_message():
+    sender, receiver = ReliableChannel(), ReliableChannel()
+    for i in range(100):
+        sender.register("UPDATE_MAP", {"i": i}, 0.0)
+    lost = (5, 70)
+    for seq in range(1, 101):
+        if seq not in lost:
+            assert receiver.receive(seq)
+    _exchange(sender, receiver)
+    assert sorted(sender.unacked) == list(lost)
+
+
+def test_only_unacked_messages_are_resent():
+    sender, receiver = ReliableChannel(resend_interval=0.2), ReliableChannel()
+    for i in range(3):
+        sender.register("UPDATE_MAP", {"i": i}, 0.0)
+    receiver.receive(1)
+    receiver.receive(3)
+    _exchange(sender, receiver)
+    assert sender.due(0.1) == []
+    assert sender.due(0.3) == [(2, "UPDATE_MAP", {"i": 1})]
+    assert receiver.receive(2)
+    _exchange(sender, receiver)
+    assert sender.unacked == {}
+
+
+def test_duplicates_are_delivered_once_but_acked_again():
+    sender, receiver = ReliableChannel(), ReliableChannel()
+    sender.register("BUILDING_STATE", {}, 0.0)
+    assert receiver.receive(1)
+    receiver.acks()  # RACK perdu
+    assert not receiver.receive(1)
+    _exchange(sender, receiver)
+    assert sender.unacked == {}
+
+
+def test_changed_remembers_last_state():
+    channel = ReliableChannel()
+    key = ("BUILDING_STATE", 1, 2)
+    assert channel.changed(key, {"type": "House"})
+    assert not channel.changed(key, {"type": "House"})
+    assert channel.changed(key, {"type": "Farm"})
+
+
+def test_fields_round_trip():
+    fields = {"type": "Town Center", "x": "3", "owner": "J1"}
+    assert unpack_fields(pack_fields(fields)) == fields
@@ -0,0 +1,53 @@
+import random
+
+import pytest
+
+from model import Map, Building, Unit
+
+
+@pytest.mark.parametrize("size, chunked", [(30, False), (70, True)])
+def test_incremental_hash_matches_rehash(size, chunked):
+    rng = random.Random(7)
+    game_map = Map(size, size, 11, chunked=chunked)
+    game_map.generate_resources(4, 2, 20)
+    units = [Unit("Villager", rng.randrange(size), rng.randrange(size), None, owner="J1") for _ in range(10)]
+    for unit in units:
+        game_map.add_unit(unit)
+    for _ in range(300):
+        r = rng.random()
+        x, y = rng.randrange(size), rng.randrange(size)
+        if r < 0.3:
+            game_map.set_resource(x, y, rng.choice((None, "Wood", "Gold")))
+        elif r < 0.4:
+            game_map.place_building(Building(rng.choice(("House", "Farm")), x, y, "J2"), x, y)
+        elif r < 0.45:
+            game_map.set_building(x, y, None)
+        elif r < 0.5 and units:
+            game_map.remove_unit(units.pop())
+        else:
+            if units:
+                rng.choice(units).move(x, y)
+        expected = game_map.state_hash
+        game_map.rehash()
+        assert game_map.state_hash == expected
+
+
+def test_hash_differs_with_state():
+    a, b = Map(20, 20, 3), Map(20, 20, 3)
+    assert a.state_hash == b.state_hash
+    b.set_resource(4, 4, "Gold")
+    assert a.state_hash != b.state_hash
+    b.set_resource(4, 4, None)
+    assert a.state_hash == b.state_hash
+
+
+def test_chunked_depletion_survives_rehash():
+    untouched, game_map = Map(70, 70, 5, chunked=True), Map(70, 70, 5, chunked=True)
+    for m in (untouched, game_map):
+        m.generate_resources(10, 4, 40)
+    x, y = next((x, y) for y in range(70) for x in range(70) if game_map.resource_at(x, y))
+    game_map.set_resource(x, y, None)
+    expected = game_map.state_hash
+    game_map.rehash()
+    untouched.rehash()
+    assert game_map.state_hash == expected != untouched.state_hash
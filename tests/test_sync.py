@@ -0,0 +1,76 @@
+from sync import StateSync
+
+KEY = ("UNIT_UPDATE", 1)
+A = {"id": 1, "x": 0, "y": 0}
+B = {"id": 1, "x": 1, "y": 0}
+
+
+def _sync():
+    # Pas de keyframe pendant le test : seules les différences partent
+    return StateSync(keyframe_interval=1000)
+
+
+def test_unchanged_state_is_not_resent():
+    sync = _sync()
+    seq, keyframe, changed = sync.delta({KEY: A})
+    assert keyframe and changed == {KEY: A}
+    sync.acknowledge(seq)
+    assert sync.delta({KEY: A})[2] == {}
+
+
+def test_unconfirmed_change_is_resent():
+    sync = _sync()
+    sync.acknowledge(sync.delta({KEY: A})[0])
+    assert sync.delta({KEY: B})[2] == {KEY: B}
+    assert sync.delta({KEY: B})[2] == {KEY: B}  # Pas encore confirmé
+
+
+def test_revert_after_unconfirmed_change_is_resent():
+    sync = _sync()
+    sync.acknowledge(sync.delta({KEY: A})[0])
+    sync.delta({KEY: B})  # seq 2 : le pair l'a peut-être reçu
+    seq, _, changed = sync.delta({KEY: A})  # Retour à A : rien ne diffère de l'état confirmé
+    assert changed == {}
+    sync.acknowledge(seq)
+    # Le pair peut garder B : A doit repartir
+    assert sync.delta({KEY: A})[2] == {KEY: A}
+
+
+def test_newer_send_wins_over_older():
+    sync = _sync()
+    sync.acknowledge(sync.delta({KEY: A})[0])
+    sync.delta({KEY: B})
+    seq, _, changed = sync.delta({KEY: A, ("RESOURCES",): {"wood": 1}})
+    sync.acknowledge(seq)
+    assert sync.delta({KEY: A, ("RESOURCES",): {"wood": 1}})[2] == {KEY: A}
+
+
+def test_snapshot_counts_entities():
+    sync = _sync()
+    sync.entity_received()
+    sync.entity_received()
+    assert sync.snapshot_received(1, 2)
+    sync.entity_received()
+    assert not sync.snapshot_received(2, 2)
+
+
+def test_keyframe_entities_over_budget_are_refreshed_later():
+    sync = StateSync(keyframe_interval=2)
+    other = ("UNIT_UPDATE", 2)
+    states = {KEY: A, other: {"id": 2, "x": 5, "y": 5}}
+    for key in states:
+        sync.acknowledge(sync.delta({key: states[key]})[0])
+    first = lambda changed: dict(list(changed.items())[:1])  # noqa: E731
+    seq, keyframe, changed = sync.delta(states, first)
+    assert keyframe and list(changed) == [KEY]
+    # L'autre entité, déjà confirmée, part quand même à l'envoi suivant
+    assert sync.delta(states, first)[2] == {other: states[other]}
+    assert sync.refresh == set()
+
+
+def test_refresh_forgets_removed_entities():
+    sync = StateSync(keyframe_interval=3)
+    other = ("UNIT_UPDATE", 2)
+    sync.delta({KEY: A, other: B}, lambda changed: {})
+    assert sync.delta({KEY: A})[2] == {KEY: A}
+    assert sync.refresh == set()
@@ -80,6 +80,10 @@ def define_boxes(stdscr):
 
     Print_Display("Affichage initialisé.")
 
+def visible_rect(view_x, view_y):
+    """Zone de la carte affichée : [x0, x1[ x [y0, y1[."""
+    return view_x, view_y, view_x + int(max_clm / 2), view_y + max_row
+
 def display_with_curses(stdscr, game_map, units, game_state, ai, view_x, view_y):
     
  # Efface l'écran pour éviter les résidus
@@ -90,9 +94,12 @@ def display_with_curses(stdscr, game_map, units, game_state, ai, view_x, view_y)
 
     #unit_positions = {(unit.x, unit.y): unit.unit_type[0] for unit in units}  # 'V' pour villageois
 
+    _, _, end_view_x, end_view_y = visible_rect(view_x, view_y)
+
     unit_positions = {}
     #Print_Display(f"[DEBUG] Nombre d'unités à afficher : {len(units)}")
-    for unit in units:
+    # Seules les unités de la zone affichée, lues dans l'occupation de la carte
+    for unit in game_map.units_in_rect(view_x, view_y, end_view_x, end_view_y):
         # Détermine la couleur selon le propriétaire
         if unit.owner == "J1":
             color_pair = 10  # Bleu pour J1
@@ -103,9 +110,6 @@ def display_with_curses(stdscr, game_map, units, game_state, ai, view_x, view_y)
 
     mapDisplay.border( 0 )
 
-    end_view_y = view_y + max_row
-    end_view_x = view_x + int(max_clm / 2)
-
    # Print_Display(f"Affichage de la carte de ({view_x}, {view_y}) à ({end_view_x}, {end_view_y})")
     for y in range(view_y , end_view_y):
         for x in range(view_x , end_view_x ):
@@ -47,6 +47,12 @@ def colorize_image(image, color):
     return colored_image
 # ==================================================================
 
+def visible_rect(game_map, view_x, view_y, max_width, max_height):
+    """Zone de la carte dessinée (vue isométrique) : [x0, x1[ x [y0, y1[."""
+    x0, x1 = max(0, view_x - max_width), min(view_x + max_width * 2, game_map.width)
+    y0, y1 = max(0, view_y - max_height), min(view_y + max_height * 2, game_map.height)
+    return x0, y0, x1, y1
+
 def render_map(screen, game_map, units, buildings, game_state, view_x, view_y, max_width, max_height):
     """
     MODIFIÉ : Prend maintenant game_state au lieu de ai pour accéder aux couleurs
@@ -57,9 +63,12 @@ def render_map(screen, game_map, units, buildings, game_state, view_x, view_y, m
     # Clear the screen
     screen.fill((0, 0, 0))
 
+    # Zone dessinée : [x0, x1[ x [y0, y1[
+    x0, y0, x1, y1 = visible_rect(game_map, view_x, view_y, max_width, max_height)
+
     # Render map tiles
-    for y in range(max(0, view_y - max_height), min(view_y + max_height * 2, game_map.height)):
-        for x in range(max(0, view_x - max_width), min(view_x + max_width * 2, game_map.width)):
+    for y in range(y0, y1):
+        for x in range(x0, x1):
             # Calcul des coordonnées isométriques
             iso_x = (x - y) * (TILE_WIDTH // 2) + (screen_width // 2) - TILE_WIDTH // 2 - (view_x - view_y) * (TILE_WIDTH // 2)
             iso_y = (x + y) * (TILE_HEIGHT // 2) - (view_x + view_y) * (TILE_HEIGHT // 2)
@@ -73,7 +82,7 @@ def render_map(screen, game_map, units, buildings, game_state, view_x, view_y, m
                 screen.blit(images['grass'], (iso_x, iso_y))
 
     # ========== Render buildings ==========
-    for building in buildings:
+    for building in game_map.entities.buildings_in_rect(x0, y0, x1, y1):
         screen_x = (building.x - building.y) * (TILE_WIDTH // 2) + (screen_width // 2) - TILE_WIDTH // 2 - (view_x - view_y) * (TILE_WIDTH // 2)
         screen_y = (building.x + building.y) * (TILE_HEIGHT // 2) - (view_x + view_y) * (TILE_HEIGHT // 2)
         
@@ -85,7 +94,7 @@ def render_map(screen, game_map, units, buildings, game_state, view_x, view_y, m
     # =====================================
 
     # ========== Render units ==========
-    for unit in units:
+    for unit in game_map.units_in_rect(x0, y0, x1, y1):
         screen_x = (unit.x - unit.y) * (TILE_WIDTH // 2) + (screen_width // 2) - TILE_WIDTH // 2 - (view_x - view_y) * (TILE_WIDTH // 2)
         screen_y = (unit.x + unit.y) * (TILE_HEIGHT // 2) - (view_x + view_y) * (TILE_HEIGHT // 2)
         